@@ -11,6 +11,11 @@ class Cart(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     deleted_at = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['deleted_at', 'created_at', 'id'], name='cart_listing_idx'),
+        ]
+
     def delete(self, *args, **kwargs):
         self.deleted_at = timezone.now()
         self.status = False
@@ -6,3 +6,8 @@ class CartSerializer(serializers.ModelSerializer):
     class Meta:
         model = Cart
         fields = ['id', 'client', 'status', 'created_at', 'updated_at', 'deleted_at']
+
+
+class SessionCartItemSerializer(serializers.Serializer):
+    product = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1)
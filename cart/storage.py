@@ -0,0 +1,173 @@
+import re
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from cart.models import Cart
+from cartItem.services import CartError, add_to_cart
+
+SESSION_COOKIE = 'cart_session'
+SESSION_HEADER = 'X-Cart-Session'
+_SESSION_KEY = re.compile(r'^[0-9a-f]{32}$')
+# seconds a change may hold a session cart's lock, and seconds another change waits for it
+LOCK_TIMEOUT = 5
+LOCK_WAIT = 2
+
+
+class CartStorage(ABC):
+    """
+    Interface of a cart kept outside the relational database, identified by a session key.
+
+    Items are `{product_id: quantity}`; the persistent `Cart` only receives them on merge.
+    """
+
+    def __init__(self, session_key):
+        self.session_key = session_key
+
+    @abstractmethod
+    def lock(self):
+        """
+        Context manager keeping other changes to this cart out until it exits. It is re-entrant,
+        so the changes below can be called while it is held.
+        """
+
+    @abstractmethod
+    def items(self) -> dict:
+        pass
+
+    @abstractmethod
+    def add(self, product_id, quantity) -> int:
+        pass
+
+    @abstractmethod
+    def set(self, product_id, quantity) -> None:
+        pass
+
+    def remove(self, product_id) -> None:
+        self.set(product_id, 0)
+
+    @abstractmethod
+    def clear(self) -> None:
+        pass
+
+
+class CacheCartStorage(CartStorage):
+    """
+    Keeps the cart in the CART_CACHE_ALIAS cache (Redis, Memcached or local memory) for
+    CART_SESSION_TIMEOUT seconds after the last change.
+
+    Every change reads, modifies and writes the whole cart under a per-session lock taken
+    with the atomic `cache.add`, so concurrent changes to one cart are applied one after the
+    other instead of overwriting each other.
+    """
+
+    def __init__(self, session_key):
+        super().__init__(session_key)
+        # how many nested `lock()` blocks this instance is in
+        self._lock_depth = 0
+
+    @property
+    def _cache(self):
+        return caches[settings.CART_CACHE_ALIAS]
+
+    @property
+    def _key(self) -> str:
+        return f'cart:session:{self.session_key}'
+
+    @contextmanager
+    def lock(self):
+        key = f'{self._key}:lock'
+        if not self._lock_depth:
+            deadline = time.monotonic() + LOCK_WAIT
+            while not self._cache.add(key, True, LOCK_TIMEOUT):
+                if time.monotonic() > deadline:
+                    raise CartError('Cart is busy, try again')
+                time.sleep(0.01)
+        self._lock_depth += 1
+        try:
+            yield
+        finally:
+            self._lock_depth -= 1
+            if not self._lock_depth:
+                self._cache.delete(key)
+
+    def items(self) -> dict:
+        return self._cache.get(self._key) or {}
+
+    def _save(self, items) -> None:
+        if items:
+            self._cache.set(self._key, items, settings.CART_SESSION_TIMEOUT)
+        else:
+            self._cache.delete(self._key)
+
+    def add(self, product_id, quantity) -> int:
+        with self.lock():
+            items = self.items()
+            items[product_id] = items.get(product_id, 0) + quantity
+            self._save(items)
+        return items[product_id]
+
+    def set(self, product_id, quantity) -> None:
+        with self.lock():
+            items = self.items()
+            if quantity > 0:
+                items[product_id] = quantity
+            else:
+                items.pop(product_id, None)
+            self._save(items)
+
+    def clear(self) -> None:
+        with self.lock():
+            self._cache.delete(self._key)
+
+
+def get_session_key(request):
+    """
+    The cart session sent with the request, from the X-Cart-Session header or the cart_session cookie.
+    """
+    key = request.headers.get(SESSION_HEADER) or request.COOKIES.get(SESSION_COOKIE)
+    return key if key and _SESSION_KEY.match(key) else None
+
+
+def new_session_key() -> str:
+    return uuid.uuid4().hex
+
+
+def get_cart_storage(session_key) -> CartStorage:
+    return import_string(settings.CART_STORAGE_BACKEND)(session_key)
+
+
+def merge_session_cart(request, client):
+    """
+    Move the items of the request's session cart into the client's persistent cart, creating
+    it if needed, then empty the session cart. Returns the cart, or None when there was
+    nothing to merge or the client's cart is not active (the session cart is then kept).
+    """
+    session_key = get_session_key(request)
+    if session_key is None:
+        return None
+    storage = get_cart_storage(session_key)
+    # held from the read to the clear, so an item added meanwhile is neither lost nor merged twice
+    with storage.lock():
+        items = storage.items()
+        if not items:
+            return None
+
+        cart, _ = Cart.objects.get_or_create(client=client, defaults={'status': True})
+        if not cart.status or cart.deleted_at is not None:
+            return None
+        with transaction.atomic():
+            for product_id, quantity in items.items():
+                try:
+                    add_to_cart(cart.pk, product_id, quantity)
+                except CartError:
+                    # the product was deleted while sitting in the session cart
+                    pass
+        storage.clear()
+    return cart
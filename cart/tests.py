@@ -1,12 +1,23 @@
+import threading
+import time
+from decimal import Decimal
 from unittest.mock import patch
 
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
 
+from cartItem.models import CartItem
+from category.models import Category
+from currency.models import Currency
+from product.models import Product
 from user.models import Client
 from .models import Cart
+from .storage import CacheCartStorage, new_session_key
 
 
 class CartViewSetTestCase(TestCase):
@@ -28,7 +39,7 @@ class CartViewSetTestCase(TestCase):
             'status': True
         }
 
-    @patch('cart.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_create_cart(self, mock_check_permissions):
         response = self.api_client.post(self.url, self.data, format='json')
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
@@ -36,7 +47,7 @@ class CartViewSetTestCase(TestCase):
         self.assertEqual(new_cart['client'], self.client.id)
         mock_check_permissions.assert_called()
 
-    @patch('cart.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_update_cart(self, mock_check_permissions):
         existing = Cart.objects.create(client=self.client, status=False)
         update_url = reverse('cart-detail', args=[existing.id])
@@ -49,7 +60,7 @@ class CartViewSetTestCase(TestCase):
         self.assertEqual(updated_data['status'], True)
         mock_check_permissions.assert_called()
 
-    @patch('cart.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_delete_cart(self, mock_check_permissions):
         existing = Cart.objects.create(client=self.client, status=False)
         delete_url = reverse('cart-detail', args=[existing.id])
@@ -60,7 +71,7 @@ class CartViewSetTestCase(TestCase):
         self.assertFalse(existing.status is True)
         mock_check_permissions.assert_called()
 
-    @patch('cart.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_list_cart(self, mock_check_permissions):
         client2 = Client.objects.create(
             username='newclient 1',
@@ -75,10 +86,10 @@ class CartViewSetTestCase(TestCase):
         Cart.objects.create(client=client2, status=True)
         response = self.api_client.get(self.url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data['results']), 2)
         mock_check_permissions.assert_called()
 
-    @patch('cart.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_retrieve_cart(self, mock_check_permissions):
         existing = Cart.objects.create(client=self.client, status=True)
         retrieve_url = reverse('cart-detail', args=[existing.id])
@@ -86,3 +97,154 @@ class CartViewSetTestCase(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['status'], True)
         mock_check_permissions.assert_called()
+
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
+    def test_cart_summary(self, mock_check_permissions):
+        cart = Cart.objects.create(client=self.client, status=True)
+        category = Category.objects.create(name='Test Category')
+        currency = Currency.objects.create(code='MAD', name='Moroccan Dirham', symbol='DH')
+        phone = Product.objects.create(name='Phone', description='desc', category=category, currency=currency,
+                                       price='1000.99')
+        case = Product.objects.create(name='Case', description='desc', category=category, currency=currency,
+                                      price='19.50')
+        CartItem.objects.create(cart=cart, product=phone, quantity=2)
+        CartItem.objects.create(cart=cart, product=case, quantity=3)
+
+        summary_url = reverse('cart-summary', args=[cart.id])
+        with self.assertNumQueries(1):
+            response = self.api_client.get(summary_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['name'] for item in response.data['items']], ['Phone', 'Case'])
+        self.assertEqual(response.data['items'][0]['line_total'], Decimal('2001.98'))
+        self.assertEqual(response.data['item_count'], 5)
+        self.assertEqual(response.data['totals'], {'MAD': Decimal('2060.48')})
+        self.assertEqual(response.data['total'], Decimal('2060.48'))
+
+        dollars = Currency.objects.create(code='USD', name='US Dollar', symbol='$')
+        charger = Product.objects.create(name='Charger', description='desc', category=category, currency=dollars,
+                                         price='15.00')
+        CartItem.objects.create(cart=cart, product=charger, quantity=1)
+        response = self.api_client.get(summary_url)
+        self.assertEqual(response.data['totals'], {'MAD': Decimal('2060.48'), 'USD': Decimal('15.00')})
+        self.assertIsNone(response.data['total'])
+
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
+    def test_cart_summary_empty_or_missing(self, mock_check_permissions):
+        cart = Cart.objects.create(client=self.client, status=True)
+        response = self.api_client.get(reverse('cart-summary', args=[cart.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['items'], [])
+        self.assertEqual(response.data['total'], 0)
+        response = self.api_client.get(reverse('cart-summary', args=[9999]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class SessionCartTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.api_client = APIClient()
+        category = Category.objects.create(name='Test Category')
+        currency = Currency.objects.create(code='MAD', name='Moroccan Dirham', symbol='DH')
+        self.phone = Product.objects.create(name='Phone', description='desc', category=category,
+                                            currency=currency, price='100.00')
+        self.case = Product.objects.create(name='Case', description='desc', category=category,
+                                           currency=currency, price='10.00')
+        self.client = Client.objects.create_user(username='shopper', email='shopper@email.com', password='password')
+
+    def test_anonymous_cart_without_sql_writes(self):
+        add_url = reverse('session_cart-add')
+        response = self.api_client.post(add_url, {'product': self.phone.id, 'quantity': 1}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        session = response['X-Cart-Session']
+        self.assertEqual(self.api_client.cookies['cart_session'].value, session)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.api_client.post(add_url, {'product': self.phone.id, 'quantity': 2}, format='json')
+            self.api_client.post(add_url, {'product': self.case.id, 'quantity': 1}, format='json')
+            self.api_client.put(reverse('session_cart-detail', args=[self.case.id]), {'quantity': 4}, format='json')
+        self.assertFalse([query for query in queries if not query['sql'].startswith('SELECT')])
+
+        response = self.api_client.get(reverse('session_cart-list'))
+        self.assertEqual([(item['name'], item['quantity']) for item in response.data['items']],
+                         [('Phone', 3), ('Case', 4)])
+        self.assertEqual(response.data['total'], Decimal('340.00'))
+        self.assertFalse(CartItem.objects.exists())
+
+        response = self.api_client.post(add_url, {'product': 9999, 'quantity': 1}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_session_cart_total_with_mixed_currencies(self):
+        euro = Currency.objects.create(code='EUR', name='Euro', symbol='€')
+        book = Product.objects.create(name='Book', description='desc', category=self.phone.category,
+                                      currency=euro, price='20.00')
+        add_url = reverse('session_cart-add')
+        self.api_client.post(add_url, {'product': self.phone.id, 'quantity': 1}, format='json')
+        self.api_client.post(add_url, {'product': book.id, 'quantity': 2}, format='json')
+
+        response = self.api_client.get(reverse('session_cart-list'))
+        self.assertEqual(response.data['totals'], {'MAD': Decimal('100.00'), 'EUR': Decimal('40.00')})
+        self.assertIsNone(response.data['total'])
+
+    def test_login_merges_session_cart(self):
+        cart = Cart.objects.create(client=self.client, status=True)
+        CartItem.objects.create(cart=cart, product=self.phone, quantity=1)
+        self.api_client.post(reverse('session_cart-add'), {'product': self.phone.id, 'quantity': 2}, format='json')
+        self.api_client.post(reverse('session_cart-add'), {'product': self.case.id, 'quantity': 1}, format='json')
+
+        response = self.api_client.post(reverse('clients-login'), {'email': 'shopper@email.com', 'password': 'password'},
+                                        format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(dict(cart.items.values_list('product_id', 'quantity')),
+                         {self.phone.id: 3, self.case.id: 1})
+        response = self.api_client.get(reverse('session_cart-list'))
+        self.assertEqual(response.data['items'], [])
+
+    def test_failed_login_keeps_session_cart(self):
+        cart = Cart.objects.create(client=self.client, status=True)
+        self.api_client.post(reverse('session_cart-add'), {'product': self.phone.id, 'quantity': 2}, format='json')
+
+        response = self.api_client.post(reverse('clients-login'), {'email': 'shopper@email.com', 'password': 'wrong'},
+                                        format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertFalse(cart.items.exists())
+        response = self.api_client.get(reverse('session_cart-list'))
+        self.assertEqual([item['quantity'] for item in response.data['items']], [2])
+
+    def test_merge_holds_the_session_lock(self):
+        session_key = new_session_key()
+        CacheCartStorage(session_key).add(self.phone.id, 1)
+        self.api_client.credentials(HTTP_X_CART_SESSION=session_key)
+        self.api_client.force_authenticate(user=self.client)
+
+        with CacheCartStorage(session_key).lock(), patch('cart.storage.LOCK_WAIT', 0):
+            response = self.api_client.post(reverse('session_cart-merge'))
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(CartItem.objects.exists())
+
+        response = self.api_client.post(reverse('session_cart-merge'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(CartItem.objects.values_list('product_id', 'quantity')), [(self.phone.id, 1)])
+        self.assertEqual(CacheCartStorage(session_key).items(), {})
+
+    def test_concurrent_adds_are_not_lost(self):
+        session_key = new_session_key()
+        read_items = CacheCartStorage.items
+
+        def slow_items(storage):
+            # widen the gap between reading the cart and writing it back
+            items = read_items(storage)
+            time.sleep(0.001)
+            return items
+
+        def add_many():
+            storage = CacheCartStorage(session_key)
+            for _ in range(20):
+                storage.add(self.phone.id, 1)
+
+        threads = [threading.Thread(target=add_many) for _ in range(8)]
+        with patch.object(CacheCartStorage, 'items', slow_items):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(CacheCartStorage(session_key).items(), {self.phone.id: 160})
@@ -1,12 +1,17 @@
 from rest_framework.routers import DefaultRouter
 from django.urls import include, path
 
-from cart.views import CartViewSet
+from cart.views import CartViewSet, SessionCartViewSet
 
 
+session_router = DefaultRouter()
+session_router.register(r'', SessionCartViewSet, basename='session_cart')
+
 router = DefaultRouter()
 router.register(r'', CartViewSet, basename='cart')
 
+# before the cart router, whose detail route would otherwise take "session" for a cart id
 urlpatterns = [
+    path('session/', include(session_router.urls)),
     path('', include(router.urls)),
 ]
\ No newline at end of file
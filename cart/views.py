@@ -1,20 +1,36 @@
+from django.conf import settings
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum, Window
+from django.http import Http404
 from rest_framework import viewsets, status
+from rest_framework.decorators import action
 from rest_framework.response import Response
 
-from helpers.permission_helpers import unauthorized, check_permissions, check_auth
+from cartItem.models import CartItem
+from cartItem.services import CartError
+from helpers.permission_helpers import ActionPermission, check_auth, unauthorized
+from product.models import Product
 from user.models import Client
 from cart.models import Cart
-from cart.serializer import CartSerializer
+from cart.serializer import CartSerializer, SessionCartItemSerializer
+from cart.storage import (SESSION_COOKIE, SESSION_HEADER, get_cart_storage, get_session_key, merge_session_cart,
+                          new_session_key)
 
 
 class CartViewSet(viewsets.ModelViewSet):
     queryset = Cart.objects.filter(deleted_at__isnull=True)
     serializer_class = CartSerializer
+    permission_classes = [ActionPermission]
+    action_permissions = {
+        'create': 'can_create_cart',
+        'update': 'can_update_cart',
+        'partial_update': 'can_update_cart',
+        'destroy': 'can_delete_cart',
+        'list': 'can_view_cart_list',
+        'retrieve': 'can_view_cart',
+        'summary': 'can_view_cart',
+    }
 
     def create(self, request, *args, **kwargs):
-        if not check_permissions(request, 'can_create_cart'):
-            return unauthorized()
-
         if 'client' not in request.data:
             return Response({'message': 'The client field is required.'}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -29,8 +45,6 @@ class CartViewSet(viewsets.ModelViewSet):
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     def update(self, request, *args, **kwargs):
-        if not check_permissions(request, 'can_update_cart'):
-            return unauthorized()
         instance = self.get_object()
         serializer = self.get_serializer(instance, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
@@ -39,18 +53,161 @@ class CartViewSet(viewsets.ModelViewSet):
             serializer.data)
 
     def destroy(self, request, *args, **kwargs):
-        if not check_permissions(request, 'can_delete_cart'):
-            return unauthorized()
         cart = self.get_object()
         cart.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @action(detail=True, methods=['get'])
+    def summary(self, request, pk=None):
+        """
+        Items of the cart with their product, price and line total, plus totals per currency,
+        all computed by the database in one query (a second one only tells an empty cart from
+        a missing one). `total` is only given when every item is in the same currency; amounts
+        in different currencies are not added up.
+        """
+        try:
+            pk = int(pk)
+        except ValueError:
+            raise Http404
+        money = DecimalField(max_digits=12, decimal_places=2)
+        line_total = ExpressionWrapper(F('quantity') * F('product__price'), output_field=money)
+        items = list(
+            CartItem.objects.filter(cart_id=pk, cart__deleted_at__isnull=True)
+            .select_related('product__currency')
+            .annotate(
+                line_total=line_total,
+                currency_total=Window(Sum(line_total), partition_by=F('product__currency')),
+                item_count=Window(Sum('quantity')),
+            )
+            .order_by('id')
+        )
+        if not items and not self.get_queryset().filter(pk=pk).exists():
+            raise Http404
+
+        totals = {}
+        for item in items:
+            currency = item.product.currency
+            totals[currency.code if currency else None] = item.currency_total
+        if len(totals) > 1:
+            # amounts in different currencies do not add up
+            total = None
+        else:
+            total = next(iter(totals.values()), 0)
+        return Response({
+            'cart': pk,
+            'items': [{
+                'id': item.id,
+                'product': item.product_id,
+                'name': item.product.name,
+                'price': item.product.price,
+                'currency': item.product.currency.code if item.product.currency else None,
+                'quantity': item.quantity,
+                'line_total': item.line_total,
+            } for item in items],
+            'item_count': items[0].item_count if items else 0,
+            'totals': totals,
+            'total': total,
+        }, status=status.HTTP_200_OK)
+
+
+class SessionCartViewSet(viewsets.ViewSet):
+    """
+    Cart of an anonymous visitor, kept in the cart storage backend instead of the database.
+
+    The cart is identified by the `cart_session` cookie or the `X-Cart-Session` header; the first
+    write without one starts a new session and returns its key in both. Items are merged into
+    the client's `Cart` on login, on checkout or through `merge`.
+    """
+    lookup_field = 'product'
+
+    def _storage(self, request, create=False):
+        session_key = get_session_key(request)
+        if session_key is None and create:
+            session_key = new_session_key()
+        return get_cart_storage(session_key) if session_key else None
+
+    def _response(self, storage, data, response_status=status.HTTP_200_OK):
+        response = Response(data, status=response_status)
+        if storage is not None:
+            response[SESSION_HEADER] = storage.session_key
+            response.set_cookie(SESSION_COOKIE, storage.session_key, max_age=settings.CART_SESSION_TIMEOUT,
+                                httponly=True, samesite='Lax')
+        return response
+
     def list(self, request, *args, **kwargs):
-        if not check_permissions(request, 'can_view_cart_list'):
-            return unauthorized()
-        return super().list(request, *args, **kwargs)
+        storage = self._storage(request)
+        items = storage.items() if storage else {}
+        products = Product.objects.filter(id__in=list(items), deleted_at__isnull=True).select_related('currency')
+        rows = []
+        totals = {}
+        for product in products.order_by('id'):
+            quantity = items[product.id]
+            currency = product.currency.code if product.currency else None
+            line_total = product.price * quantity
+            totals[currency] = totals.get(currency, 0) + line_total
+            rows.append({'product': product.id, 'name': product.name, 'price': product.price,
+                         'currency': currency, 'quantity': quantity, 'line_total': line_total})
+        if len(totals) > 1:
+            # amounts in different currencies do not add up
+            total = None
+        else:
+            total = next(iter(totals.values()), 0)
+        return self._response(storage, {
+            'session': storage.session_key if storage else None,
+            'items': rows,
+            'item_count': sum(row['quantity'] for row in rows),
+            'totals': totals,
+            'total': total,
+        })
+
+    @action(detail=False, methods=['post'])
+    def add(self, request, *args, **kwargs):
+        serializer = SessionCartItemSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        product_id = serializer.validated_data['product']
+        if not Product.objects.filter(pk=product_id, deleted_at__isnull=True).exists():
+            return Response({'message': 'Product does not exist'}, status=status.HTTP_400_BAD_REQUEST)
+        storage = self._storage(request, create=True)
+        try:
+            quantity = storage.add(product_id, serializer.validated_data['quantity'])
+        except CartError as e:
+            return Response({'message': e.message}, status=status.HTTP_409_CONFLICT)
+        return self._response(storage, {'product': product_id, 'quantity': quantity})
+
+    def update(self, request, product=None, *args, **kwargs):
+        storage = self._storage(request)
+        try:
+            product_id = int(product)
+            quantity = int(request.data.get('quantity'))
+        except (TypeError, ValueError):
+            return Response({'message': 'quantity must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        if storage is None or product_id not in storage.items():
+            raise Http404
+        try:
+            storage.set(product_id, quantity)
+        except CartError as e:
+            return Response({'message': e.message}, status=status.HTTP_409_CONFLICT)
+        if quantity <= 0:
+            return self._response(storage, {'message': 'Item removed from cart'})
+        return self._response(storage, {'product': product_id, 'quantity': quantity})
+
+    def destroy(self, request, product=None, *args, **kwargs):
+        storage = self._storage(request)
+        if storage is not None and product and product.isdigit():
+            try:
+                storage.remove(int(product))
+            except CartError as e:
+                return Response({'message': e.message}, status=status.HTTP_409_CONFLICT)
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
-    def retrieve(self, request, *args, **kwargs):
-        if not check_permissions(request, 'can_view_cart'):
+    @action(detail=False, methods=['post'])
+    def merge(self, request, *args, **kwargs):
+        if not check_auth(request):
             return unauthorized()
-        return super().retrieve(request, *args, **kwargs)
+        try:
+            cart = merge_session_cart(request, request.user)
+        except CartError as e:
+            return Response({'message': e.message}, status=status.HTTP_409_CONFLICT)
+        if cart is None:
+            return Response({'message': 'Nothing to merge'}, status=status.HTTP_200_OK)
+        return Response(CartSerializer(cart).data, status=status.HTTP_200_OK)
@@ -0,0 +1,42 @@
+# Generated by Django 5.0.4 on 2026-10-18 19:54
+
+from django.db import migrations, models
+
+
+def merge_duplicate_items(apps, schema_editor):
+    # one row per (cart, product): the oldest one keeps the summed quantity
+    CartItem = apps.get_model('cartItem', 'CartItem')
+    kept = {}
+    merged = {}
+    duplicates = []
+    for pk, cart_id, product_id, quantity in list(
+            CartItem.objects.order_by('id').values_list('id', 'cart_id', 'product_id', 'quantity')):
+        if (cart_id, product_id) in kept:
+            kept_pk = kept[(cart_id, product_id)]
+            merged[kept_pk] = merged.get(kept_pk, 0) + quantity
+            duplicates.append(pk)
+        else:
+            kept[(cart_id, product_id)] = pk
+    items = list(CartItem.objects.filter(id__in=list(merged)))
+    for item in items:
+        item.quantity += merged[item.pk]
+    CartItem.objects.bulk_update(items, ['quantity'], batch_size=500)
+    for start in range(0, len(duplicates), 500):
+        CartItem.objects.filter(id__in=duplicates[start:start + 500]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cart', '0003_cart_status_alter_cart_client_delete_cartitem'),
+        ('cartItem', '0001_initial'),
+        ('product', '0005_product_sku'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_items, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='cartitem',
+            constraint=models.UniqueConstraint(fields=('cart', 'product'), name='cartitem_cart_product_uniq'),
+        ),
+    ]
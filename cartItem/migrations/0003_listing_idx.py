@@ -0,0 +1,19 @@
+# Generated by Django 5.0.4 on 2026-10-18 20:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cart', '0004_listing_idx'),
+        ('cartItem', '0002_cart_product_uniq'),
+        ('product', '0005_product_sku'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cartitem',
+            index=models.Index(fields=['created_at', 'id'], name='cartitem_listing_idx'),
+        ),
+    ]
@@ -6,3 +6,9 @@ class CartItemSerializer(serializers.ModelSerializer):
     class Meta:
         model = CartItem
         fields = "__all__"
+
+
+class CartItemAddSerializer(serializers.Serializer):
+    cart = serializers.IntegerField()
+    product = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1)
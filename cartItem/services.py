@@ -0,0 +1,51 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, F
+from django.utils import timezone
+
+from cart.models import Cart
+from product.models import Product
+from .models import CartItem
+
+
+class CartError(Exception):
+    def __init__(self, message):
+        super().__init__(message)
+        self.message = message
+
+
+def _increment(cart_id, product_id, quantity):
+    # one UPDATE, guarded by the cart being active; the (cart, product) constraint makes it hit at most one row
+    return CartItem.objects.filter(
+        cart_id=cart_id, product_id=product_id, cart__status=True, cart__deleted_at__isnull=True,
+    ).update(quantity=F('quantity') + quantity, updated_at=timezone.now())
+
+
+def add_to_cart(cart_id, product_id, quantity):
+    """
+    Add `quantity` of a product to a cart and return `(item, created)`.
+
+    A product already in the cart is incremented in place with `F('quantity') + quantity`, so
+    repeated or concurrent adds never duplicate the row: two queries when the item exists,
+    three when it is new. A concurrent insert of the same item loses on the unique constraint
+    and falls back to the increment.
+    """
+    if _increment(cart_id, product_id, quantity):
+        return CartItem.objects.get(cart_id=cart_id, product_id=product_id), False
+
+    cart = Cart.objects.filter(pk=cart_id).annotate(
+        product_exists=Exists(Product.objects.filter(pk=product_id, deleted_at__isnull=True)),
+    ).values('status', 'deleted_at', 'product_exists').first()
+    if cart is None:
+        raise CartError('Cart does not exist')
+    if not cart['status'] or cart['deleted_at'] is not None:
+        raise CartError('Cart is not active')
+    if not cart['product_exists']:
+        raise CartError('Product does not exist')
+
+    try:
+        with transaction.atomic():
+            return CartItem.objects.create(cart_id=cart_id, product_id=product_id, quantity=quantity), True
+    except IntegrityError:
+        if not _increment(cart_id, product_id, quantity):
+            raise
+        return CartItem.objects.get(cart_id=cart_id, product_id=product_id), False
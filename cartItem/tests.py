@@ -43,7 +43,7 @@ class CartItemViewSetTestCase(TestCase):
             'quantity': 3
         }
 
-    @patch('cartItem.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_create_cartItem(self, mock_check_permissions):
         response = self.api_client.post(self.url, self.data, format='json')
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
@@ -51,7 +51,7 @@ class CartItemViewSetTestCase(TestCase):
         self.assertEqual(new_cartItem['quantity'], 3)
         mock_check_permissions.assert_called()
 
-    @patch('cartItem.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_update_cartItem(self, mock_check_permissions):
         existing = CartItem.objects.create(cart=self.cart, product=self.product2, quantity=4)
         update_url = reverse('cartItem-detail', args=[existing.id])
@@ -64,7 +64,7 @@ class CartItemViewSetTestCase(TestCase):
         self.assertEqual(updated_data['quantity'], 1)
         mock_check_permissions.assert_called()
 
-    @patch('cartItem.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_delete_cartItem(self, mock_check_permissions):
         existing = CartItem.objects.create(cart=self.cart, product=self.product2, quantity=4)
         delete_url = reverse('cartItem-detail', args=[existing.id])
@@ -72,17 +72,17 @@ class CartItemViewSetTestCase(TestCase):
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         mock_check_permissions.assert_called()
 
-    @patch('cartItem.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_list_cartItem(self, mock_check_permissions):
         CartItem.objects.create(cart=self.cart, product=self.product, quantity=4)
         CartItem.objects.create(cart=self.cart, product=self.product2, quantity=2)
         CartItem.objects.create(cart=self.cart, product=self.product3, quantity=1)
         response = self.api_client.get(self.url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 3)
+        self.assertEqual(len(response.data['results']), 3)
         mock_check_permissions.assert_called()
 
-    @patch('cartItem.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_retrieve_cartItem(self, mock_check_permissions):
         CartItem.objects.create(cart=self.cart, product=self.product3, quantity=1)
         CartItem.objects.create(cart=self.cart, product=self.product2, quantity=2)
@@ -92,3 +92,27 @@ class CartItemViewSetTestCase(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['quantity'], 4)
         mock_check_permissions.assert_called()
+
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
+    def test_add_same_product_increments_quantity(self, mock_check_permissions):
+        response = self.api_client.post(self.url, self.data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        with self.assertNumQueries(2):
+            response = self.api_client.post(reverse('cartItem-add'), {**self.data, 'quantity': 2}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['quantity'], 5)
+        self.assertEqual(CartItem.objects.filter(cart=self.cart, product=self.product).count(), 1)
+
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
+    def test_add_to_inactive_cart(self, mock_check_permissions):
+        Cart.objects.filter(pk=self.cart.pk).update(status=False)
+        response = self.api_client.post(self.url, self.data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['message'], 'Cart is not active')
+
+        response = self.api_client.post(self.url, {**self.data, 'cart': 9999}, format='json')
+        self.assertEqual(response.data['message'], 'Cart does not exist')
+        response = self.api_client.post(self.url, {**self.data, 'quantity': 0}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(CartItem.objects.exists())
@@ -0,0 +1,3 @@
+from helpers.reference_cache import ReferenceCache
+
+categories = ReferenceCache('category.Category', 'category.serializer.CategorySerializer')
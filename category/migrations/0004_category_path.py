@@ -0,0 +1,36 @@
+# Generated by Django 5.0.4 on 2026-10-18 19:43
+
+from django.db import migrations, models
+
+
+def build_paths(apps, schema_editor):
+    Category = apps.get_model('category', 'Category')
+    parents = dict(Category.objects.values_list('id', 'parent_id'))
+    paths = {}
+
+    def path_of(category_id):
+        if category_id not in paths:
+            parent_id = parents[category_id]
+            paths[category_id] = (path_of(parent_id) if parent_id else '/') + f'{category_id}/'
+        return paths[category_id]
+
+    categories = list(Category.objects.only('id'))
+    for category in categories:
+        category.path = path_of(category.id)
+    Category.objects.bulk_update(categories, ['path'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('category', '0003_alter_category_description'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=255),
+        ),
+        migrations.RunPython(build_paths, migrations.RunPython.noop),
+    ]
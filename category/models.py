@@ -1,18 +1,55 @@
 from django.db import models
+from django.db.models.functions import Concat, Substr
 from django.utils import timezone
 
+from category.cache import categories
+
 
 class Category(models.Model):
     name = models.CharField(max_length=200)
     description = models.TextField(blank=True)
     parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True)
+    # materialized path of ids from the root, e.g. '/1/4/9/'; maintained by save()
+    path = models.CharField(max_length=255, blank=True, editable=False, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     deleted_at = models.DateTimeField(null=True, blank=True)
 
+    def save(self, *args, **kwargs):
+        old_path = self.path
+        parent_path = '/'
+        if self.parent_id:
+            parent_path = Category.objects.filter(pk=self.parent_id).values_list('path', flat=True).first() or '/'
+        if old_path and parent_path.startswith(old_path):
+            raise ValueError('A category cannot be moved under itself or one of its sub categories')
+        super().save(*args, **kwargs)
+        new_path = f'{parent_path}{self.pk}/'
+        if new_path == old_path:
+            return
+        Category.objects.filter(pk=self.pk).update(path=new_path)
+        if old_path:
+            # re-root the whole subtree in a single UPDATE
+            Category.objects.filter(path__startswith=old_path).exclude(pk=self.pk).update(
+                path=Concat(models.Value(new_path), Substr('path', len(old_path) + 1)))
+        self.path = new_path
+        categories.invalidate()
+
     def delete(self, *args, **kwargs):
         self.deleted_at = timezone.now()
         self.save()
+        self.descendants().update(deleted_at=self.deleted_at)
+        categories.invalidate()
 
     def sub_categories(self):
-        return Category.objects.filter(parent=self)
\ No newline at end of file
+        return Category.objects.filter(parent=self)
+
+    def ancestor_ids(self):
+        return [int(pk) for pk in self.path.strip('/').split('/')[:-1]]
+
+    def ancestors(self):
+        return Category.objects.filter(pk__in=self.ancestor_ids()).order_by('path')
+
+    def descendants(self):
+        if not self.path:
+            return Category.objects.none()
+        return Category.objects.filter(path__startswith=self.path, deleted_at__isnull=True).exclude(pk=self.pk)
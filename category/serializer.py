@@ -5,4 +5,9 @@ from .models import Category
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Category
-        fields = ['id','name','description','parent','created_at','updated_at', 'deleted_at']
\ No newline at end of file
+        fields = ['id','name','description','parent','path','created_at','updated_at', 'deleted_at']
+
+    def validate_parent(self, parent):
+        if parent and self.instance and self.instance.path and parent.path.startswith(self.instance.path):
+            raise serializers.ValidationError('A category cannot be moved under itself or one of its sub categories')
+        return parent
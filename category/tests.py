@@ -16,7 +16,7 @@ class CategoryViewSetTestCase(TestCase):
             'description': 'Category description',
         }
 
-    @patch('category.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_create_category(self, mock_check_permissions):
         response = self.api_client.post(self.url, self.data, format='json')
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
@@ -24,7 +24,7 @@ class CategoryViewSetTestCase(TestCase):
         self.assertEqual(new_category['name'], 'CategoryTest')
         mock_check_permissions.assert_called()
 
-    @patch('category.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_create_sub_category(self, mock_check_permissions):
         parent_category = Category.objects.create(name='Parent category')
         self.data['parent'] = parent_category.id
@@ -34,7 +34,7 @@ class CategoryViewSetTestCase(TestCase):
         self.assertEqual(new_category['name'], 'CategoryTest')
         mock_check_permissions.assert_called()
 
-    @patch('category.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_update_category(self, mock_check_permissions):
         existing_category = Category.objects.create(name='New category', description='New category description')
         update_url = reverse('categories-detail', args=[existing_category.id])
@@ -47,7 +47,7 @@ class CategoryViewSetTestCase(TestCase):
         self.assertEqual(updated_category['name'], 'TestCategoryUpdated')
         mock_check_permissions.assert_called()
 
-    @patch('category.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_delete_category(self, mock_check_permissions):
         existing_category = Category.objects.create(name='New category', description='New category description')
         delete_url = reverse('categories-detail', args=[existing_category.id])
@@ -57,7 +57,7 @@ class CategoryViewSetTestCase(TestCase):
         self.assertFalse(existing_category.deleted_at is None)
         mock_check_permissions.assert_called()
 
-    @patch('category.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_list_category(self, mock_check_permissions):
         Category.objects.create(name='Demo category 1')
         Category.objects.create(name='Demo category 2')
@@ -67,11 +67,57 @@ class CategoryViewSetTestCase(TestCase):
         self.assertEqual(len(response.data), 3)
         mock_check_permissions.assert_called()
 
-    @patch('category.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_retrieve_category(self, mock_check_permissions):
         existing_category = Category.objects.create(name='New category', description='New category description')
         retrieve_url = reverse('categories-detail', args=[existing_category.id])
         response = self.api_client.get(retrieve_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['name'], 'New category')
-        mock_check_permissions.assert_called()
\ No newline at end of file
+        mock_check_permissions.assert_called()
+
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
+    def test_category_tree(self, mock_check_permissions):
+        root = Category.objects.create(name='Root')
+        child = Category.objects.create(name='Child', parent=root)
+        Category.objects.create(name='Grand child', parent=child)
+        Category.objects.create(name='Other root')
+
+        with self.assertNumQueries(1):
+            response = self.api_client.get(f'{self.url}tree/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([node['name'] for node in response.data], ['Root', 'Other root'])
+        self.assertEqual(response.data[0]['children'][0]['name'], 'Child')
+        self.assertEqual(response.data[0]['children'][0]['children'][0]['name'], 'Grand child')
+
+
+class CategoryPathTestCase(TestCase):
+    def setUp(self):
+        self.root = Category.objects.create(name='Root')
+        self.child = Category.objects.create(name='Child', parent=self.root)
+        self.grand_child = Category.objects.create(name='Grand child', parent=self.child)
+
+    def test_descendants_and_ancestors(self):
+        with self.assertNumQueries(1):
+            self.assertEqual({c.name for c in self.root.descendants()}, {'Child', 'Grand child'})
+        with self.assertNumQueries(1):
+            self.assertEqual([c.name for c in self.grand_child.ancestors()], ['Root', 'Child'])
+
+    def test_move_subtree(self):
+        other = Category.objects.create(name='Other')
+        self.child.parent = other
+        self.child.save()
+        self.grand_child.refresh_from_db()
+        self.assertEqual(self.grand_child.path, f'/{other.id}/{self.child.id}/{self.grand_child.id}/')
+        self.assertEqual(list(self.root.descendants()), [])
+
+    def test_move_under_descendant_rejected(self):
+        self.root.parent = self.grand_child
+        with self.assertRaises(ValueError):
+            self.root.save()
+
+    def test_soft_delete_subtree(self):
+        self.child.delete()
+        self.grand_child.refresh_from_db()
+        self.assertIsNotNone(self.grand_child.deleted_at)
+        self.assertEqual(list(self.root.descendants()), [])
@@ -1,7 +1,9 @@
 from rest_framework import viewsets, status
+from rest_framework.decorators import action
 from rest_framework.response import Response
 
-from helpers.permission_helpers import unauthorized, check_permissions, check_auth
+from helpers.permission_helpers import ActionPermission
+from category.cache import categories
 from category.models import Category
 from category.serializer import CategorySerializer
 
@@ -9,18 +11,26 @@ from category.serializer import CategorySerializer
 class CategoryViewSet(viewsets.ModelViewSet):
     queryset = Category.objects.filter(deleted_at__isnull=True)
     serializer_class = CategorySerializer
+    permission_classes = [ActionPermission]
+    # reference data: served whole from the cache with ETag/Last-Modified instead of paginated
+    pagination_class = None
+    action_permissions = {
+        'create': 'can_create_category',
+        'update': 'can_update_category',
+        'partial_update': 'can_update_category',
+        'destroy': 'can_delete_category',
+        'list': 'can_view_category_list',
+        'retrieve': 'can_view_category',
+        'tree': 'can_view_category_list',
+    }
 
     def create(self, request, *args, **kwargs):
-        if not check_permissions(request, 'can_create_category'):
-            return unauthorized()
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         self.perform_create(serializer)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     def update(self, request, *args, **kwargs):
-        if not check_permissions(request, 'can_update_category'):
-            return unauthorized()
         instance = self.get_object()
         serializer = self.get_serializer(instance, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
@@ -28,20 +38,26 @@ class CategoryViewSet(viewsets.ModelViewSet):
         return Response(
             serializer.data)
 
-
     def destroy(self, request, *args, **kwargs):
-        if not check_permissions(request, 'can_delete_category'):
-            return unauthorized()
         role = self.get_object()
         role.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     def list(self, request, *args, **kwargs):
-        if not check_permissions(request, 'can_view_category_list'):
-            return unauthorized()
-        return super().list(request, *args, **kwargs)
-
-    def retrieve(self, request, *args, **kwargs):
-        if not check_permissions(request, 'can_view_category'):
-            return unauthorized()
-        return super().retrieve(request, *args, **kwargs)
+        return categories.conditional_response(request, categories.serialized_list)
+
+    @action(detail=False, methods=['get'])
+    def tree(self, request, *args, **kwargs):
+        return categories.conditional_response(request, self._build_tree)
+
+    @staticmethod
+    def _build_tree():
+        # parents sort before their children on path, so one ordered pass builds the tree
+        nodes = {}
+        roots = []
+        for category in sorted(categories.serialized_list(), key=lambda data: data['path']):
+            node = dict(category, children=[])
+            nodes[category['id']] = node
+            parent = nodes.get(category['parent'])
+            (parent['children'] if parent else roots).append(node)
+        return roots
@@ -0,0 +1,40 @@
+# Generated by Django 5.0.4 on 2026-10-18 19:52
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def soft_delete_duplicate_keys(apps, schema_editor):
+    # keep the most recent live row per (product, key) and soft-delete the others, as the API would
+    Characteristic = apps.get_model('characteristic', 'Characteristic')
+    kept = set()
+    duplicates = []
+    rows = Characteristic.objects.filter(deleted_at__isnull=True).order_by('product_id', 'key', '-id')
+    for pk, product_id, key in list(rows.values_list('id', 'product_id', 'key')):
+        if (product_id, key) in kept:
+            duplicates.append(pk)
+        else:
+            kept.add((product_id, key))
+    now = timezone.now()
+    for start in range(0, len(duplicates), 500):
+        Characteristic.objects.filter(id__in=duplicates[start:start + 500]).update(
+            deleted_at=now, status=False, updated_at=now)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('characteristic', '0002_alter_characteristic_product'),
+        ('product', '0005_product_sku'),
+    ]
+
+    operations = [
+        migrations.RunPython(soft_delete_duplicate_keys, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='characteristic',
+            constraint=models.UniqueConstraint(
+                condition=models.Q(('deleted_at__isnull', True)), fields=('product', 'key'),
+                name='characteristic_product_key_uniq',
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.4 on 2026-10-18 20:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('characteristic', '0003_characteristic_product_key_uniq'),
+        ('product', '0005_product_sku'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='characteristic',
+            index=models.Index(fields=['deleted_at', 'created_at', 'id'], name='characteristic_listing_idx'),
+        ),
+    ]
@@ -13,6 +13,16 @@ class Characteristic(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     deleted_at = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['deleted_at', 'created_at', 'id'], name='characteristic_listing_idx'),
+        ]
+        constraints = [
+            # soft-deleted rows do not count, so a deleted key can be added again
+            models.UniqueConstraint(fields=['product', 'key'], condition=models.Q(deleted_at__isnull=True),
+                                    name='characteristic_product_key_uniq'),
+        ]
+
     def delete(self, *args, **kwargs):
         self.deleted_at = timezone.now()
         self.status = False
@@ -25,7 +25,7 @@ class CharacteristicViewSetTestCase(TestCase):
             'status': True
         }
 
-    @patch('characteristic.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_create_characteristic(self, mock_check_permissions):
         response = self.api_client.post(self.url, self.data, format='json')
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
@@ -33,7 +33,7 @@ class CharacteristicViewSetTestCase(TestCase):
         self.assertEqual(new_characteristic['key'], 'Material')
         mock_check_permissions.assert_called()
 
-    @patch('characteristic.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_update_characteristic(self, mock_check_permissions):
         existing = Characteristic.objects.create(key='model', value='2022', product=self.product)
         update_url = reverse('characteristics-detail', args=[existing.id])
@@ -46,7 +46,7 @@ class CharacteristicViewSetTestCase(TestCase):
         self.assertEqual(updated_data['value'], '2024')
         mock_check_permissions.assert_called()
 
-    @patch('characteristic.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_delete_characteristic(self, mock_check_permissions):
         existing = Characteristic.objects.create(key='model', value='2022', product=self.product)
         delete_url = reverse('characteristics-detail', args=[existing.id])
@@ -57,17 +57,29 @@ class CharacteristicViewSetTestCase(TestCase):
         self.assertFalse(existing.status is True)
         mock_check_permissions.assert_called()
 
-    @patch('characteristic.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
+    def test_deleted_key_can_be_added_again(self, mock_check_permissions):
+        response = self.api_client.post(self.url, self.data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = self.api_client.post(self.url, self.data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        Characteristic.objects.get(product=self.product, key='Material').delete()
+        response = self.api_client.post(self.url, self.data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Characteristic.objects.filter(product=self.product, key='Material').count(), 2)
+
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_list_characteristic(self, mock_check_permissions):
         char1 = Characteristic.objects.create(key='model', value='2022', product=self.product)
         Characteristic.objects.create(key='Power level', value='100%', product=self.product, parent=char1)
         Characteristic.objects.create(key='Brand', value='Apple', product=self.product, deleted_at=timezone.now())
         response = self.api_client.get(self.url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data['results']), 2)
         mock_check_permissions.assert_called()
 
-    @patch('characteristic.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_retrieve_characteristic(self, mock_check_permissions):
         existing = Characteristic.objects.create(key='model', value='2023', product=self.product)
         retrieve_url = reverse('characteristics-detail', args=[existing.id])
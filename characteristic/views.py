@@ -1,14 +1,28 @@
 from rest_framework import viewsets, status
 from rest_framework.response import Response
 
-from helpers.permission_helpers import unauthorized, check_permissions, check_auth
+from helpers.bulk import BulkModelMixin
+from helpers.permission_helpers import ActionPermission
 from characteristic.models import Characteristic
 from characteristic.serializer import CharacteristicSerializer
 
 
-class CharacteristicViewSet(viewsets.ModelViewSet):
+class CharacteristicViewSet(BulkModelMixin, viewsets.ModelViewSet):
     queryset = Characteristic.objects.filter(deleted_at__isnull=True)
     serializer_class = CharacteristicSerializer
+    permission_classes = [ActionPermission]
+    bulk_destroy_updates = {'status': False}
+    action_permissions = {
+        'create': 'can_create_characteristic',
+        'update': 'can_update_characteristic',
+        'partial_update': 'can_update_characteristic',
+        'destroy': 'can_delete_characteristic',
+        'list': 'can_view_characteristic_list',
+        'retrieve': 'can_view_characteristic',
+        'bulk_create': 'can_create_characteristic',
+        'bulk_update': 'can_update_characteristic',
+        'bulk_destroy': 'can_delete_characteristic',
+    }
 
     def create(self, request, *args, **kwargs):
         """
@@ -26,10 +40,6 @@ class CharacteristicViewSet(viewsets.ModelViewSet):
             Unauthorized: If the user does not have permission to create a characteristic.
             ValidationError: If the request data is invalid.
         """
-
-        if not check_permissions(request, 'can_create_characteristic'):
-            return unauthorized()
-
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         self.perform_create(serializer)
@@ -56,8 +66,6 @@ class CharacteristicViewSet(viewsets.ModelViewSet):
             PermissionDenied: If the user does not have the necessary permissions.
             ValidationError: If the serializer data is invalid.
         """
-        if not check_permissions(request, 'can_update_characteristic'):
-            return unauthorized()
         instance = self.get_object()
         serializer = self.get_serializer(instance, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
@@ -87,51 +95,9 @@ class CharacteristicViewSet(viewsets.ModelViewSet):
         Raises:
             None
         """
-        if not check_permissions(request, 'can_delete_characteristic'):
-            return unauthorized()
         try:
             characteristic = self.get_object()
             characteristic.delete()
             return Response(status=status.HTTP_204_NO_CONTENT)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
-
-    def list(self, request, *args, **kwargs):
-        """
-        List all characteristics.
-
-        This method checks if the user has the `can_view_characteristic_list` permission.
-        If the user has the permission, it calls the parent class's list method to return a list of all characteristics.
-        If the user does not have the permission, it returns an unauthorized response.
-
-        Args:
-            request: The HTTP request object.
-            *args: Variable length argument list.
-            **kwargs: Arbitrary keyword arguments.
-
-        Returns:
-            Response: The HTTP response object. Contains a list of all characteristics if the user has the required permission.
-        """
-        if not check_permissions(request, 'can_view_characteristic_list'):
-            return unauthorized()
-        return super().list(request, *args, **kwargs)
-
-    def retrieve(self, request, *args, **kwargs):
-        """
-        Retrieve a specific characteristic.
-
-        This method checks if the user has the `can_view_characteristic` permission.
-        If the user has the permission, it calls the parent class's retrieve method to return the specified characteristic.
-        If the user does not have the permission, it returns an unauthorized response.
-
-        Args:
-            request: The HTTP request object.
-            *args: Variable length argument list.
-            **kwargs: Arbitrary keyword arguments.
-
-        Returns:
-            Response: The HTTP response object. Contains the specified characteristic if the user has the required permission.
-        """
-        if not check_permissions(request, 'can_view_characteristic'):
-            return unauthorized()
-        return super().retrieve(request, *args, **kwargs)
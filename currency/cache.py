@@ -0,0 +1,3 @@
+from helpers.reference_cache import ReferenceCache
+
+currencies = ReferenceCache('currency.Currency', 'currency.serializer.CurrencySerializer')
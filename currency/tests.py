@@ -4,6 +4,7 @@ from django.test import TestCase
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
+from .cache import currencies
 from .models import Currency
 from django.utils import timezone
 
@@ -18,7 +19,7 @@ class CurrencyViewSetTestCase(TestCase):
             'symbol': 'DH',
         }
 
-    @patch('currency.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_create_currency(self, mock_check_permissions):
         response = self.api_client.post(self.url, self.data, format='json')
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
@@ -26,7 +27,7 @@ class CurrencyViewSetTestCase(TestCase):
         self.assertEqual(new_currency['code'], 'MDH')
         mock_check_permissions.assert_called()
 
-    @patch('currency.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_update_currency(self, mock_check_permissions):
         existing = Currency.objects.create(code='USD', name='United State Dollar', symbol='USD')
         update_url = reverse('currencies-detail', args=[existing.id])
@@ -39,7 +40,7 @@ class CurrencyViewSetTestCase(TestCase):
         self.assertEqual(updated_data['symbol'], '$')
         mock_check_permissions.assert_called()
 
-    @patch('currency.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_delete_currency(self, mock_check_permissions):
         existing = Currency.objects.create(code='USD', name='United State Dollar', symbol='$')
         delete_url = reverse('currencies-detail', args=[existing.id])
@@ -50,7 +51,7 @@ class CurrencyViewSetTestCase(TestCase):
         self.assertFalse(existing.status is True)
         mock_check_permissions.assert_called()
 
-    @patch('currency.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_list_currency(self, mock_check_permissions):
         Currency.objects.create(code='USD', name='United State Dollar', symbol='$')
         Currency.objects.create(code='EUR', name='Euro', symbol='€')
@@ -60,7 +61,7 @@ class CurrencyViewSetTestCase(TestCase):
         self.assertEqual(len(response.data), 2)
         mock_check_permissions.assert_called()
 
-    @patch('currency.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_retrieve_currency(self, mock_check_permissions):
         existing = Currency.objects.create(code='USD', name='United State Dollar', symbol='$')
         retrieve_url = reverse('currencies-detail', args=[existing.id])
@@ -68,3 +69,28 @@ class CurrencyViewSetTestCase(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['code'], 'USD')
         mock_check_permissions.assert_called()
+
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
+    def test_list_currency_conditional(self, mock_check_permissions):
+        Currency.objects.create(code='USD', name='United State Dollar', symbol='$')
+        response = self.api_client.get(self.url)
+        etag = response['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.api_client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        Currency.objects.create(code='EUR', name='Euro', symbol='€')
+        response = self.api_client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(len(response.data), 2)
+
+    def test_cached_currency_lookup(self):
+        currency = Currency.objects.create(code='USD', name='United State Dollar', symbol='$')
+        self.assertEqual(currencies.get(currency.id).code, 'USD')
+        with self.assertNumQueries(0):
+            self.assertEqual(currencies.serialized(currency.id)['symbol'], '$')
+        currency.symbol = 'US$'
+        currency.save()
+        self.assertEqual(currencies.serialized(currency.id)['symbol'], 'US$')
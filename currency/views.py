@@ -1,7 +1,8 @@
 from rest_framework import viewsets, status
 from rest_framework.response import Response
 
-from helpers.permission_helpers import unauthorized, check_permissions, check_auth
+from helpers.permission_helpers import ActionPermission
+from currency.cache import currencies
 from currency.models import Currency
 from currency.serializer import CurrencySerializer
 
@@ -9,11 +10,19 @@ from currency.serializer import CurrencySerializer
 class CurrencyViewSet(viewsets.ModelViewSet):
     queryset = Currency.objects.filter(deleted_at__isnull=True)
     serializer_class = CurrencySerializer
+    permission_classes = [ActionPermission]
+    # reference data: served whole from the cache with ETag/Last-Modified instead of paginated
+    pagination_class = None
+    action_permissions = {
+        'create': 'can_create_currency',
+        'update': 'can_update_currency',
+        'partial_update': 'can_update_currency',
+        'destroy': 'can_delete_currency',
+        'list': 'can_view_currency_list',
+        'retrieve': 'can_view_currency',
+    }
 
     def create(self, request, *args, **kwargs):
-        if not check_permissions(request, 'can_create_currency'):
-            return unauthorized()
-
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         self.perform_create(serializer)
@@ -21,8 +30,6 @@ class CurrencyViewSet(viewsets.ModelViewSet):
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
     def update(self, request, *args, **kwargs):
-        if not check_permissions(request, 'can_update_currency'):
-            return unauthorized()
         instance = self.get_object()
         serializer = self.get_serializer(instance, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
@@ -30,8 +37,6 @@ class CurrencyViewSet(viewsets.ModelViewSet):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     def destroy(self, request, *args, **kwargs):
-        if not check_permissions(request, 'can_delete_currency'):
-            return unauthorized()
         try:
             currency = self.get_object()
             currency.delete()
@@ -40,11 +45,4 @@ class CurrencyViewSet(viewsets.ModelViewSet):
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
     def list(self, request, *args, **kwargs):
-        if not check_permissions(request, 'can_view_currency_list'):
-            return unauthorized()
-        return super().list(request, *args, **kwargs)
-
-    def retrieve(self, request, *args, **kwargs):
-        if not check_permissions(request, 'can_view_currency'):
-            return unauthorized()
-        return super().retrieve(request, *args, **kwargs)
+        return currencies.conditional_response(request, currencies.serialized_list)
@@ -0,0 +1,96 @@
+import io
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from document.models import Document
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=settings.DOCUMENT_DERIVATIVE_WORKERS,
+                                       thread_name_prefix='document-derivatives')
+    return _executor
+
+
+def derivative_name(digest, label, extension) -> str:
+    return f'{settings.DOCUMENT_CONTENT_ROOT}/derivatives/{digest[:2]}/{digest}-{label}.{extension}'
+
+
+def _encode(image, image_format) -> ContentFile:
+    buffer = io.BytesIO()
+    if image_format == 'JPEG':
+        image.convert('RGB').save(buffer, 'JPEG', quality=settings.DOCUMENT_DERIVATIVE_QUALITY, optimize=True)
+    else:
+        image.save(buffer, 'WEBP', quality=settings.DOCUMENT_DERIVATIVE_QUALITY, method=4)
+    return ContentFile(buffer.getvalue())
+
+
+def build_derivatives(document_id) -> dict:
+    """
+    Write a full-size WebP copy and, for every DOCUMENT_THUMBNAIL_SIZES entry, a JPEG and a WebP
+    thumbnail of an image document, then record their names on every document with the same
+    content. Derivatives are named after the content hash, so shared images are converted once.
+    """
+    document = Document.objects.filter(pk=document_id).values('path', 'content_hash', 'deleted_at').first()
+    if document is None or not document['content_hash'] or document['deleted_at'] is not None:
+        return {}
+    digest = document['content_hash']
+    variants = [('webp', None, 'WEBP', 'webp')]
+    for label, size in settings.DOCUMENT_THUMBNAIL_SIZES.items():
+        variants += [(label, size, 'JPEG', 'jpg'), (f'{label}_webp', size, 'WEBP', 'webp')]
+
+    names = {label: derivative_name(digest, label, extension) for label, _, _, extension in variants}
+    missing = [variant for variant in variants if not default_storage.exists(names[variant[0]])]
+    if missing:
+        encoded = {}
+        try:
+            with default_storage.open(document['path']) as file, Image.open(file) as source:
+                source = ImageOps.exif_transpose(source)
+                for label, size, image_format, _ in missing:
+                    image = source.copy()
+                    if size:
+                        image.thumbnail(size)
+                    encoded[label] = _encode(image, image_format)
+        except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as e:
+            logger.warning('No derivatives for document %s: %s', document_id, e)
+            return {}
+        # deleted while converting: its move job has already run and would never pick these up
+        if not Document.objects.filter(content_hash=digest, deleted_at__isnull=True).exists():
+            return {}
+        for label, content in encoded.items():
+            default_storage.save(names[label], content)
+
+    Document.objects.filter(content_hash=digest).update(derivatives=names)
+    return names
+
+
+def _build_in_worker(document_id):
+    try:
+        build_derivatives(document_id)
+    except Exception:
+        logger.exception('Building derivatives for document %s failed', document_id)
+    finally:
+        # worker threads keep their own connection; give it back after every job
+        connection.close()
+
+
+def schedule_derivatives(document_id) -> None:
+    """
+    Build the derivatives of a document in the worker pool, or inline when
+    DOCUMENT_DERIVATIVES_SYNC is set (tests, management commands).
+    """
+    if settings.DOCUMENT_DERIVATIVES_SYNC:
+        build_derivatives(document_id)
+    else:
+        _get_executor().submit(_build_in_worker, document_id)
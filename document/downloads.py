@@ -0,0 +1,111 @@
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.http import content_disposition_header, quote_etag
+
+_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class _RangeFile:
+    # file-like view of `length` bytes of an open file, starting at its current position
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        size = self.remaining if size < 0 else min(size, self.remaining)
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def _parse_range(header, size):
+    """
+    Return `(start, end)` for a single `bytes=` range, None when the header should be ignored
+    (absent, malformed or several ranges) and False when it cannot be satisfied.
+    """
+    match = _RANGE.match(header.strip()) if header else None
+    if match is None or match.group(1) == match.group(2) == '':
+        return None
+    first, last = match.groups()
+    if first == '':
+        # bytes=-N: the last N bytes
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def _cache_headers(response, etag):
+    if etag:
+        response['ETag'] = etag
+    # the URL names the document, not its content, which an update can replace: clients keep
+    # their copy but revalidate it against the ETag on every use
+    response['Cache-Control'] = 'private, no-cache'
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+def serve_document(request, document):
+    """
+    Answer a download of the document's file.
+
+    Conditional requests are answered from the content hash without opening the file.
+    With DOCUMENT_SENDFILE set the transfer, ranges included, is handed to the web server
+    through X-Accel-Redirect (nginx) or X-Sendfile (Apache, lighttpd); otherwise the file is
+    streamed with FileResponse, honouring a single `Range`.
+    """
+    name = document.path.name
+    path = default_storage.path(name)
+    if not os.path.exists(path):
+        raise Http404
+    etag = quote_etag(document.content_hash) if document.content_hash else None
+    if etag and etag in [tag.strip() for tag in request.headers.get('If-None-Match', '').split(',')]:
+        return _cache_headers(HttpResponse(status=304), etag)
+
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    if settings.DOCUMENT_SENDFILE == 'nginx':
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = settings.DOCUMENT_SENDFILE_URL_PREFIX.rstrip('/') + '/' + name
+        response['Content-Disposition'] = content_disposition_header(False, document.name)
+        return _cache_headers(response, etag)
+    if settings.DOCUMENT_SENDFILE == 'sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = os.path.abspath(path)
+        response['Content-Disposition'] = content_disposition_header(False, document.name)
+        return _cache_headers(response, etag)
+
+    size = os.path.getsize(path)
+    byte_range = None
+    if_range = request.headers.get('If-Range')
+    if not if_range or if_range == etag:
+        byte_range = _parse_range(request.headers.get('Range'), size)
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return _cache_headers(response, etag)
+
+    file = open(path, 'rb')
+    if byte_range is None:
+        response = FileResponse(file, content_type=content_type, filename=document.name)
+        return _cache_headers(response, etag)
+
+    start, end = byte_range
+    file.seek(start)
+    response = FileResponse(_RangeFile(file, end - start + 1), status=206, content_type=content_type,
+                            filename=document.name)
+    response['Content-Length'] = end - start + 1
+    response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return _cache_headers(response, etag)
@@ -0,0 +1,83 @@
+import hashlib
+import os
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from PIL import Image, UnidentifiedImageError
+
+
+class HashingFileUploadHandler(TemporaryFileUploadHandler):
+    """
+    Streams each uploaded file to a temporary file on disk, chunk by chunk, and computes its
+    SHA-256 on the way, so the file is never held in memory nor read a second time to hash it.
+    The digest is available as `sha256` on the uploaded file.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.sha256 = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.sha256.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        file.sha256 = self.sha256.hexdigest()
+        return file
+
+
+def content_hash(file) -> str:
+    digest = getattr(file, 'sha256', None)
+    if digest:
+        return digest
+    sha256 = hashlib.sha256()
+    for chunk in file.chunks():
+        sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def content_name(digest, filename) -> str:
+    # documents/ab/cd/abcd...ef.jpg: the same bytes always land on the same name
+    extension = os.path.splitext(filename)[1].lower()
+    return f'{settings.DOCUMENT_CONTENT_ROOT}/{digest[:2]}/{digest[2:4]}/{digest}{extension}'
+
+
+def image_dimension(file) -> str:
+    # Pillow only parses the header here; anything it cannot read has no dimension
+    try:
+        file.seek(0)
+        with Image.open(file) as image:
+            return f'{image.width}x{image.height}'
+    except (UnidentifiedImageError, OSError, ValueError):
+        return ''
+    finally:
+        file.seek(0)
+
+
+def store_file(file):
+    """
+    Store an uploaded file under its content address and return `(name, digest, size, dimension)`.
+
+    When a file with the same content is already stored, the upload is dropped and the
+    existing file is shared.
+    """
+    digest = content_hash(file)
+    dimension = image_dimension(file)
+    size = file.size
+    name = content_name(digest, file.name)
+    if not default_storage.exists(name):
+        saved = default_storage.save(name, file)
+        if saved != name:
+            # a concurrent upload of the same bytes was stored first and got the name; share it
+            default_storage.delete(saved)
+    return name, digest, size, dimension
+
+
+def is_shared(document) -> bool:
+    """
+    Whether another live document points to the same stored file.
+    """
+    return type(document).objects.filter(path=document.path.name, deleted_at__isnull=True).exclude(
+        pk=document.pk).exists()
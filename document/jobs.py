@@ -0,0 +1,159 @@
+import logging
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .derivatives import schedule_derivatives
+from .files import is_shared
+from .models import Document, FileJob
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 5
+# a job still running after this long belongs to a worker that died and is handed to another one
+LEASE_TIMEOUT = timedelta(minutes=10)
+
+
+class FileGone(Exception):
+    """
+    The file a job works on no longer exists anywhere; retrying cannot help.
+    """
+
+
+def deleted_path(name) -> str:
+    # the content-addressed sub-directories are kept, so names never collide in the deleted area
+    return os.path.join(settings.DELETED_MEDIA_ROOT, name)
+
+
+def _move(source, destination) -> None:
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    os.replace(source, destination)
+
+
+def _derivatives_shared(document) -> bool:
+    # derivatives are named after the content hash, whatever the extension of the original
+    return not document.content_hash or type(document).objects.filter(
+        content_hash=document.content_hash, deleted_at__isnull=True).exclude(pk=document.pk).exists()
+
+
+def _file_names(document) -> list:
+    """
+    Storage names of the files a delete or restore moves: the document's file unless another
+    live document serves it, and its thumbnails and WebP copies unless another live document
+    has the same content.
+    """
+    names = [] if is_shared(document) else [document.path.name]
+    if document.derivatives and not _derivatives_shared(document):
+        names += document.derivatives.values()
+    return names
+
+
+def file_available(document) -> bool:
+    # in place, or in the deleted area where a restore job can take it back from
+    name = document.path.name
+    return default_storage.exists(name) or os.path.exists(deleted_path(name))
+
+
+def _move_to_deleted(names) -> None:
+    for name in names:
+        source = default_storage.path(name)
+        if not os.path.exists(source):
+            # moved by an earlier attempt, or a derivative that was never built
+            continue
+        destination = deleted_path(name)
+        _move(source, destination)
+        # the deletion time, which purge_deleted_media measures retention from
+        os.utime(destination)
+
+
+def move_to_deleted(job) -> None:
+    document = job.document
+    if document.deleted_at is not None:
+        _move_to_deleted(_file_names(document))
+
+
+def discard(job) -> None:
+    """
+    Move the file a new upload replaced, and its derivatives, to the deleted area unless a live
+    document still uses them.
+    """
+    replaced = job.replaced
+    live = Document.objects.filter(deleted_at__isnull=True)
+    names = [] if live.filter(path=replaced['path']).exists() else [replaced['path']]
+    if replaced['derivatives'] and not live.filter(content_hash=replaced['content_hash']).exists():
+        names += replaced['derivatives'].values()
+    _move_to_deleted(names)
+
+
+def restore(job) -> None:
+    document = job.document
+    if document.deleted_at is not None:
+        return
+    if not file_available(document):
+        # purged while the restore was queued: the document cannot be live without its file
+        type(document).objects.filter(pk=document.pk).update(
+            deleted_at=timezone.now(), status=False, updated_at=timezone.now())
+        raise FileGone(f'{document.path.name} has been purged')
+    for name in [document.path.name, *document.derivatives.values()]:
+        source = deleted_path(name)
+        if os.path.exists(source) and not default_storage.exists(name):
+            _move(source, default_storage.path(name))
+    if not all(default_storage.exists(name) for name in document.derivatives.values()):
+        # derivatives purged on their own are built again
+        type(document).objects.filter(pk=document.pk).update(derivatives={})
+        schedule_derivatives(document.pk)
+
+
+HANDLERS = {
+    FileJob.MOVE_TO_DELETED: move_to_deleted,
+    FileJob.RESTORE: restore,
+    FileJob.DISCARD: discard,
+}
+
+
+def claim_jobs(batch_size) -> list:
+    """
+    Mark up to `batch_size` jobs as running and return them, oldest first. Pending jobs are
+    claimed along with running ones whose lease has expired. Rows locked by another worker
+    are skipped where the database supports it.
+    """
+    now = timezone.now()
+    expired = Q(status=FileJob.RUNNING, updated_at__lt=now - LEASE_TIMEOUT)
+    with transaction.atomic():
+        # a job that kept killing its worker is not tried again
+        FileJob.objects.filter(expired, attempts__gte=MAX_ATTEMPTS).update(
+            status=FileJob.FAILED, error='Lease expired', updated_at=now)
+        ids = list(
+            FileJob.objects.select_for_update(skip_locked=True).filter(Q(status=FileJob.PENDING) | expired)
+            .order_by('id').values_list('id', flat=True)[:batch_size]
+        )
+        FileJob.objects.filter(id__in=ids).update(status=FileJob.RUNNING, attempts=F('attempts') + 1,
+                                                  updated_at=now)
+    return list(FileJob.objects.filter(id__in=ids).select_related('document').order_by('id'))
+
+
+def process_jobs(batch_size=100) -> tuple:
+    """
+    Run one batch of file jobs and return `(done, failed)`. A failing job goes back to the
+    queue until it has been tried MAX_ATTEMPTS times, unless its file is gone for good.
+    """
+    done = []
+    failed = 0
+    for job in claim_jobs(batch_size):
+        try:
+            HANDLERS[job.action](job)
+        except Exception as e:
+            failed += 1
+            logger.warning('File job %s (%s) failed: %s', job.pk, job.action, e)
+            final = isinstance(e, FileGone) or job.attempts >= MAX_ATTEMPTS
+            FileJob.objects.filter(pk=job.pk).update(
+                status=FileJob.FAILED if final else FileJob.PENDING, error=str(e), updated_at=timezone.now())
+        else:
+            done.append(job.pk)
+    FileJob.objects.filter(id__in=done).update(status=FileJob.DONE, error='', updated_at=timezone.now())
+    return len(done), failed
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from document.jobs import process_jobs
+
+
+class Command(BaseCommand):
+    help = 'Run queued document file jobs (moves to and from DELETED_MEDIA_ROOT) in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--loop', action='store_true', help='Keep polling the queue instead of exiting when empty')
+        parser.add_argument('--interval', type=float, default=5, help='Seconds to sleep on an empty queue with --loop')
+
+    def handle(self, *args, **options):
+        total_done = total_failed = 0
+        while True:
+            done, failed = process_jobs(options['batch_size'])
+            total_done += done
+            total_failed += failed
+            if done or failed:
+                self.stdout.write(f'{done} jobs done, {failed} failed')
+            elif options['loop']:
+                time.sleep(options['interval'])
+            else:
+                break
+        self.stdout.write(self.style.SUCCESS(f'{total_done} jobs done, {total_failed} failed'))
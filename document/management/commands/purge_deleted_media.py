@@ -0,0 +1,59 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from document.models import FileJob
+
+
+class Command(BaseCommand):
+    help = 'Permanently remove files that have been in DELETED_MEDIA_ROOT for longer than the retention period.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.DELETED_MEDIA_RETENTION_DAYS)
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        root = settings.DELETED_MEDIA_ROOT
+        cutoff = time.time() - options['days'] * 24 * 60 * 60
+        # files of documents waiting to be restored, derivatives included, are kept whatever their age
+        restoring = set()
+        for name, derivatives in FileJob.objects.filter(
+            action=FileJob.RESTORE, status__in=[FileJob.PENDING, FileJob.RUNNING],
+        ).values_list('document__path', 'document__derivatives'):
+            for kept_name in [name, *(derivatives or {}).values()]:
+                restoring.add(os.path.normpath(os.path.join(root, kept_name)))
+
+        removed = kept = 0
+        freed = 0
+        # os.scandir hands back the type and stat of every entry without extra system calls per path
+        stack = [root] if os.path.isdir(root) else []
+        directories = []
+        while stack:
+            directory = stack.pop()
+            directories.append(directory)
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                        continue
+                    stat = entry.stat(follow_symlinks=False)
+                    if stat.st_mtime >= cutoff or os.path.normpath(entry.path) in restoring:
+                        kept += 1
+                        continue
+                    removed += 1
+                    freed += stat.st_size
+                    if not options['dry_run']:
+                        os.remove(entry.path)
+
+        if not options['dry_run']:
+            # deepest first, so emptied parents can go too
+            for directory in reversed(directories[1:]):
+                try:
+                    os.rmdir(directory)
+                except OSError:
+                    pass
+
+        verb = 'Would remove' if options['dry_run'] else 'Removed'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {removed} files ({freed} bytes), kept {kept}'))
@@ -0,0 +1,30 @@
+# Generated by Django 5.0.4 on 2026-10-18 20:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('document', '0004_document_derivatives'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FileJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(choices=[('move_to_deleted', 'Move to deleted'), ('restore', 'Restore')], max_length=20)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='file_jobs', to='document.document')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'id'], name='filejob_status_idx')],
+            },
+        ),
+    ]
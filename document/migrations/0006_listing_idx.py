@@ -0,0 +1,18 @@
+# Generated by Django 5.0.4 on 2026-10-18 20:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('document', '0005_filejob'),
+        ('product', '0005_product_sku'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='document',
+            index=models.Index(fields=['deleted_at', 'created_at', 'id'], name='document_listing_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.4 on 2026-10-18 20:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('document', '0006_listing_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='filejob',
+            name='replaced',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AlterField(
+            model_name='filejob',
+            name='action',
+            field=models.CharField(choices=[('move_to_deleted', 'Move to deleted'), ('restore', 'Restore'), ('discard', 'Discard replaced file')], max_length=20),
+        ),
+    ]
@@ -1,9 +1,9 @@
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 
 from ecommerce_api import settings
 from product.models import Product
-import os
+from .files import store_file
 
 
 class Document(models.Model):
@@ -18,6 +18,9 @@ class Document(models.Model):
     document_type = models.CharField(max_length=10, choices=DocumentType, default='Image')
     size = models.IntegerField()
     dimension = models.CharField(max_length=50, blank=True)
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True, editable=False)
+    # label -> storage name of the thumbnails and WebP copies built by document.derivatives
+    derivatives = models.JSONField(default=dict, blank=True, editable=False)
     status = models.BooleanField(default=True)
     is_main = models.BooleanField(default=False)
 
@@ -25,23 +28,84 @@ class Document(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     deleted_at = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['deleted_at', 'created_at', 'id'], name='document_listing_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # a new upload is stored by content; size and dimension come from the file itself
+        replaced = None
+        if self.path and not self.path._committed:
+            if self.pk is not None:
+                replaced = type(self).objects.filter(pk=self.pk).values('path', 'content_hash', 'derivatives').first()
+            name, self.content_hash, self.size, self.dimension = store_file(self.path.file)
+            self.path.name = name
+            self.path._committed = True
+            self.derivatives = {}
+        if not replaced or not replaced['path'] or replaced['path'] == self.path.name:
+            super().save(*args, **kwargs)
+            return
+        # the file this upload replaces, and its derivatives, are removed off the request path
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            FileJob.objects.create(document=self, action=FileJob.DISCARD, replaced=replaced)
+
     def delete(self, *args, **kwargs):
+        """
+        Soft-delete the document and queue the move of its file to DELETED_MEDIA_ROOT, which
+        `manage.py process_file_jobs` carries out off the request path.
+        """
         self.deleted_at = timezone.now()
         self.status = False
-        try:
-            # Check if running in a test environment
-            if settings.TESTING:
-                # Move the file to a temporary deleted directory for testing
-                temp_deleted_media_root = os.path.join(settings.MEDIA_ROOT, 'temp_deleted')
-                os.makedirs(temp_deleted_media_root, exist_ok=True)
-                os.rename(self.path.path, os.path.join(temp_deleted_media_root, os.path.basename(self.path.path)))
-            else:
-                # Move the file to the actual deleted directory
-                os.makedirs(settings.DELETED_MEDIA_ROOT, exist_ok=True)
-                os.rename(self.path.path, os.path.join(settings.DELETED_MEDIA_ROOT, os.path.basename(self.path.path)))
+        with transaction.atomic():
+            self.save()
+            FileJob.objects.create(document=self, action=FileJob.MOVE_TO_DELETED)
+        return True
 
+    def restore(self):
+        self.deleted_at = None
+        self.status = True
+        with transaction.atomic():
             self.save()
-            return True
-        except Exception as e:
-            print(e)
-            return False
+            FileJob.objects.create(document=self, action=FileJob.RESTORE)
+
+
+class FileJob(models.Model):
+    """
+    A pending file operation on a document, stored in the database so that it survives
+    restarts and is retried until it succeeds or runs out of attempts.
+    """
+    MOVE_TO_DELETED = 'move_to_deleted'
+    RESTORE = 'restore'
+    DISCARD = 'discard'
+    ACTIONS = (
+        (MOVE_TO_DELETED, 'Move to deleted'),
+        (RESTORE, 'Restore'),
+        (DISCARD, 'Discard replaced file'),
+    )
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    )
+
+    document = models.ForeignKey(Document, related_name='file_jobs', on_delete=models.CASCADE)
+    action = models.CharField(max_length=20, choices=ACTIONS)
+    status = models.CharField(max_length=10, choices=STATUSES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    # for DISCARD: the path, content_hash and derivatives the document had before its file was replaced
+    replaced = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'id'], name='filejob_status_idx'),
+        ]
@@ -1,9 +1,21 @@
+from django.core.files.storage import default_storage
 from rest_framework import serializers
 from .models import Document
 
 
 class DocumentSerializer(serializers.ModelSerializer):
+    derivatives = serializers.SerializerMethodField()
+
     class Meta:
         model = Document
         fields = ['id', 'name', 'path', 'product', 'product', 'document_type', 'size', 'dimension', 'status', 'is_main',
-                  'created_at', 'updated_at', 'deleted_at']
+                  'content_hash', 'derivatives', 'created_at', 'updated_at', 'deleted_at']
+        read_only_fields = ['size', 'dimension', 'content_hash']
+
+    def get_derivatives(self, document):
+        request = self.context.get('request')
+        urls = {}
+        for label, name in document.derivatives.items():
+            url = default_storage.url(name)
+            urls[label] = request.build_absolute_uri(url) if request else url
+        return urls
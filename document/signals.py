@@ -0,0 +1,13 @@
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .derivatives import schedule_derivatives
+from .models import Document
+
+
+@receiver(post_save, sender=Document)
+def build_image_derivatives(sender, instance, **kwargs):
+    if instance.document_type == 'Image' and instance.content_hash and not instance.derivatives \
+            and instance.deleted_at is None:
+        transaction.on_commit(lambda: schedule_derivatives(instance.pk))
@@ -1,9 +1,14 @@
+import hashlib
+import io
 import os
 import shutil
 import tempfile
+from datetime import timedelta
 from tempfile import TemporaryDirectory
 from unittest.mock import patch, MagicMock
+from django.core.files.storage import default_storage
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
 from django.test import TestCase, override_settings
 from django.urls import reverse
 from rest_framework import status
@@ -12,8 +17,17 @@ from rest_framework.test import APIClient
 from category.models import Category
 from ecommerce_api import settings
 from product.models import Product
-from .models import Document
+from . import derivatives
+from .jobs import process_jobs
+from .models import Document, FileJob
 from django.utils import timezone
+from PIL import Image
+
+
+def image_bytes(width, height, image_format='JPEG'):
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), 'red').save(buffer, image_format)
+    return buffer.getvalue()
 
 
 class DocumentViewSetTestCase(TestCase):
@@ -27,18 +41,17 @@ class DocumentViewSetTestCase(TestCase):
     def cleanUp(self, folder_to_delete):
         shutil.rmtree(folder_to_delete)
 
-    @patch('document.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_create_document_image(self, mock_check_permissions):
         with tempfile.TemporaryDirectory() as tmp_media:
             temp_media_root = os.path.join(tmp_media, settings.MEDIA_ROOT)
             with self.settings(MEDIA_ROOT=temp_media_root):
-                dummy_file = SimpleUploadedFile('test.jpg', b'file_content', content_type='image/jpeg')
+                dummy_file = SimpleUploadedFile('test.jpg', image_bytes(100, 100), content_type='image/jpeg')
                 data = {
                     'name': dummy_file.name,
                     'path': dummy_file,
                     'size': dummy_file.size,
                     'document_type': 'Image',
-                    'dimension': '100x100',
                     'is_main': True,
                     'product': self.product.id,
                     'status': True
@@ -56,7 +69,7 @@ class DocumentViewSetTestCase(TestCase):
 
                 mock_check_permissions.assert_called()
 
-    @patch('document.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_create_document_video(self, mock_check_permissions):
         with tempfile.TemporaryDirectory() as tmp_media:
             temp_media_root = os.path.join(tmp_media, settings.MEDIA_ROOT)
@@ -82,7 +95,7 @@ class DocumentViewSetTestCase(TestCase):
                 self.assertEqual(document['is_main'], True)
                 mock_check_permissions.assert_called()
 
-    @patch('document.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_create_document_pdf(self, mock_check_permissions):
         with tempfile.TemporaryDirectory() as tmp_media:
             temp_media_root = os.path.join(tmp_media, settings.MEDIA_ROOT)
@@ -109,7 +122,7 @@ class DocumentViewSetTestCase(TestCase):
                 self.assertEqual(response.status_code, status.HTTP_201_CREATED)
                 mock_check_permissions.assert_called()
 
-    @patch('document.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_update_document(self, mock_check_permissions):
         with tempfile.TemporaryDirectory() as tmp_media:
             temp_media_root = os.path.join(tmp_media, settings.MEDIA_ROOT)
@@ -139,11 +152,11 @@ class DocumentViewSetTestCase(TestCase):
                 self.assertEqual(document['is_main'], True)
                 mock_check_permissions.assert_called()
 
-    @patch('document.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_delete_document(self, mock_check_permissions):
         with tempfile.TemporaryDirectory() as tmp_media:
             temp_media_root = os.path.join(tmp_media, settings.MEDIA_ROOT)
-            temp_deleted_media_root = os.path.join(settings.MEDIA_ROOT, 'temp_deleted')
+            temp_deleted_media_root = os.path.join(tmp_media, 'temp_deleted')
             with self.settings(MEDIA_ROOT=temp_media_root, DELETED_MEDIA_ROOT=temp_deleted_media_root):
                 dummy_file = SimpleUploadedFile('test.jpg', b'file_content', content_type='image/jpeg')
                 document = Document.objects.create(name=dummy_file.name, path=dummy_file, size=dummy_file.size,
@@ -156,9 +169,13 @@ class DocumentViewSetTestCase(TestCase):
                 self.assertFalse(document.deleted_at is None)
                 self.assertFalse(document.status is True)
                 mock_check_permissions.assert_called()
-                self.cleanUp(temp_deleted_media_root)
+                # the file only moves when the queued job runs
+                self.assertTrue(os.path.exists(document.path.path))
+                self.assertEqual(process_jobs(), (1, 0))
+                self.assertFalse(os.path.exists(document.path.path))
+                self.assertTrue(os.path.exists(os.path.join(temp_deleted_media_root, document.path.name)))
 
-    @patch('document.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_list_document(self, mock_check_permissions):
         with tempfile.TemporaryDirectory() as tmp_media:
             temp_media_root = os.path.join(tmp_media, settings.MEDIA_ROOT)
@@ -183,10 +200,10 @@ class DocumentViewSetTestCase(TestCase):
 
                 response = self.api_client.get(self.url)
                 self.assertEqual(response.status_code, status.HTTP_200_OK)
-                self.assertEqual(len(response.data), 4)
+                self.assertEqual(len(response.data['results']), 4)
                 mock_check_permissions.assert_called()
 
-    @patch('document.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_retrieve_document(self, mock_check_permissions):
         with tempfile.TemporaryDirectory() as tmp_media:
             temp_media_root = os.path.join(tmp_media, settings.MEDIA_ROOT)
@@ -203,4 +220,292 @@ class DocumentViewSetTestCase(TestCase):
                 self.assertEqual(response.status_code, status.HTTP_200_OK)
                 self.assertEqual(response.data['name'], dummy_file.name)
                 self.assertEqual(response.data['document_type'], 'Image')
-                mock_check_permissions.assert_called()
\ No newline at end of file
+                mock_check_permissions.assert_called()
+
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
+    def test_upload_is_content_addressed_and_deduplicated(self, mock_check_permissions):
+        with tempfile.TemporaryDirectory() as tmp_media:
+            with self.settings(MEDIA_ROOT=tmp_media):
+                content = image_bytes(64, 32, 'PNG')
+                digest = hashlib.sha256(content).hexdigest()
+                other_product = Product.objects.create(name='Other Product', description='Description test',
+                                                       category=self.category, price=100)
+                responses = [
+                    self.api_client.post(self.url, {
+                        'name': 'photo.png',
+                        'path': SimpleUploadedFile('photo.png', content, content_type='image/png'),
+                        'size': 1,
+                        'dimension': '1x1',
+                        'document_type': 'Image',
+                        'product': product.id,
+                    }, format='multipart')
+                    for product in (self.product, other_product)
+                ]
+                for response in responses:
+                    self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+                    self.assertEqual(response.data['content_hash'], digest)
+                    self.assertEqual(response.data['size'], len(content))
+                    self.assertEqual(response.data['dimension'], '64x32')
+
+                first, second = Document.objects.order_by('id')
+                self.assertEqual(first.path.name, f'documents/{digest[:2]}/{digest[2:4]}/{digest}.png')
+                self.assertEqual(first.path.name, second.path.name)
+                self.assertEqual(os.listdir(os.path.dirname(first.path.path)), [f'{digest}.png'])
+
+                # the file stays in place while another document still uses it
+                self.api_client.delete(reverse('documents-detail', args=[first.id]))
+                self.assertEqual(process_jobs(), (1, 0))
+                first.refresh_from_db()
+                self.assertIsNotNone(first.deleted_at)
+                self.assertTrue(os.path.exists(second.path.path))
+
+    def test_concurrent_identical_uploads_share_one_file(self):
+        with tempfile.TemporaryDirectory() as tmp_media:
+            with self.settings(MEDIA_ROOT=tmp_media):
+                documents = []
+                real_exists = default_storage.exists
+                for _ in range(2):
+                    checked = []
+
+                    def exists(name):
+                        # both uploads find the name free before either has stored the file
+                        checked.append(name)
+                        return len(checked) > 1 and real_exists(name)
+
+                    dummy_file = SimpleUploadedFile('test.pdf', b'file_content', content_type='application/pdf')
+                    with patch('document.files.default_storage.exists', side_effect=exists):
+                        documents.append(Document.objects.create(name=dummy_file.name, path=dummy_file,
+                                                                 document_type='PDF', product=self.product))
+                first, second = documents
+                self.assertEqual(first.path.name, second.path.name)
+                self.assertEqual(os.listdir(os.path.dirname(first.path.path)), [os.path.basename(first.path.name)])
+
+    def test_replaced_file_is_discarded(self):
+        with tempfile.TemporaryDirectory() as tmp_media:
+            deleted_root = os.path.join(tmp_media, 'deleted')
+            with self.settings(MEDIA_ROOT=tmp_media, DELETED_MEDIA_ROOT=deleted_root):
+                dummy_file = SimpleUploadedFile('photo.jpg', image_bytes(400, 300), content_type='image/jpeg')
+                with self.captureOnCommitCallbacks(execute=True):
+                    document = Document.objects.create(name=dummy_file.name, path=dummy_file, document_type='Image',
+                                                       product=self.product)
+                document.refresh_from_db()
+                old_names = [document.path.name, *document.derivatives.values()]
+
+                document.path = SimpleUploadedFile('photo.jpg', image_bytes(200, 100), content_type='image/jpeg')
+                with self.captureOnCommitCallbacks(execute=True):
+                    document.save()
+                document.refresh_from_db()
+                self.assertEqual(document.dimension, '200x100')
+                self.assertEqual(process_jobs(), (1, 0))
+                for name in old_names:
+                    self.assertFalse(os.path.exists(os.path.join(tmp_media, name)))
+                    self.assertTrue(os.path.exists(os.path.join(deleted_root, name)))
+                for name in [document.path.name, *document.derivatives.values()]:
+                    self.assertTrue(os.path.exists(os.path.join(tmp_media, name)))
+
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
+    def test_image_derivatives_built_after_commit(self, mock_check_permissions):
+        with tempfile.TemporaryDirectory() as tmp_media:
+            with self.settings(MEDIA_ROOT=tmp_media):
+                data = {
+                    'name': 'photo.jpg',
+                    'path': SimpleUploadedFile('photo.jpg', image_bytes(1200, 800), content_type='image/jpeg'),
+                    'document_type': 'Image',
+                    'product': self.product.id,
+                }
+                with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                    response = self.api_client.post(self.url, data, format='multipart')
+                self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+                self.assertEqual(len(callbacks), 1)
+
+                document = Document.objects.get(pk=response.data['id'])
+                self.assertEqual(set(document.derivatives), {'webp', 'small', 'small_webp', 'medium', 'medium_webp'})
+                with Image.open(os.path.join(tmp_media, document.derivatives['small'])) as thumbnail:
+                    self.assertEqual((thumbnail.format, thumbnail.size), ('JPEG', (150, 100)))
+                with Image.open(os.path.join(tmp_media, document.derivatives['medium_webp'])) as thumbnail:
+                    self.assertEqual((thumbnail.format, thumbnail.size), ('WEBP', (600, 400)))
+
+                response = self.api_client.get(reverse('documents-detail', args=[document.id]))
+                self.assertTrue(response.data['derivatives']['small'].endswith(document.derivatives['small']))
+
+    def test_no_derivatives_for_document_deleted_while_converting(self):
+        with tempfile.TemporaryDirectory() as tmp_media:
+            with self.settings(MEDIA_ROOT=tmp_media):
+                dummy_file = SimpleUploadedFile('photo.jpg', image_bytes(400, 300), content_type='image/jpeg')
+                document = Document.objects.create(name=dummy_file.name, path=dummy_file, document_type='Image',
+                                                   product=self.product)
+                encode = derivatives._encode
+
+                def encode_then_delete(image, image_format):
+                    Document.objects.filter(pk=document.pk).update(deleted_at=timezone.now())
+                    return encode(image, image_format)
+
+                with patch('document.derivatives._encode', side_effect=encode_then_delete):
+                    self.assertEqual(derivatives.build_derivatives(document.pk), {})
+                self.assertFalse(os.path.exists(os.path.join(tmp_media, settings.DOCUMENT_CONTENT_ROOT,
+                                                             'derivatives')))
+
+    def test_no_derivatives_for_decompression_bomb(self):
+        with tempfile.TemporaryDirectory() as tmp_media:
+            with self.settings(MEDIA_ROOT=tmp_media):
+                dummy_file = SimpleUploadedFile('photo.jpg', image_bytes(400, 300), content_type='image/jpeg')
+                document = Document.objects.create(name=dummy_file.name, path=dummy_file, document_type='Image',
+                                                   product=self.product)
+                with patch.object(Image, 'MAX_IMAGE_PIXELS', 1000), self.assertLogs('document.derivatives', 'WARNING'):
+                    self.assertEqual(derivatives.build_derivatives(document.pk), {})
+                document.refresh_from_db()
+                self.assertEqual(document.derivatives, {})
+
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
+    def test_restore_document(self, mock_check_permissions):
+        with tempfile.TemporaryDirectory() as tmp_media:
+            deleted_root = os.path.join(tmp_media, 'deleted')
+            with self.settings(MEDIA_ROOT=tmp_media, DELETED_MEDIA_ROOT=deleted_root):
+                dummy_file = SimpleUploadedFile('test.pdf', b'file_content', content_type='application/pdf')
+                document = Document.objects.create(name=dummy_file.name, path=dummy_file, size=dummy_file.size,
+                                                   document_type='PDF', product=self.product)
+                restore_url = reverse('documents-restore', args=[document.id])
+                response = self.api_client.post(restore_url)
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+                document.delete()
+                process_jobs()
+                response = self.api_client.post(restore_url)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertIsNone(response.data['deleted_at'])
+                self.assertEqual(process_jobs(), (1, 0))
+                self.assertTrue(os.path.exists(document.path.path))
+                self.assertFalse(FileJob.objects.exclude(status=FileJob.DONE).exists())
+
+    def test_file_jobs_move_derivatives(self):
+        with tempfile.TemporaryDirectory() as tmp_media:
+            deleted_root = os.path.join(tmp_media, 'deleted')
+            with self.settings(MEDIA_ROOT=tmp_media, DELETED_MEDIA_ROOT=deleted_root):
+                dummy_file = SimpleUploadedFile('photo.jpg', image_bytes(400, 300), content_type='image/jpeg')
+                with self.captureOnCommitCallbacks(execute=True):
+                    document = Document.objects.create(name=dummy_file.name, path=dummy_file, document_type='Image',
+                                                       product=self.product)
+                document.refresh_from_db()
+                names = [document.path.name, *document.derivatives.values()]
+
+                document.delete()
+                self.assertEqual(process_jobs(), (1, 0))
+                for name in names:
+                    self.assertFalse(os.path.exists(os.path.join(tmp_media, name)))
+                    self.assertTrue(os.path.exists(os.path.join(deleted_root, name)))
+
+                document.restore()
+                self.assertEqual(process_jobs(), (1, 0))
+                for name in names:
+                    self.assertTrue(os.path.exists(os.path.join(tmp_media, name)))
+
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
+    def test_restore_purged_document(self, mock_check_permissions):
+        with tempfile.TemporaryDirectory() as tmp_media:
+            deleted_root = os.path.join(tmp_media, 'deleted')
+            with self.settings(MEDIA_ROOT=tmp_media, DELETED_MEDIA_ROOT=deleted_root):
+                dummy_file = SimpleUploadedFile('test.pdf', b'file_content', content_type='application/pdf')
+                document = Document.objects.create(name=dummy_file.name, path=dummy_file, size=dummy_file.size,
+                                                   document_type='PDF', product=self.product)
+                document.delete()
+                process_jobs()
+                call_command('purge_deleted_media', days=-1, stdout=io.StringIO())
+
+                response = self.api_client.post(reverse('documents-restore', args=[document.id]))
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+                # purged between the request and the job: the document goes back to deleted
+                document.restore()
+                with self.assertLogs('document.jobs', 'WARNING'):
+                    self.assertEqual(process_jobs(), (0, 1))
+                document.refresh_from_db()
+                self.assertIsNotNone(document.deleted_at)
+                self.assertEqual(FileJob.objects.get(action=FileJob.RESTORE).status, FileJob.FAILED)
+
+    def test_file_jobs_survive_errors_and_crashed_workers(self):
+        with tempfile.TemporaryDirectory() as tmp_media:
+            with self.settings(MEDIA_ROOT=tmp_media, DELETED_MEDIA_ROOT=os.path.join(tmp_media, 'deleted')):
+                dummy_file = SimpleUploadedFile('test.pdf', b'file_content', content_type='application/pdf')
+                document = Document.objects.create(name=dummy_file.name, path=dummy_file, size=dummy_file.size,
+                                                   document_type='PDF', product=self.product)
+                document.delete()
+                job = FileJob.objects.get()
+
+                with patch('document.jobs._file_names', side_effect=ValueError('boom')), \
+                        self.assertLogs('document.jobs', 'WARNING'):
+                    self.assertEqual(process_jobs(), (0, 1))
+                job.refresh_from_db()
+                self.assertEqual((job.status, job.attempts, job.error), (FileJob.PENDING, 1, 'boom'))
+
+                # claimed by a worker that died: only picked up again once its lease has expired
+                FileJob.objects.filter(pk=job.pk).update(status=FileJob.RUNNING, updated_at=timezone.now())
+                self.assertEqual(process_jobs(), (0, 0))
+                FileJob.objects.filter(pk=job.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+                self.assertEqual(process_jobs(), (1, 0))
+                job.refresh_from_db()
+                self.assertEqual((job.status, job.attempts), (FileJob.DONE, 2))
+
+    def test_purge_deleted_media(self):
+        with tempfile.TemporaryDirectory() as tmp_media:
+            deleted_root = os.path.join(tmp_media, 'deleted')
+            with self.settings(MEDIA_ROOT=tmp_media, DELETED_MEDIA_ROOT=deleted_root):
+                documents = []
+                for content in (b'old', b'recent', b'restoring'):
+                    dummy_file = SimpleUploadedFile('test.pdf', content, content_type='application/pdf')
+                    documents.append(Document.objects.create(name=dummy_file.name, path=dummy_file,
+                                                             size=dummy_file.size, document_type='PDF',
+                                                             product=self.product))
+                for document in documents:
+                    document.delete()
+                process_jobs()
+                old, recent, restoring = [os.path.join(deleted_root, document.path.name) for document in documents]
+                long_ago = timezone.now().timestamp() - 40 * 24 * 60 * 60
+                os.utime(old, (long_ago, long_ago))
+                os.utime(restoring, (long_ago, long_ago))
+                documents[2].restore()
+
+                call_command('purge_deleted_media', days=30, stdout=io.StringIO())
+                self.assertFalse(os.path.exists(old))
+                self.assertFalse(os.path.exists(os.path.dirname(old)))
+                self.assertTrue(os.path.exists(recent))
+                self.assertTrue(os.path.exists(restoring))
+
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
+    def test_download_document(self, mock_check_permissions):
+        with tempfile.TemporaryDirectory() as tmp_media:
+            with self.settings(MEDIA_ROOT=tmp_media, DOCUMENT_SENDFILE=''):
+                content = b'0123456789abcdef'
+                dummy_file = SimpleUploadedFile('manual.pdf', content, content_type='application/pdf')
+                document = Document.objects.create(name=dummy_file.name, path=dummy_file, size=dummy_file.size,
+                                                   document_type='PDF', product=self.product)
+                download_url = reverse('documents-download', args=[document.id])
+                etag = f'"{hashlib.sha256(content).hexdigest()}"'
+
+                response = self.api_client.get(download_url)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(b''.join(response.streaming_content), content)
+                self.assertEqual(response['ETag'], etag)
+                self.assertEqual(response['Content-Type'], 'application/pdf')
+                self.assertEqual(response['Cache-Control'], 'private, no-cache')
+
+                response = self.api_client.get(download_url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+                self.assertEqual(response['Cache-Control'], 'private, no-cache')
+
+                for header, expected, content_range in (('bytes=2-5', b'2345', 'bytes 2-5/16'),
+                                                        ('bytes=-3', b'def', 'bytes 13-15/16'),
+                                                        ('bytes=10-', b'abcdef', 'bytes 10-15/16')):
+                    response = self.api_client.get(download_url, HTTP_RANGE=header)
+                    self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+                    self.assertEqual(b''.join(response.streaming_content), expected)
+                    self.assertEqual(response['Content-Range'], content_range)
+                    self.assertEqual(response['Content-Length'], str(len(expected)))
+
+                response = self.api_client.get(download_url, HTTP_RANGE='bytes=20-30')
+                self.assertEqual(response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+
+                with self.settings(DOCUMENT_SENDFILE='nginx'):
+                    response = self.api_client.get(download_url)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{document.path.name}')
+                self.assertEqual(response.content, b'')
@@ -1,7 +1,11 @@
 from rest_framework import viewsets, status
+from rest_framework.decorators import action
 from rest_framework.response import Response
 
-from helpers.permission_helpers import unauthorized, check_permissions, check_auth
+from helpers.permission_helpers import ActionPermission
+from document.downloads import serve_document
+from document.files import HashingFileUploadHandler
+from document.jobs import file_available
 from document.models import Document
 from document.serializer import DocumentSerializer
 from product.models import Product
@@ -10,11 +14,29 @@ from product.models import Product
 class DocumentViewSet(viewsets.ModelViewSet):
     queryset = Document.objects.filter(deleted_at__isnull=True)
     serializer_class = DocumentSerializer
+    permission_classes = [ActionPermission]
+    action_permissions = {
+        'create': 'can_create_document',
+        'update': 'can_update_document',
+        'partial_update': 'can_update_document',
+        'destroy': 'can_delete_document',
+        'restore': 'can_delete_document',
+        'list': 'can_view_document_list',
+        'retrieve': 'can_view_document',
+        'download': 'can_view_document',
+    }
 
-    def create(self, request, *args, **kwargs):
-        if not check_permissions(request, 'can_create_document'):
-            return unauthorized()
+    def get_queryset(self):
+        if self.action == 'restore':
+            return Document.objects.all()
+        return super().get_queryset()
+
+    def initialize_request(self, request, *args, **kwargs):
+        # uploads are hashed while they stream to disk, before the view reads request.data
+        request.upload_handlers = [HashingFileUploadHandler(request)]
+        return super().initialize_request(request, *args, **kwargs)
 
+    def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         self.perform_create(serializer)
@@ -22,8 +44,6 @@ class DocumentViewSet(viewsets.ModelViewSet):
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
     def update(self, request, *args, **kwargs):
-        if not check_permissions(request, 'can_update_document'):
-            return unauthorized()
         instance = self.get_object()
         serializer = self.get_serializer(instance, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
@@ -31,23 +51,20 @@ class DocumentViewSet(viewsets.ModelViewSet):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     def destroy(self, request, *args, **kwargs):
-        if not check_permissions(request, 'can_delete_document'):
-            return unauthorized()
-        try:
-            document = self.get_object()
-            if document.delete():
-                return Response(status=status.HTTP_204_NO_CONTENT)
-            else:
-                return Response({'error': 'Error deleting the document'}, status=status.HTTP_400_BAD_REQUEST)
-        except Exception as e:
-            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
-
-    def list(self, request, *args, **kwargs):
-        if not check_permissions(request, 'can_view_document_list'):
-            return unauthorized()
-        return super().list(request, *args, **kwargs)
-
-    def retrieve(self, request, *args, **kwargs):
-        if not check_permissions(request, 'can_view_document'):
-            return unauthorized()
-        return super().retrieve(request, *args, **kwargs)
+        document = self.get_object()
+        document.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=True, methods=['post'])
+    def restore(self, request, *args, **kwargs):
+        document = self.get_object()
+        if document.deleted_at is None:
+            return Response({'error': 'Document is not deleted'}, status=status.HTTP_400_BAD_REQUEST)
+        if not file_available(document):
+            return Response({'error': 'Document file has been purged'}, status=status.HTTP_400_BAD_REQUEST)
+        document.restore()
+        return Response(self.get_serializer(document).data, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, *args, **kwargs):
+        return serve_document(request, self.get_object())
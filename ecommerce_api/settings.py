@@ -60,6 +60,7 @@ INSTALLED_APPS = [
     "characteristic",
     "cartItem",
     "orderItem",
+    "stock",
     'drf_yasg',
 ]
 
@@ -102,9 +103,46 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # a file rather than shared memory, so that threads in the concurrency tests wait on
+        # SQLite's write lock instead of failing on a locked table
+        'TEST': {
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
     }
 }
 
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'helpers.authentication.CachedTokenAuthentication',
+        'helpers.signed_tokens.SignedTokenAuthentication',
+        'rest_framework.authentication.SessionAuthentication',
+    ],
+    'DEFAULT_PAGINATION_CLASS': 'helpers.pagination.CreatedAtCursorPagination',
+    'PAGE_SIZE': 50,
+}
+
+# Lifetimes, in seconds, of the signed tokens issued by login when token_type is 'signed'
+SIGNED_ACCESS_TOKEN_LIFETIME = config('SIGNED_ACCESS_TOKEN_LIFETIME', default=60 * 5, cast=int)
+SIGNED_REFRESH_TOKEN_LIFETIME = config('SIGNED_REFRESH_TOKEN_LIFETIME', default=60 * 60 * 24 * 7, cast=int)
+
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+# Point CACHE_BACKEND/CACHE_LOCATION at a shared backend (Redis, Memcached) so every worker sees
+# the same version stamps.
+
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='ecommerce-api'),
+    }
+}
+
+# Carts of anonymous visitors, keyed by the cart_session cookie / X-Cart-Session header, live in
+# this cache until they are merged into the client's Cart on login or checkout.
+CART_STORAGE_BACKEND = config('CART_STORAGE_BACKEND', default='cart.storage.CacheCartStorage')
+CART_CACHE_ALIAS = config('CART_CACHE_ALIAS', default='default')
+CART_SESSION_TIMEOUT = config('CART_SESSION_TIMEOUT', default=60 * 60 * 24 * 7, cast=int)
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -146,5 +184,23 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 MEDIA_ROOT = 'media_test/' if 'test' in sys.argv else 'media/'
 DELETED_MEDIA_ROOT = MEDIA_ROOT + 'deleted/'
+# manage.py purge_deleted_media removes files of deleted documents after this many days
+DELETED_MEDIA_RETENTION_DAYS = config('DELETED_MEDIA_RETENTION_DAYS', default=30, cast=int)
+# Uploaded documents are stored once per distinct content under MEDIA_ROOT/<DOCUMENT_CONTENT_ROOT>/
+DOCUMENT_CONTENT_ROOT = 'documents'
+# Thumbnails (JPEG and WebP, fitted inside width x height) and a full-size WebP copy are built for
+# image documents by a pool of DOCUMENT_DERIVATIVE_WORKERS threads after the upload is committed.
+DOCUMENT_THUMBNAIL_SIZES = {
+    'small': (150, 150),
+    'medium': (600, 600),
+}
+DOCUMENT_DERIVATIVE_QUALITY = config('DOCUMENT_DERIVATIVE_QUALITY', default=80, cast=int)
+DOCUMENT_DERIVATIVE_WORKERS = config('DOCUMENT_DERIVATIVE_WORKERS', default=2, cast=int)
+# Document downloads: 'nginx' answers with X-Accel-Redirect to DOCUMENT_SENDFILE_URL_PREFIX (an
+# internal location aliased to MEDIA_ROOT), 'sendfile' with X-Sendfile (Apache, lighttpd); empty
+# streams the file from Django.
+DOCUMENT_SENDFILE = config('DOCUMENT_SENDFILE', default='')
+DOCUMENT_SENDFILE_URL_PREFIX = config('DOCUMENT_SENDFILE_URL_PREFIX', default='/protected-media/')
 
 TESTING = 'test' in sys.argv
+DOCUMENT_DERIVATIVES_SYNC = config('DOCUMENT_DERIVATIVES_SYNC', default=TESTING, cast=bool)
@@ -29,6 +29,7 @@ urlpatterns = [
     path('api/cartItem/', include('cartItem.urls')),
     path('api/global_vars/', include('global_vars.urls')),
     path('api/order/', include('order.urls')),
+    path('api/stock/', include('stock.urls')),
 
     path('api/docs/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
 ]
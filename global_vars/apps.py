@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class GlobalVarsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'global_vars'
+
+    def ready(self):
+        from global_vars import cache  # noqa: F401
@@ -0,0 +1,19 @@
+from helpers.reference_cache import ReferenceCache
+
+variables = ReferenceCache('global_vars.Global_Vars', 'global_vars.serializer.GlobalVarsSerializer', key_field='key')
+
+TRUE_VALUES = ('1', 'true', 'yes', 'on')
+
+
+def get(key, default=None, cast=None):
+    """
+    Return the value of a global variable without touching the database once the keys are cached.
+
+    `cast` converts the stored string (e.g. `int`); `bool` accepts 1/true/yes/on. Missing keys return `default`.
+    """
+    variable = variables.get(key)
+    if variable is None:
+        return default
+    if cast is bool:
+        return variable.value.strip().lower() in TRUE_VALUES
+    return cast(variable.value) if cast else variable.value
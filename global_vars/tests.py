@@ -4,6 +4,7 @@ from django.test import TestCase
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
+from . import cache as global_vars
 from .models import Global_Vars
 from django.utils import timezone
 
@@ -17,7 +18,7 @@ class GlobalVarsViewSetTestCase(TestCase):
             'value': '123456789'
         }
 
-    @patch('global_vars.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_create_currency(self, mock_check_permissions):
         response = self.api_client.post(self.url, self.data, format='json')
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
@@ -25,7 +26,7 @@ class GlobalVarsViewSetTestCase(TestCase):
         self.assertEqual(new_currency['key'], 'default_password')
         mock_check_permissions.assert_called()
 
-    @patch('global_vars.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_update_currency(self, mock_check_permissions):
         existing = Global_Vars.objects.create(key='default_password', value='123456789')
         update_url = reverse('global_vars-detail', args=[existing.id])
@@ -38,7 +39,7 @@ class GlobalVarsViewSetTestCase(TestCase):
         self.assertEqual(updated_data['value'], '987654321')
         mock_check_permissions.assert_called()
 
-    @patch('global_vars.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_delete_currency(self, mock_check_permissions):
         existing = Global_Vars.objects.create(key='default_password', value='123456789')
         delete_url = reverse('global_vars-detail', args=[existing.id])
@@ -46,7 +47,7 @@ class GlobalVarsViewSetTestCase(TestCase):
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         mock_check_permissions.assert_called()
 
-    @patch('global_vars.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_list_currency(self, mock_check_permissions):
         Global_Vars.objects.create(key='default_password', value='123456789')
         Global_Vars.objects.create(key='env', value='Prod')
@@ -56,7 +57,7 @@ class GlobalVarsViewSetTestCase(TestCase):
         self.assertEqual(len(response.data), 3)
         mock_check_permissions.assert_called()
 
-    @patch('global_vars.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_retrieve_currency(self, mock_check_permissions):
         existing = Global_Vars.objects.create(key='default_password', value='123456789')
         Global_Vars.objects.create(key='env', value='Prod')
@@ -66,3 +67,26 @@ class GlobalVarsViewSetTestCase(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['key'], 'default_password')
         mock_check_permissions.assert_called()
+
+
+class GlobalVarsAccessorTestCase(TestCase):
+    def setUp(self):
+        Global_Vars.objects.create(key='max_cart_items', value='25')
+        Global_Vars.objects.create(key='maintenance', value='False')
+
+    def test_get_typed_values(self):
+        self.assertEqual(global_vars.get('max_cart_items', cast=int), 25)
+        self.assertFalse(global_vars.get('maintenance', cast=bool))
+        self.assertEqual(global_vars.get('missing', default='fallback'), 'fallback')
+
+    def test_hot_path_without_queries(self):
+        global_vars.get('max_cart_items')
+        with self.assertNumQueries(0):
+            self.assertEqual(global_vars.get('max_cart_items'), '25')
+
+    def test_change_invalidates(self):
+        self.assertEqual(global_vars.get('max_cart_items', cast=int), 25)
+        Global_Vars.objects.filter(key='max_cart_items').get().delete()
+        self.assertIsNone(global_vars.get('max_cart_items'))
+        Global_Vars.objects.create(key='max_cart_items', value='30')
+        self.assertEqual(global_vars.get('max_cart_items', cast=int), 30)
@@ -0,0 +1,82 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+AUTH_CACHE_TIMEOUT = 60 * 5
+# the only user fields kept in the shared cache; the others, starting with the password hash, are
+# deferred and read from the database if a view uses them
+AUTH_CACHED_FIELDS = ('id', 'username', 'is_active', 'is_staff', 'is_superuser', 'deleted_at', 'updated_at')
+
+
+def _token_cache_key(key) -> str:
+    return f'auth:token:{key}'
+
+
+def _user_cache_key(user_id) -> str:
+    return f'auth:user:{user_id}'
+
+
+def _cache_user(user) -> None:
+    cache.set(_user_cache_key(user.pk), {name: getattr(user, name) for name in AUTH_CACHED_FIELDS},
+              AUTH_CACHE_TIMEOUT)
+
+
+def get_cached_user(user_id):
+    """
+    The user with the given id, or None. Only AUTH_CACHED_FIELDS are loaded; saving the user
+    writes back the fields loaded or set since, never the deferred ones.
+    """
+    model = get_user_model()
+    record = cache.get(_user_cache_key(user_id))
+    if record is None:
+        user = model.objects.only(*AUTH_CACHED_FIELDS).filter(pk=user_id).first()
+        if user is not None:
+            _cache_user(user)
+        return user
+    fields = [field.attname for field in model._meta.concrete_fields if field.attname in record]
+    return model.from_db(router.db_for_read(model), fields, [record[name] for name in fields])
+
+
+def invalidate_cached_user(user_id) -> None:
+    cache.delete(_user_cache_key(user_id))
+
+
+def invalidate_cached_users(user_ids) -> None:
+    cache.delete_many([_user_cache_key(user_id) for user_id in user_ids])
+
+
+def invalidate_cached_token(key) -> None:
+    cache.delete(_token_cache_key(key))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication that resolves token -> user id -> user from the cache.
+
+    Both mappings expire after AUTH_CACHE_TIMEOUT and are dropped as soon as the token is deleted
+    (logout) or the user is saved or deleted, so a deactivated or soft-deleted user is rejected on
+    the next request. `request.auth` is the token key rather than a Token instance.
+    """
+
+    def authenticate_credentials(self, key):
+        user_id = cache.get(_token_cache_key(key))
+        if user_id is None:
+            token = Token.objects.select_related('user').filter(key=key).first()
+            if token is None:
+                raise AuthenticationFailed(_('Invalid token.'))
+            user = token.user
+            cache.set(_token_cache_key(key), user.pk, AUTH_CACHE_TIMEOUT)
+            _cache_user(user)
+        else:
+            user = get_cached_user(user_id)
+            if user is None:
+                invalidate_cached_token(key)
+                raise AuthenticationFailed(_('Invalid token.'))
+
+        if not user.is_active or user.deleted_at is not None:
+            raise AuthenticationFailed(_('User inactive or deleted.'))
+        return user, key
@@ -0,0 +1,235 @@
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, models, transaction
+from django.utils import timezone
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.relations import PrimaryKeyRelatedField
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.validators import UniqueTogetherValidator, UniqueValidator
+
+
+class _InBulkLookup:
+    # stands in for a related field's queryset once every referenced row has been fetched in one query
+    def __init__(self, model, objects):
+        self.model = model
+        self.objects = objects
+
+    def get(self, pk):
+        try:
+            return self.objects[self.model._meta.pk.to_python(pk)]
+        except (KeyError, ValidationError):
+            raise self.model.DoesNotExist
+
+
+def _pk(model, value):
+    # the primary key if it parses, None otherwise; bad values are reported by validation as usual
+    if value is None:
+        return None
+    try:
+        return model._meta.pk.to_python(value)
+    except (TypeError, ValidationError):
+        return None
+
+
+def _pks(model, values):
+    return {pk for pk in (_pk(model, value) for value in values) if pk is not None}
+
+
+def _prefetch_related_fields(serializer, rows):
+    for field in serializer.fields.values():
+        if not isinstance(field, PrimaryKeyRelatedField) or field.read_only:
+            continue
+        queryset = field.get_queryset()
+        pks = _pks(queryset.model, [row.get(field.field_name) for row in rows if isinstance(row, dict)])
+        field.queryset = _InBulkLookup(queryset.model, queryset.in_bulk(pks))
+
+
+def _unique_checks(serializer):
+    """
+    Take the UniqueValidator and UniqueTogetherValidator instances off a serializer, which
+    would each run one query per row, and return them as `(sources, queryset, error key,
+    message)` checks for BulkListSerializer to run once per batch.
+    """
+    checks = []
+    for field in serializer.fields.values():
+        unique = [validator for validator in field.validators if isinstance(validator, UniqueValidator)]
+        if unique:
+            field.validators = [validator for validator in field.validators if validator not in unique]
+            checks += [((field.source,), validator.queryset, field.field_name, validator.message)
+                       for validator in unique]
+    together = [validator for validator in serializer.validators if isinstance(validator, UniqueTogetherValidator)]
+    if together:
+        serializer.validators = [validator for validator in serializer.validators if validator not in together]
+        checks += [
+            (tuple(serializer.fields[name].source for name in validator.fields), validator.queryset,
+             api_settings.NON_FIELD_ERRORS_KEY, validator.message.format(field_names=', '.join(validator.fields)))
+            for validator in together
+        ]
+    return checks
+
+
+def _unique_value(value):
+    return value.pk if isinstance(value, models.Model) else value
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """
+    Validates and saves the rows of a BulkModelMixin call.
+
+    To update, `instance` is a `{pk: object}` map fetched up front and every row is validated
+    against the object its `id` names. Unique fields and unique-together sets are checked for
+    the whole batch, against each other and with one query per constraint, instead of row by row.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.batch_size = kwargs.pop('batch_size', None)
+        super().__init__(*args, **kwargs)
+        self.unique_checks = _unique_checks(self.child)
+        self.targets = []
+
+    def run_child_validation(self, data):
+        if self.instance is not None:
+            pk = _pk(self.child.Meta.model, data.get('id')) if isinstance(data, dict) else None
+            self.child.instance = self.instance.get(pk)
+            if self.child.instance is None:
+                raise serializers.ValidationError({'id': ['Object does not exist.']})
+        validated = super().run_child_validation(data)
+        self.targets.append(self.child.instance)
+        return validated
+
+    def to_internal_value(self, data):
+        self.targets = []
+        rows = super().to_internal_value(data)
+        errors = [{} for _ in rows]
+        for sources, queryset, key, message in self.unique_checks:
+            keys = {}
+            seen = set()
+            for index, (attrs, target) in enumerate(zip(rows, self.targets)):
+                values = tuple(_unique_value(attrs[source] if source in attrs else getattr(target, source, None))
+                               for source in sources)
+                if None in values:
+                    continue
+                if values in seen:
+                    # repeated inside the batch: the first row keeps the value
+                    errors[index].setdefault(key, []).append(message)
+                seen.add(values)
+                keys[index] = values
+            if not keys:
+                continue
+            lookups = {f'{source}__in': {values[position] for values in keys.values()}
+                       for position, source in enumerate(sources)}
+            taken = set(queryset.filter(**lookups).exclude(pk__in=[target.pk for target in self.targets if target])
+                        .values_list(*sources))
+            for index, values in keys.items():
+                if values in taken and message not in errors[index].get(key, []):
+                    errors[index].setdefault(key, []).append(message)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return rows
+
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        objects = [model(**attrs) for attrs in validated_data]
+        model.objects.bulk_create(objects, batch_size=self.batch_size)
+        return objects
+
+    def update(self, instance, validated_data):
+        model = self.child.Meta.model
+        fields = set()
+        has_updated_at = any(field.name == 'updated_at' for field in model._meta.fields)
+        now = timezone.now()
+        for target, attrs in zip(self.targets, validated_data):
+            for attr, value in attrs.items():
+                setattr(target, attr, value)
+            fields.update(attrs)
+            if has_updated_at:
+                target.updated_at = now
+                fields.add('updated_at')
+        if fields:
+            model.objects.bulk_update(self.targets, list(fields), batch_size=self.batch_size)
+        return self.targets
+
+
+def get_ids(request):
+    """
+    Return the `ids` list of a request body, or None unless it is a list of integers. Nothing is
+    coerced, so a string such as "12" is rejected instead of being read as the ids 1 and 2.
+    """
+    ids = request.data.get('ids', []) if isinstance(request.data, dict) else None
+    if not isinstance(ids, list) or not all(isinstance(id, int) and not isinstance(id, bool) for id in ids):
+        return None
+    return ids
+
+
+class BulkModelMixin:
+    """
+    Adds `POST`, `PUT` and `DELETE` on `<prefix>/bulk/` to a ModelViewSet, exposed as the
+    `bulk_create`, `bulk_update` and `bulk_destroy` actions.
+
+    Each call takes a JSON array, validates every row and writes all of them in one transaction with
+    bulk_create/bulk_update/update, or writes nothing and returns the per-row errors.
+    Related primary keys are resolved with one query per relation instead of one per row.
+    """
+    bulk_max_rows = 10000
+    bulk_batch_size = 500
+    # extra values forced on every row created, e.g. {'status': False}
+    bulk_create_defaults = {}
+    # extra values set next to deleted_at when soft-deleting
+    bulk_destroy_updates = {}
+
+    def _bulk_rows(self, request):
+        rows = request.data
+        if not isinstance(rows, list):
+            return None, Response({'error': 'Expected a list of objects'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(rows) > self.bulk_max_rows:
+            return None, Response({'error': f'At most {self.bulk_max_rows} rows per request'},
+                                  status=status.HTTP_400_BAD_REQUEST)
+        return rows, None
+
+    def get_bulk_serializer(self, rows, instances=None):
+        child = self.get_serializer_class()(context=self.get_serializer_context())
+        _prefetch_related_fields(child, rows)
+        return BulkListSerializer(instances, data=rows, child=child, partial=instances is not None,
+                                  batch_size=self.bulk_batch_size, context=self.get_serializer_context())
+
+    def _bulk_save(self, serializer, success_status, **kwargs):
+        if not serializer.is_valid():
+            return Response({'errors': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            with transaction.atomic():
+                serializer.save(**kwargs)
+        except IntegrityError as e:
+            # a row written concurrently since the uniqueness checks ran
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(serializer.data, status=success_status)
+
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk_create(self, request, *args, **kwargs):
+        rows, error = self._bulk_rows(request)
+        if error:
+            return error
+        return self._bulk_save(self.get_bulk_serializer(rows), status.HTTP_201_CREATED, **self.bulk_create_defaults)
+
+    @bulk_create.mapping.put
+    def bulk_update(self, request, *args, **kwargs):
+        rows, error = self._bulk_rows(request)
+        if error:
+            return error
+        model = self.get_queryset().model
+        instances = self.get_queryset().in_bulk(_pks(model, [row.get('id') for row in rows if isinstance(row, dict)]))
+        return self._bulk_save(self.get_bulk_serializer(rows, instances), status.HTTP_200_OK)
+
+    @bulk_create.mapping.delete
+    def bulk_destroy(self, request, *args, **kwargs):
+        ids = get_ids(request)
+        if ids is None:
+            return Response({'error': 'ids must be a list of integers'}, status=status.HTTP_400_BAD_REQUEST)
+        queryset = self.get_queryset()
+        with transaction.atomic():
+            deleted = list(queryset.filter(id__in=ids).values_list('id', flat=True))
+            now = timezone.now()
+            queryset.model.objects.filter(id__in=deleted).update(deleted_at=now, updated_at=now,
+                                                                 **self.bulk_destroy_updates)
+        missing = sorted(set(ids) - set(deleted))
+        return Response({'deleted': sorted(deleted), 'missing': missing}, status=status.HTTP_200_OK)
@@ -0,0 +1,21 @@
+from rest_framework.pagination import CursorPagination
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """
+    Keyset pagination over the `(created_at, id)` columns shared by the models.
+
+    The cursor encodes the last `created_at` seen (plus a small offset for rows sharing it), so
+    every page is a range scan instead of an OFFSET and deep pages cost the same as the first
+    one. Each paginated model carries a `<model>_listing_idx` index on `(created_at, id)`,
+    prefixed with `deleted_at` where the list filters out soft-deleted rows. A ViewSet can set
+    `page_size` to override the default; clients can ask for less through `?page_size=`, never more.
+    """
+    ordering = ('created_at', 'id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = getattr(view, 'page_size', self.page_size)
+        self.max_page_size = self.page_size
+        return super().paginate_queryset(queryset, request, view)
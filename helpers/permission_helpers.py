@@ -1,40 +1,162 @@
+import time
+from collections import OrderedDict
+
+from django.core.cache import cache
+from rest_framework.exceptions import APIException
+from rest_framework.permissions import BasePermission
 from rest_framework.response import Response
 from rest_framework import status
-from roles.models import Role, Permission
+from permission.models import Permission
+
+PERMISSIONS_VERSION_KEY = 'permissions:version'
+PERMISSIONS_CACHE_TIMEOUT = 60 * 60
+LOCAL_PERMISSIONS_MAX_SIZE = 1024
+
+# user id -> ((version, user version), frozenset of permission names), local to this process,
+# least recently used first
+_local_permissions = OrderedDict()
 
 
 def check_auth(request) -> bool:
     return request.user.is_authenticated
 
 
+def get_permissions_version() -> int:
+    version = cache.get(PERMISSIONS_VERSION_KEY)
+    if version is None:
+        # seed with a timestamp so a lost key never brings back an older stamp
+        cache.add(PERMISSIONS_VERSION_KEY, int(time.time() * 1000), None)
+        version = cache.get(PERMISSIONS_VERSION_KEY)
+    return version
+
+
+def bump_permissions_version() -> None:
+    try:
+        cache.incr(PERMISSIONS_VERSION_KEY)
+    except ValueError:
+        cache.set(PERMISSIONS_VERSION_KEY, int(time.time() * 1000), None)
+    _local_permissions.clear()
+
+
+def _user_version_key(user_id) -> str:
+    return f'permissions:user-version:{user_id}'
+
+
+def _user_permissions_key(user_id, versions) -> str:
+    return f'permissions:user:{user_id}:{versions[0]}:{versions[1]}'
+
+
+def _get_versions(user_id) -> tuple:
+    # the global and the per-user stamp, read in one round trip to the shared cache
+    user_key = _user_version_key(user_id)
+    stamps = cache.get_many([PERMISSIONS_VERSION_KEY, user_key])
+    if PERMISSIONS_VERSION_KEY not in stamps:
+        stamps[PERMISSIONS_VERSION_KEY] = get_permissions_version()
+    if user_key not in stamps:
+        # a timestamp, like the global stamp, so an evicted key never brings back an older stamp
+        cache.add(user_key, int(time.time() * 1000), None)
+        stamps[user_key] = cache.get(user_key)
+    return stamps[PERMISSIONS_VERSION_KEY], stamps[user_key]
+
+
+def get_user_permissions_version(user_id) -> list:
+    # the stamp a signed access token is issued under; it changes whenever the user's permissions may have
+    return list(_get_versions(user_id))
+
+
+def invalidate_user_permissions(user_id) -> None:
+    # bumping the shared per-user stamp invalidates the copies held by every process
+    try:
+        cache.incr(_user_version_key(user_id))
+    except ValueError:
+        cache.set(_user_version_key(user_id), int(time.time() * 1000), None)
+    _local_permissions.pop(user_id, None)
+
+
+def get_user_permissions(user) -> frozenset:
+    """
+    Return the names of every active permission granted to the user through its active roles.
+
+    The set is compiled with a single joined query and cached both in process memory and in the
+    shared cache, keyed by user id, the global role/permission version stamp and the user's own
+    stamp. Both stamps are checked against the shared cache on every call, so an invalidation
+    made by any process is seen by all of them.
+    """
+    if not user or not user.is_authenticated:
+        return frozenset()
+    versions = _get_versions(user.pk)
+    local = _local_permissions.get(user.pk)
+    if local is not None and local[0] == versions:
+        _local_permissions.move_to_end(user.pk)
+        return local[1]
+
+    key = _user_permissions_key(user.pk, versions)
+    names = cache.get(key)
+    if names is None:
+        names = frozenset(
+            Permission.objects.filter(
+                active=True,
+                role__active=True,
+                role__deleted_at__isnull=True,
+                role__client=user.pk,
+            ).values_list('name', flat=True).distinct()
+        )
+        cache.set(key, names, PERMISSIONS_CACHE_TIMEOUT)
+    _local_permissions[user.pk] = (versions, names)
+    _local_permissions.move_to_end(user.pk)
+    while len(_local_permissions) > LOCAL_PERMISSIONS_MAX_SIZE:
+        _local_permissions.popitem(last=False)
+    return names
+
+
+def get_request_permissions(request) -> frozenset:
+    # resolved once per request and shared by every check made while serving it
+    try:
+        return request._permission_names
+    except AttributeError:
+        request._permission_names = get_user_permissions(request.user)
+        return request._permission_names
+
+
 def check_permissions(request, permissions, option='AND') -> bool:
-    # check if the user exists have the role:
     if not check_auth(request):
         return False
-    roles = request.user.roles.all()
-
-    roles_list = list(roles)
-
-    if not roles_list:
+    user_permissions = get_request_permissions(request)
+    if not user_permissions:
         return False
 
     if not isinstance(permissions, list):
         permissions = [permissions]
     if option == 'AND':
-        for permission in permissions:
-            # check if any of the roles have the permission:
-            for role in roles:
-                if not role.permissions.filter(name=permission).exists():
-                    return False
-            return True
+        return all(permission in user_permissions for permission in permissions)
     elif option == 'OR':
-        for permission in permissions:
-            # check if any of the roles have the permission:
-            for role in roles:
-                if role.permissions.filter(name=permission).exists():
-                    return True
-        return False
+        return any(permission in user_permissions for permission in permissions)
+    return False
 
 
 def unauthorized() -> Response:
-    return Response({'message': 'Unauthorized to do this action'}, status=status.HTTP_401_UNAUTHORIZED)
\ No newline at end of file
+    return Response({'message': 'Unauthorized to do this action'}, status=status.HTTP_401_UNAUTHORIZED)
+
+
+class Unauthorized(APIException):
+    status_code = status.HTTP_401_UNAUTHORIZED
+    default_detail = {'message': 'Unauthorized to do this action'}
+    default_code = 'unauthorized'
+
+
+class ActionPermission(BasePermission):
+    """
+    Checks the view's `action_permissions` map before the handler runs.
+
+    Each entry maps a ViewSet action to a permission name, a list of names that are all required,
+    or a `(names, option)` tuple forwarded to `check_permissions`. Actions missing from the map are open.
+    """
+
+    def has_permission(self, request, view):
+        required = getattr(view, 'action_permissions', {}).get(view.action)
+        if required is None:
+            return True
+        permissions, option = required if isinstance(required, tuple) else (required, 'AND')
+        if not check_permissions(request, permissions, option):
+            raise Unauthorized()
+        return True
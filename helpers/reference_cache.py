@@ -0,0 +1,100 @@
+import time
+
+from django.apps import apps
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.utils.http import http_date, parse_http_date_safe
+from django.utils.module_loading import import_string
+from rest_framework import status
+from rest_framework.response import Response
+
+REFERENCE_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+class ReferenceCache:
+    """
+    Whole-table cache for small, read-mostly models (currencies, categories, global variables).
+
+    The table and its serialized rows are loaded with one query and kept in process memory, with
+    the shared cache as fallback for other workers. Every save/delete of the model bumps a version
+    stamp in the shared cache; the stamp is a millisecond timestamp, so it also serves as the
+    Last-Modified date of the data.
+    """
+
+    def __init__(self, model, serializer_class, key_field='pk'):
+        self.model_label = model
+        self.serializer_path = serializer_class
+        self.key_field = key_field
+        self.version_key = f'reference:{model.lower()}:version'
+        self._local = None
+        post_save.connect(self.invalidate, sender=model, weak=False)
+        post_delete.connect(self.invalidate, sender=model, weak=False)
+
+    @property
+    def model(self):
+        return apps.get_model(self.model_label)
+
+    @property
+    def version(self) -> int:
+        version = cache.get(self.version_key)
+        if version is None:
+            cache.add(self.version_key, int(time.time() * 1000), None)
+            version = cache.get(self.version_key)
+        return version
+
+    def invalidate(self, **kwargs) -> None:
+        now = int(time.time() * 1000)
+        cache.set(self.version_key, max(now, (cache.get(self.version_key) or 0) + 1), None)
+        self._local = None
+
+    def _payload(self) -> dict:
+        version = self.version
+        if self._local is not None and self._local[0] == version:
+            return self._local[1]
+        key = f'{self.version_key}:{version}'
+        payload = cache.get(key)
+        if payload is None:
+            serializer_class = import_string(self.serializer_path)
+            objects = list(self.model._default_manager.all())
+            payload = {
+                'objects': {getattr(obj, self.key_field): obj for obj in objects},
+                'data': {getattr(obj, self.key_field): serializer_class(obj).data for obj in objects},
+                'active': [getattr(obj, self.key_field) for obj in objects if getattr(obj, 'deleted_at', None) is None],
+            }
+            cache.set(key, payload, REFERENCE_CACHE_TIMEOUT)
+        self._local = (version, payload)
+        return payload
+
+    def get(self, key):
+        return self._payload()['objects'].get(self._coerce(key))
+
+    def serialized(self, key):
+        return self._payload()['data'].get(self._coerce(key))
+
+    def serialized_list(self) -> list:
+        payload = self._payload()
+        return [payload['data'][key] for key in payload['active']]
+
+    def _coerce(self, key):
+        if self.key_field == 'pk' and isinstance(key, str) and key.isdigit():
+            return int(key)
+        return key
+
+    def conditional_response(self, request, data_callable) -> Response:
+        """
+        Answer 304 when the client's ETag or Last-Modified is still current, otherwise
+        return `data_callable()` with both validators attached.
+        """
+        version = self.version
+        etag = f'"{self.model_label.lower()}-{version}"'
+        last_modified = version // 1000
+        if_none_match = request.headers.get('If-None-Match')
+        if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+        if (if_none_match and etag in [tag.strip() for tag in if_none_match.split(',')]) or \
+                (not if_none_match and if_modified_since and if_modified_since >= last_modified):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(data_callable(), status=status.HTTP_200_OK)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        return response
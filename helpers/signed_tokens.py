@@ -0,0 +1,105 @@
+import uuid
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+from rest_framework.exceptions import AuthenticationFailed
+
+from helpers.authentication import get_cached_user
+from helpers.permission_helpers import get_user_permissions_version
+
+ACCESS_SALT = 'ecommerce_api.access'
+REFRESH_SALT = 'ecommerce_api.refresh'
+
+
+def _access_lifetime() -> int:
+    return settings.SIGNED_ACCESS_TOKEN_LIFETIME
+
+
+def _refresh_lifetime() -> int:
+    return settings.SIGNED_REFRESH_TOKEN_LIFETIME
+
+
+def _revoked_key(jti) -> str:
+    return f'auth:revoked:{jti}'
+
+
+def issue_tokens(user) -> dict:
+    """
+    Sign a short-lived access token and a refresh token for the user with SECRET_KEY.
+
+    The access token carries the user id and the role/permission version it was issued under;
+    it stops authenticating as soon as that version changes.
+    """
+    access = signing.dumps({'uid': user.pk, 'pv': get_user_permissions_version(user.pk)}, salt=ACCESS_SALT,
+                           compress=True)
+    refresh = signing.dumps({'uid': user.pk, 'jti': uuid.uuid4().hex}, salt=REFRESH_SALT, compress=True)
+    return {'access': access, 'refresh': refresh, 'expires_in': _access_lifetime()}
+
+
+def _load_refresh(refresh) -> dict:
+    try:
+        return signing.loads(refresh, salt=REFRESH_SALT, max_age=_refresh_lifetime())
+    except signing.BadSignature:
+        raise AuthenticationFailed(_('Invalid or expired refresh token.'))
+
+
+def _revoke(payload) -> bool:
+    # cache.add is atomic, so a refresh token can only be spent once
+    return cache.add(_revoked_key(payload['jti']), True, _refresh_lifetime())
+
+
+def load_refresh_token(refresh, user) -> dict:
+    payload = _load_refresh(refresh)
+    if payload['uid'] != user.pk:
+        raise AuthenticationFailed(_('Refresh token was issued to another user.'))
+    return payload
+
+
+def revoke_refresh_token(payload) -> bool:
+    # `payload` comes from load_refresh_token
+    return _revoke(payload)
+
+
+def rotate_refresh_token(refresh) -> dict:
+    payload = _load_refresh(refresh)
+    if not _revoke(payload):
+        raise AuthenticationFailed(_('Refresh token has been revoked.'))
+    user = get_cached_user(payload['uid'])
+    if user is None or not user.is_active or user.deleted_at is not None:
+        raise AuthenticationFailed(_('User inactive or deleted.'))
+    return issue_tokens(user)
+
+
+class SignedTokenAuthentication(BaseAuthentication):
+    """
+    Authenticates `Authorization: Bearer <access token>` without touching the token table.
+
+    The signature and age are checked in memory and the user comes from the shared user cache.
+    A token issued before the user's roles or permissions last changed is rejected, so the
+    client refreshes it. `request.auth` is the decoded payload.
+    """
+    keyword = 'Bearer'
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise AuthenticationFailed(_('Invalid bearer header.'))
+        try:
+            payload = signing.loads(auth[1].decode(), salt=ACCESS_SALT, max_age=_access_lifetime())
+        except (signing.BadSignature, UnicodeError):
+            raise AuthenticationFailed(_('Invalid or expired access token.'))
+
+        user = get_cached_user(payload['uid'])
+        if user is None or not user.is_active or user.deleted_at is not None:
+            raise AuthenticationFailed(_('User inactive or deleted.'))
+        if payload.get('pv') != get_user_permissions_version(user.pk):
+            raise AuthenticationFailed(_('Permissions changed, refresh the access token.'))
+        return user, payload
+
+    def authenticate_header(self, request):
+        return self.keyword
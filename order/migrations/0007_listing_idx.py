@@ -0,0 +1,20 @@
+# Generated by Django 5.0.4 on 2026-10-18 20:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('currency', '0002_rename_active_currency_status'),
+        ('order', '0006_alter_order_currency'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['deleted_at', 'created_at', 'id'], name='order_listing_idx'),
+        ),
+    ]
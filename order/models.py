@@ -26,6 +26,11 @@ class Order(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     deleted_at = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['deleted_at', 'created_at', 'id'], name='order_listing_idx'),
+        ]
+
     def delete(self, *args, **kwargs):
         self.deleted_at = timezone.now()
         self.status = 'DELETED'
@@ -1,6 +1,8 @@
 from rest_framework import serializers
 
+from currency.serializer import CurrencySerializer
 from orderItem.models import OrderItem
+from user.serializer import ClientSerializer
 from .models import Order
 
 
@@ -14,3 +16,20 @@ class OrderItemSerializer(serializers.ModelSerializer):
     class Meta:
         model = OrderItem
         fields = '__all__'
+
+
+class OrderDetailSerializer(serializers.Serializer):
+    """
+    Renders an order as `{order, client, currency, items}`.
+
+    Expects the client, its roles, the currency and the items to be loaded up front
+    with select_related/prefetch_related, so serializing a page never queries per order.
+    """
+
+    def to_representation(self, instance):
+        return {
+            'order': OrderSerializer(instance).data,
+            'client': ClientSerializer(instance.client).data,
+            'currency': CurrencySerializer(instance.currency).data if instance.currency else None,
+            'items': OrderItemSerializer(instance.items.all(), many=True).data,
+        }
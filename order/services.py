@@ -0,0 +1,64 @@
+from django.db import transaction
+from django.db.models import DecimalField, F, Sum
+
+from cartItem.models import CartItem
+from currency.cache import currencies
+from orderItem.models import OrderItem
+from stock.services import InsufficientStock, reserve_stock
+from .models import Order
+
+
+class CheckoutError(Exception):
+    def __init__(self, message):
+        super().__init__(message)
+        self.message = message
+
+
+def create_order_from_cart(client, cart_id=None, currency_id=None, shipping_address=''):
+    """
+    Turn a cart into an order in a fixed number of queries.
+
+    Everything is checked before the first write, then the order and all of its items are
+    inserted and the stock of tracked products reserved in one transaction, so a failed
+    checkout never leaves a partial order or reservation behind.
+    Without an explicit currency the order takes the currency of the cart's products.
+    """
+    items = CartItem.objects.select_related('product__currency')
+    if cart_id is not None:
+        items = items.filter(cart_id=cart_id)
+    else:
+        items = items.filter(cart__client=client)
+    items = list(items)
+    if not items:
+        raise CheckoutError('No items in the cart')
+
+    if currency_id is not None:
+        currency = currencies.get(currency_id)
+        if currency is None:
+            raise CheckoutError('Currency does not exist')
+    else:
+        currency = items[0].product.currency
+
+    for item in items:
+        if currency is None or item.product.currency is None or item.product.currency.code != currency.code:
+            raise CheckoutError('Currency mismatch')
+
+    quantities = {}
+    for item in items:
+        quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
+
+    try:
+        with transaction.atomic():
+            order = Order.objects.create(client=client, currency=currency, shipping_address=shipping_address)
+            OrderItem.objects.bulk_create(
+                OrderItem(order=order, product_id=item.product_id, quantity=item.quantity) for item in items
+            )
+            reserve_stock(order, quantities)
+            total = OrderItem.objects.filter(order=order).aggregate(
+                total=Sum(F('quantity') * F('product__price'), output_field=DecimalField(max_digits=10, decimal_places=2))
+            )['total']
+            order.total_price = total or 0
+            Order.objects.filter(pk=order.pk).update(total_price=order.total_price)
+    except InsufficientStock as e:
+        raise CheckoutError(f'Insufficient stock for product {e.product_id}')
+    return order
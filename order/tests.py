@@ -1,3 +1,5 @@
+import json
+from decimal import Decimal
 from unittest.mock import patch
 
 from django.test import TestCase
@@ -46,7 +48,7 @@ class OrderViewSetTestCase(TestCase):
             'currency': self.currency.id
         }
 
-    @patch('order.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_create_order(self, mock_check_permissions):
         self.api_client.force_authenticate(user=self.user)
         self.cart.save()
@@ -57,7 +59,7 @@ class OrderViewSetTestCase(TestCase):
         self.assertFalse(new_cart['order']['total_price'] == 0)
         mock_check_permissions.assert_called()
 
-    @patch('order.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_create_order_no_items(self, mock_check_permissions):
         self.api_client.force_authenticate(user=self.user)
         CartItem.objects.filter(cart=self.cart).delete()
@@ -67,7 +69,7 @@ class OrderViewSetTestCase(TestCase):
         self.assertTrue(response.data['message'] == 'No items in the cart')
         mock_check_permissions.assert_called()
 
-    @patch('order.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_create_order_currency_mismatch(self, mock_check_permissions):
         self.api_client.force_authenticate(user=self.user)
         self.currency2 = Currency.objects.create(code='USD', name='US Dollar', symbol='$')
@@ -81,9 +83,23 @@ class OrderViewSetTestCase(TestCase):
         response = self.api_client.post(self.url, self.data, format='json')
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertTrue(response.data['message'] == 'Currency mismatch')
+        self.assertFalse(Order.objects.exists())
+        self.assertFalse(OrderItem.objects.exists())
         mock_check_permissions.assert_called()
 
-    @patch('order.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
+    def test_create_order_totals_and_items(self, mock_check_permissions):
+        self.api_client.force_authenticate(user=self.user)
+        response = self.api_client.post(self.url, self.data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        order = Order.objects.get(id=response.data['order']['id'])
+        self.assertEqual(order.total_price, Decimal('5855.94'))
+        self.assertEqual(order.currency, self.currency)
+        self.assertEqual(order.shipping_address, 'Test Address')
+        self.assertEqual(len(response.data['items']), 3)
+        self.assertEqual(response.data['currency']['code'], 'MAD')
+
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_update_order_price(self, mock_check_permissions):
         self.api_client.force_authenticate(user=self.user)
         order = Order.objects.create(client=self.user)
@@ -97,7 +113,7 @@ class OrderViewSetTestCase(TestCase):
         self.assertFalse(updated_data['total_price'] == 2000.00)
         mock_check_permissions.assert_called()
 
-    @patch('order.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_update_order_currency(self, mock_check_permissions):
         self.api_client.force_authenticate(user=self.user)
         order = Order.objects.create(client=self.user)
@@ -111,7 +127,7 @@ class OrderViewSetTestCase(TestCase):
         self.assertFalse(updated_data['currency'] == self.currency.id)
         mock_check_permissions.assert_called()
 
-    @patch('order.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_update_order(self, mock_check_permissions):
         self.api_client.force_authenticate(user=self.user)
         order = Order.objects.create(client=self.user)
@@ -125,7 +141,7 @@ class OrderViewSetTestCase(TestCase):
         self.assertEqual(updated_data['shipping_address'], 'Test Address')
         mock_check_permissions.assert_called()
 
-    @patch('order.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_delete_order(self, mock_check_permissions):
         self.api_client.force_authenticate(user=self.user)
         order = Order.objects.create(client=self.user)
@@ -143,7 +159,7 @@ class OrderViewSetTestCase(TestCase):
         self.assertTrue(len(order.items.all()) == 0)
         mock_check_permissions.assert_called()
 
-    @patch('order.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_list_order(self, mock_check_permissions):
         self.api_client.force_authenticate(user=self.user)
         order = Order.objects.create(client=self.user)
@@ -156,10 +172,10 @@ class OrderViewSetTestCase(TestCase):
         order.save()
         response = self.api_client.get(self.url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
         mock_check_permissions.assert_called()
 
-    @patch('order.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_list_order_self(self, mock_check_permissions):
         self.api_client.force_authenticate(user=self.user)
         order = Order.objects.create(client=self.user)
@@ -172,10 +188,10 @@ class OrderViewSetTestCase(TestCase):
         order.save()
         response = self.api_client.get(self.url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
         mock_check_permissions.assert_called()
 
-    @patch('order.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_retrieve_order(self, mock_check_permissions):
         self.api_client.force_authenticate(user=self.user)
         order = Order.objects.create(client=self.user)
@@ -190,4 +206,40 @@ class OrderViewSetTestCase(TestCase):
         response = self.api_client.get(retrieve_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['id'], order.id)
-        mock_check_permissions.assert_called()
\ No newline at end of file
+        mock_check_permissions.assert_called()
+
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
+    def test_list_order_constant_queries(self, mock_check_permissions):
+        self.api_client.force_authenticate(user=self.user)
+        for _ in range(5):
+            order = Order.objects.create(client=self.user, currency=self.currency)
+            OrderItem.objects.create(order=order, product=self.product1, quantity=4)
+            OrderItem.objects.create(order=order, product=self.product2, quantity=2)
+        Order.objects.create(client=self.user, currency=self.currency).delete()
+
+        with self.assertNumQueries(3):
+            response = self.api_client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 5)
+        self.assertEqual(response.data['results'][0]['client']['id'], self.user.id)
+        self.assertEqual(response.data['results'][0]['currency']['code'], 'MAD')
+        self.assertEqual(len(response.data['results'][0]['items']), 2)
+
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
+    def test_export_orders_ndjson(self, mock_check_permissions):
+        self.api_client.force_authenticate(user=self.user)
+        first = Order.objects.create(client=self.user, currency=self.currency, total_price=Decimal('10.50'))
+        second = Order.objects.create(client=self.user, currency=self.currency)
+        Order.objects.create(client=self.user, currency=self.currency).delete()
+
+        response = self.api_client.get(reverse('order-export'), {'type': 'ndjson'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([row['id'] for row in rows], [first.id, second.id])
+        self.assertEqual(rows[0]['total_price'], '10.50')
+        self.assertEqual(rows[0]['currency__code'], 'MAD')
+
+        response = self.api_client.get(reverse('order-export'), {'type': 'xml'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -1,66 +1,66 @@
 from rest_framework import viewsets, status
 from rest_framework.response import Response
 
-from currency.models import Currency
-from currency.serializer import CurrencySerializer
-from helpers.permission_helpers import unauthorized, check_permissions, check_auth
+from cart.storage import merge_session_cart
+from cartItem.services import CartError
+from helpers.export import ExportMixin
+from helpers.permission_helpers import ActionPermission
 from user.models import Client
-from cart.models import Cart
-from user.serializer import ClientSerializer
 from .models import Order
-from orderItem.models import OrderItem
-from .serializer import OrderSerializer, OrderItemSerializer
+from .serializer import OrderSerializer, OrderDetailSerializer
+from .services import CheckoutError, create_order_from_cart
 
 
-class OrderViewSet(viewsets.ModelViewSet):
+class OrderViewSet(ExportMixin, viewsets.ModelViewSet):
     queryset = Order.objects.filter(deleted_at__isnull=True)
     serializer_class = OrderSerializer
+    permission_classes = [ActionPermission]
+    # each row carries its client and items
+    page_size = 20
+    export_fields = ['id', 'client_id', 'client__email', 'status', 'total_price', 'currency__code', 'shipping_address',
+                     'created_at', 'updated_at']
+    action_permissions = {
+        'create': 'can_create_order',
+        'update': 'can_update_order',
+        'partial_update': 'can_update_order',
+        'destroy': 'can_delete_order',
+        'list': 'can_view_order_list',
+        'export': 'can_view_order_list',
+        'list_self': 'can_view_order_list_self',
+        'retrieve': 'can_view_order',
+        'retrieve_self': 'can_view_order_self',
+    }
 
-    def create(self, request, *args, **kwargs):
-        if not check_permissions(request, 'can_create_order'):
-            return unauthorized()
-        total = 0
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ('list', 'create'):
+            queryset = queryset.select_related('client', 'currency').prefetch_related('client__roles', 'items')
+        return queryset
 
-        client = Client.objects.get(id=request.user.id)
-        order = Order.objects.create(client=client)
-        if 'shipping_address' in request.data:
-            order.shipping_address = request.data['shipping_address']
-        if 'currency' in request.data:
-            currency = Currency.objects.get(id=request.data['currency'])
-            order.currency = currency
-        if 'cart' in request.data:
-            cart = Cart.objects.get(id=request.data['cart'])
-        else:
-            cart = Cart.objects.get(client=Client.objects.get(id=request.user.id))
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return OrderDetailSerializer
+        return super().get_serializer_class()
 
-        cart_items = cart.items.all()
-        if not cart_items:
-            return Response({'message': 'No items in the cart'}, status=status.HTTP_400_BAD_REQUEST)
-        for item in cart_items:
+    def create(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
             try:
-                OrderItem.objects.create(order=order, product=item.product, quantity=item.quantity)
-                if item.product.currency.code != order.currency.code:
-                    return Response({'message': 'Currency mismatch'}, status=status.HTTP_400_BAD_REQUEST)
-                total += item.product.price * item.quantity
-            except Exception as e:
-                return Response({'message': 'Error while creating Order Items', 'error': str(e)},
-                                status=status.HTTP_400_BAD_REQUEST)
-        order.total_price = total
-        order.save()
-        client = Client.objects.get(id=order.client.id)
-        currency = Currency.objects.get(id=order.currency.id)
-        order_items = OrderItem.objects.filter(order=order)
-        data = {
-            'order': OrderSerializer(order).data,
-            'client': ClientSerializer(client).data,
-            'currency': CurrencySerializer(currency).data,
-            'items': OrderItemSerializer(order_items, many=True).data
-        }
-        return Response(data=data, status=status.HTTP_201_CREATED)
+                merge_session_cart(request, request.user)
+            except CartError as e:
+                return Response({'message': e.message}, status=status.HTTP_409_CONFLICT)
+        try:
+            order = create_order_from_cart(
+                request.user,
+                cart_id=request.data.get('cart'),
+                currency_id=request.data.get('currency'),
+                shipping_address=request.data.get('shipping_address', ''),
+            )
+        except CheckoutError as e:
+            return Response({'message': e.message}, status=status.HTTP_400_BAD_REQUEST)
+        order = self.get_queryset().get(pk=order.pk)
+        return Response(data=OrderDetailSerializer(order).data, status=status.HTTP_201_CREATED)
 
     def update(self, request, *args, **kwargs):
-        if not check_permissions(request, 'can_update_order'):
-            return unauthorized()
         instance = self.get_object()
         serializer = self.get_serializer(instance, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
@@ -73,44 +73,15 @@ class OrderViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
     def destroy(self, request, *args, **kwargs):
-        if not check_permissions(request, 'can_delete_order'):
-            return unauthorized()
         order = self.get_object()
         order.delete()
         order.items.all().delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
-    def list(self, request, *args, **kwargs):
-        if not check_permissions(request, 'can_view_order_list'):
-            return unauthorized()
-
-        data = []
-        orders = Order.objects.all()
-        for order in orders:
-            client = Client.objects.get(id=order.client.id)
-            currency = Currency.objects.get(id=order.currency.id)
-            order_items = OrderItem.objects.filter(order=order)
-            data.append({
-                'order': OrderSerializer(order).data,
-                'client': ClientSerializer(client).data,
-                'currency': CurrencySerializer(currency).data,
-                'items': OrderItemSerializer(order_items, many=True).data
-            })
-        return Response(data, status=status.HTTP_200_OK)
-
     def list_self(self, request, *args, **kwargs):
-        if not check_permissions(request, 'can_view_order_list_self'):
-            return unauthorized()
         orders = Order.objects.filter(client=Client.objects.get(user=request.user))
         return Response(OrderSerializer(orders, many=True).data, status=status.HTTP_200_OK)
 
-    def retrieve(self, request, *args, **kwargs):
-        if not check_permissions(request, 'can_view_order'):
-            return unauthorized()
-        return super().retrieve(request, *args, **kwargs)
-
     def retrieve_self(self, request, *args, **kwargs):
-        if not check_permissions(request, 'can_view_order_self'):
-            return unauthorized()
         order = Order.objects.get(id=kwargs['pk'], client=Client.objects.get(user=request.user))
         return Response(OrderSerializer(order).data, status=status.HTTP_200_OK)
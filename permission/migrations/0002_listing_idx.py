@@ -0,0 +1,17 @@
+# Generated by Django 5.0.4 on 2026-10-18 20:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('permission', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='permission',
+            index=models.Index(fields=['created_at', 'id'], name='permission_listing_idx'),
+        ),
+    ]
@@ -16,7 +16,7 @@ class PermissionViewSetTestCase(TestCase):
             'name': 'TestPermission',
         }
 
-    @patch('permission.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_create_permission(self, mock_check_permissions):
         response = self.api_client.post(self.url, self.data, format='json')
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
@@ -24,7 +24,7 @@ class PermissionViewSetTestCase(TestCase):
         self.assertEqual(new_permission['name'], 'TestPermission')
         mock_check_permissions.assert_called()
 
-    @patch('permission.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_update_permission(self, mock_check_permissions):
         existing_permission = Permission.objects.create(name='New Permission')
         update_url = reverse('permissions-detail', args=[existing_permission.id])
@@ -37,7 +37,7 @@ class PermissionViewSetTestCase(TestCase):
         self.assertEqual(updated_data['name'], 'TestPermissionUpdated')
         mock_check_permissions.assert_called()
 
-    @patch('permission.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_delete_permission(self, mock_check_permissions):
         existing_permission = Permission.objects.create(name='New Permission')
         delete_url = reverse('permissions-detail', args=[existing_permission.id])
@@ -46,17 +46,17 @@ class PermissionViewSetTestCase(TestCase):
         self.assertFalse(Permission.objects.filter(name='New Permission').exists())
         mock_check_permissions.assert_called()
 
-    @patch('permission.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_list_permission(self, mock_check_permissions):
         Permission.objects.create(name='Demo Permission 1')
         Permission.objects.create(name='Demo Permission 2')
 
         response = self.api_client.get(self.url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data['results']), 2)
         mock_check_permissions.assert_called()
 
-    @patch('permission.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_retrieve_permission(self, mock_check_permissions):
         existing_permission = Permission.objects.create(name='New Permission')
         retrieve_url = reverse('permissions-detail', args=[existing_permission.id])
@@ -1,7 +1,7 @@
 from rest_framework import viewsets, status
 from rest_framework.response import Response
 
-from helpers.permission_helpers import unauthorized, check_permissions, check_auth
+from helpers.permission_helpers import ActionPermission
 from permission.models import Permission
 from permission.serializer import PermissionSerializer
 
@@ -9,11 +9,17 @@ from permission.serializer import PermissionSerializer
 class PermissionViewSet(viewsets.ModelViewSet):
     queryset = Permission.objects.all()
     serializer_class = PermissionSerializer
+    permission_classes = [ActionPermission]
+    action_permissions = {
+        'create': 'can_create_permission',
+        'update': 'can_update_permission',
+        'partial_update': 'can_update_permission',
+        'destroy': 'can_delete_permission',
+        'list': 'can_view_permission_list',
+        'retrieve': 'can_view_permission',
+    }
 
     def create(self, request, *args, **kwargs):
-        if not check_permissions(request, 'can_create_permission'):
-            return unauthorized()
-
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         self.perform_create(serializer)
@@ -21,25 +27,8 @@ class PermissionViewSet(viewsets.ModelViewSet):
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
     def update(self, request, *args, **kwargs):
-        if not check_permissions(request, 'can_update_permission'):
-            return unauthorized()
         instance = self.get_object()
         serializer = self.get_serializer(instance, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
         self.perform_update(serializer)
         return Response(serializer.data, status=status.HTTP_200_OK)
-
-    def destroy(self, request, *args, **kwargs):
-        if not check_permissions(request, 'can_delete_permission'):
-            return unauthorized()
-        return super().destroy(request, *args, **kwargs)
-
-    def list(self, request, *args, **kwargs):
-        if not check_permissions(request, 'can_view_permission_list'):
-            return unauthorized()
-        return super().list(request, *args, **kwargs)
-
-    def retrieve(self, request, *args, **kwargs):
-        if not check_permissions(request, 'can_view_permission'):
-            return unauthorized()
-        return super().retrieve(request, *args, **kwargs)
\ No newline at end of file
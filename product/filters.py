@@ -0,0 +1,69 @@
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Q, Subquery
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from category.models import Category
+
+
+def _decimal_param(params, name):
+    value = params.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        value = Decimal(value)
+    except InvalidOperation:
+        raise ValidationError({name: 'A valid number is required.'})
+    if not value.is_finite():
+        # NaN and Infinity parse but cannot be compared with a price
+        raise ValidationError({name: 'A valid number is required.'})
+    return value
+
+
+class ProductFilterBackend(BaseFilterBackend):
+    """
+    Filters products from the query string:
+
+    - `category`: a category id, matching that category and all of its sub categories
+    - `min_price` / `max_price`: inclusive price range
+    - `currency`: a currency id or ISO code
+    - `status`: `true` or `false`
+    - `search`: case-insensitive match on name or description
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+
+        category = params.get('category')
+        if category:
+            if not category.isdigit():
+                raise ValidationError({'category': 'A valid category id is required.'})
+            path = Category.objects.filter(id=int(category)).values('path')
+            queryset = queryset.filter(category__path__startswith=Subquery(path), category__deleted_at__isnull=True)
+
+        min_price = _decimal_param(params, 'min_price')
+        if min_price is not None:
+            queryset = queryset.filter(price__gte=min_price)
+        max_price = _decimal_param(params, 'max_price')
+        if max_price is not None:
+            queryset = queryset.filter(price__lte=max_price)
+
+        currency = params.get('currency')
+        if currency:
+            if currency.isdigit():
+                queryset = queryset.filter(currency_id=int(currency))
+            else:
+                queryset = queryset.filter(currency__code__iexact=currency)
+
+        product_status = params.get('status')
+        if product_status:
+            if product_status.lower() not in ('true', 'false'):
+                raise ValidationError({'status': 'Must be true or false.'})
+            queryset = queryset.filter(status=product_status.lower() == 'true')
+
+        search = params.get('search')
+        if search:
+            queryset = queryset.filter(Q(name__icontains=search) | Q(description__icontains=search))
+
+        return queryset
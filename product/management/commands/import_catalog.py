@@ -0,0 +1,213 @@
+import csv
+import json
+import sys
+import time
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from category.models import Category
+from characteristic.models import Characteristic
+from currency.models import Currency
+from product.models import Product
+
+CHARACTERISTIC_PREFIX = 'char:'
+PRODUCT_UPDATE_FIELDS = ['name', 'description', 'price', 'category', 'currency', 'updated_at']
+CHARACTERISTIC_UPDATE_FIELDS = ['value', 'status', 'updated_at']
+
+
+class RowError(Exception):
+    pass
+
+
+def read_csv(stream):
+    """
+    Yield `(line, row)` for a CSV file with the columns sku, name, description, price, category,
+    currency and one `char:<key>` column per characteristic.
+    """
+    reader = csv.DictReader(stream)
+    for row in reader:
+        characteristics = {}
+        for column in list(row):
+            if column and column.startswith(CHARACTERISTIC_PREFIX):
+                value = row.pop(column)
+                if value:
+                    characteristics[column[len(CHARACTERISTIC_PREFIX):]] = value
+        row['characteristics'] = characteristics
+        yield reader.line_num, row
+
+
+def read_jsonl(stream):
+    """
+    Yield `(line, row)` for a JSON-lines file with one product object per line and its
+    characteristics as `{"key": "value"}`. A line that does not parse is yielded as a RowError.
+    """
+    for line, text in enumerate(stream, start=1):
+        if not text.strip():
+            continue
+        try:
+            row = json.loads(text)
+        except ValueError as e:
+            yield line, RowError(f'Invalid JSON: {e}')
+            continue
+        yield line, row if isinstance(row, dict) else RowError('Expected a JSON object')
+
+
+class Command(BaseCommand):
+    help = ('Import products and their characteristics from a CSV or JSON-lines file, upserting by sku. '
+            'Rows for soft-deleted products are rejected unless --restore-deleted is given.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import, or - for stdin')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Defaults to the file extension')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--restore-deleted', action='store_true',
+                            help='Bring back soft-deleted products whose sku is in the file')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or ('csv' if path.lower().endswith('.csv') else 'jsonl')
+        batch_size = options['batch_size']
+        self.restore_deleted = options['restore_deleted']
+        if batch_size < 1:
+            raise CommandError('--batch-size must be positive')
+
+        # natural key -> id for every live category and currency, loaded once
+        self.categories = {}
+        for category_id, name in Category.objects.filter(deleted_at__isnull=True).values_list('id', 'name'):
+            # a name shared by several categories is ambiguous and resolves to nothing
+            self.categories[name.lower()] = None if name.lower() in self.categories else category_id
+        self.currencies = {
+            code.upper(): currency_id
+            for currency_id, code in Currency.objects.filter(deleted_at__isnull=True).values_list('id', 'code')
+        }
+
+        self.started = time.monotonic()
+        self.rows = self.products = self.characteristics = self.errors = 0
+        try:
+            stream = sys.stdin if path == '-' else open(path, encoding='utf-8-sig', newline='')
+        except OSError as e:
+            raise CommandError(e)
+        try:
+            reader = read_csv(stream) if file_format == 'csv' else read_jsonl(stream)
+            while batch := list(islice(reader, batch_size)):
+                self.write_batch(batch)
+                self.report()
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {self.rows - self.errors} of {self.rows} rows: {self.products} products, '
+            f'{self.characteristics} characteristics, {self.errors} errors in {time.monotonic() - self.started:.1f}s'
+        ))
+
+    def clean(self, row):
+        """
+        Turn a row into an unsaved Product and its characteristics, validated against the model
+        fields and the lookup tables without touching the database.
+        """
+        if isinstance(row, RowError):
+            raise row
+        category_name = str(row.get('category') or '').strip()
+        category_id = self.categories.get(category_name.lower())
+        if category_id is None:
+            raise RowError(f'Unknown or ambiguous category "{category_name}"')
+        currency_code = str(row.get('currency') or '').strip()
+        currency_id = None
+        if currency_code:
+            currency_id = self.currencies.get(currency_code.upper())
+            if currency_id is None:
+                raise RowError(f'Unknown currency "{currency_code}"')
+        characteristics = row.get('characteristics') or {}
+        if not isinstance(characteristics, dict):
+            raise RowError('characteristics must be an object')
+
+        values = {}
+        for field in ('sku', 'name', 'description', 'price'):
+            value = row.get(field)
+            try:
+                values[field] = Product._meta.get_field(field).clean(
+                    value.strip() if isinstance(value, str) else value, None)
+            except ValidationError as e:
+                raise RowError(f'{field}: {" ".join(e.messages)}')
+        if not values['sku']:
+            raise RowError('sku: This field cannot be blank.')
+        for key, value in characteristics.items():
+            for field, text in (('key', key), ('value', str(value))):
+                try:
+                    Characteristic._meta.get_field(field).clean(text, None)
+                except ValidationError as e:
+                    raise RowError(f'characteristic {key}: {" ".join(e.messages)}')
+
+        product = Product(category_id=category_id, currency_id=currency_id, status=False, deleted_at=None, **values)
+        return product, {key: str(value) for key, value in characteristics.items()}
+
+    def write_batch(self, batch):
+        """
+        Upsert the valid rows of a batch in one transaction: one INSERT .. ON CONFLICT for the
+        products, one query to read their ids back, one to find their live characteristics,
+        then one bulk update and one bulk insert for the characteristics.
+        New products start unvalidated; existing ones keep their status. Without --restore-deleted,
+        one more query finds the rows of soft-deleted products, which are rejected.
+        """
+        products = {}
+        lines = {}
+        for line, row in batch:
+            self.rows += 1
+            try:
+                product, characteristics = self.clean(row)
+            except RowError as e:
+                self.errors += 1
+                self.stderr.write(f'line {line}: {e}')
+                continue
+            # the last row wins when a sku repeats inside a batch
+            products[product.sku] = (product, characteristics)
+            lines[product.sku] = line
+        if products and not self.restore_deleted:
+            for sku in Product.objects.filter(sku__in=list(products), deleted_at__isnull=False).values_list(
+                    'sku', flat=True):
+                del products[sku]
+                self.errors += 1
+                self.stderr.write(f'line {lines[sku]}: sku {sku} belongs to a deleted product, '
+                                  f'pass --restore-deleted to bring it back')
+        if not products:
+            return
+
+        with transaction.atomic():
+            Product.objects.bulk_create(
+                [product for product, _ in products.values()],
+                update_conflicts=True, unique_fields=['sku'],
+                update_fields=PRODUCT_UPDATE_FIELDS + ['deleted_at'] if self.restore_deleted else PRODUCT_UPDATE_FIELDS,
+            )
+            ids = dict(Product.objects.filter(sku__in=list(products)).values_list('sku', 'id'))
+            # only live characteristics are unique per (product, key); soft-deleted ones stay as they are
+            live = {
+                (product_id, key): pk for pk, product_id, key in Characteristic.objects.filter(
+                    product_id__in=list(ids.values()), deleted_at__isnull=True).values_list('id', 'product_id', 'key')
+            }
+            now = timezone.now()
+            updated, created = [], []
+            for sku, (_, values) in products.items():
+                for key, value in values.items():
+                    pk = live.get((ids[sku], key))
+                    characteristic = Characteristic(pk=pk, product_id=ids[sku], key=key, value=value, status=True,
+                                                    updated_at=now)
+                    if pk is None:
+                        created.append(characteristic)
+                    else:
+                        updated.append(characteristic)
+            Characteristic.objects.bulk_update(updated, CHARACTERISTIC_UPDATE_FIELDS)
+            Characteristic.objects.bulk_create(created)
+            characteristics = updated + created
+        self.products += len(products)
+        self.characteristics += len(characteristics)
+
+    def report(self):
+        elapsed = time.monotonic() - self.started
+        rate = self.rows / elapsed if elapsed else 0
+        self.stdout.write(f'{self.rows} rows, {self.products} products, {self.characteristics} characteristics, '
+                          f'{self.errors} errors ({rate:.0f} rows/s)')
@@ -5,6 +5,7 @@ from currency.models import Currency
 
 
 class Product(models.Model):
+    sku = models.CharField(max_length=64, unique=True, null=True, blank=True)
     name = models.CharField(max_length=200)
     description = models.TextField()
     price = models.DecimalField(max_digits=6, decimal_places=2)
@@ -15,6 +16,14 @@ class Product(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     deleted_at = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['deleted_at', 'created_at', 'id'], name='product_listing_idx'),
+            models.Index(fields=['category', 'price'], name='product_category_price_idx'),
+            models.Index(fields=['currency', 'price'], name='product_currency_price_idx'),
+            models.Index(fields=['status', 'created_at'], name='product_status_created_idx'),
+        ]
+
     def delete(self, *args, **kwargs):
         self.deleted_at = timezone.now()
         self.status = False
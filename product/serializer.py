@@ -1,4 +1,9 @@
 from rest_framework import serializers
+
+from category.serializer import CategorySerializer
+from characteristic.serializer import CharacteristicSerializer
+from currency.serializer import CurrencySerializer
+from document.serializer import DocumentSerializer
 from .models import Product
 
 
@@ -6,3 +11,21 @@ class ProductSerializer(serializers.ModelSerializer):
     class Meta:
         model = Product
         fields = '__all__'
+
+
+class ProductDetailSerializer(serializers.Serializer):
+    """
+    Renders a product as `{product, category, currency, documents, characteristics}`.
+
+    Expects category and currency to be select_related and the non-deleted documents and
+    characteristics to be prefetched into `active_documents` and `active_characteristics`.
+    """
+
+    def to_representation(self, instance):
+        return {
+            'product': ProductSerializer(instance).data,
+            'category': CategorySerializer(instance.category).data,
+            'currency': CurrencySerializer(instance.currency).data,
+            'documents': DocumentSerializer(instance.active_documents, many=True).data,
+            'characteristics': CharacteristicSerializer(instance.active_characteristics, many=True).data,
+        }
@@ -1,9 +1,12 @@
+import json
 import os
 import tempfile
+from io import StringIO
 from tempfile import TemporaryDirectory
 from unittest.mock import patch
 
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
 from django.test import TestCase, override_settings
 from django.urls import reverse
 from rest_framework import status
@@ -31,7 +34,7 @@ class ProductViewSetTestCase(TestCase):
             'price': 100
         }
 
-    @patch('product.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_create_product(self, mock_check_permissions):
         response = self.api_client.post(self.url, self.data, format='json')
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
@@ -39,7 +42,7 @@ class ProductViewSetTestCase(TestCase):
         self.assertEqual(new_product['name'], 'Test Product')
         mock_check_permissions.assert_called()
 
-    @patch('product.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_update_product(self, mock_check_permissions):
         existing = Product.objects.create(name=self.data['name'], description=self.data['description'],
                                           category=self.category, price=self.data['price'])
@@ -53,7 +56,7 @@ class ProductViewSetTestCase(TestCase):
         self.assertEqual(updated_data['name'], 'Updated product name')
         mock_check_permissions.assert_called()
 
-    @patch('product.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_delete_product(self, mock_check_permissions):
         existing = Product.objects.create(name=self.data['name'], description=self.data['description'],
                                           category=self.category, price=self.data['price'])
@@ -65,7 +68,7 @@ class ProductViewSetTestCase(TestCase):
         self.assertFalse(existing.status is True)
         mock_check_permissions.assert_called()
 
-    @patch('product.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_list_product(self, mock_check_permissions):
         Product.objects.create(name=self.data['name'], description=self.data['description'],
                                category=self.category, price=self.data['price'])
@@ -75,10 +78,57 @@ class ProductViewSetTestCase(TestCase):
                                category=self.category, price=999.99, deleted_at=timezone.now())
         response = self.api_client.get(self.url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data['results']), 2)
         mock_check_permissions.assert_called()
 
-    @patch('product.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
+    def test_list_product_cursor_pages(self, mock_check_permissions):
+        for i in range(5):
+            Product.objects.create(name=f'prod{i}', description='desc', category=self.category, price=10)
+
+        response = self.api_client.get(self.url, {'page_size': 2})
+        names = [product['name'] for product in response.data['results']]
+        while response.data['next']:
+            response = self.api_client.get(response.data['next'])
+            names += [product['name'] for product in response.data['results']]
+        self.assertEqual(names, [f'prod{i}' for i in range(5)])
+
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
+    def test_list_product_page_size_is_capped(self, mock_check_permissions):
+        Product.objects.bulk_create([Product(name=f'prod{i}', description='desc', category=self.category, price=10)
+                                     for i in range(55)])
+
+        response = self.api_client.get(self.url, {'page_size': 500})
+        self.assertEqual(len(response.data['results']), 50)
+
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
+    def test_list_product_filters(self, mock_check_permissions):
+        sub_category = Category.objects.create(name='Sub Category', parent=self.category)
+        other_category = Category.objects.create(name='Other Category')
+        euro = Currency.objects.create(code='EUR', name='Euro', symbol='E')
+        Product.objects.create(name='Red phone', description='desc', category=sub_category, price=150,
+                               currency=self.currency, status=True)
+        Product.objects.create(name='Blue phone', description='desc', category=self.category, price=50,
+                               currency=euro)
+        Product.objects.create(name='Lamp', description='A red lamp', category=other_category, price=20,
+                               currency=self.currency, status=True)
+
+        def names(params):
+            response = self.api_client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return [product['name'] for product in response.data['results']]
+
+        self.assertEqual(names({'category': self.category.id}), ['Red phone', 'Blue phone'])
+        self.assertEqual(names({'min_price': 40, 'max_price': 100}), ['Blue phone'])
+        self.assertEqual(names({'currency': 'usd'}), ['Red phone', 'Lamp'])
+        self.assertEqual(names({'status': 'false'}), ['Blue phone'])
+        self.assertEqual(names({'search': 'red'}), ['Red phone', 'Lamp'])
+        self.assertEqual(names({'ordering': '-price'}), ['Red phone', 'Blue phone', 'Lamp'])
+        for value in ('cheap', 'NaN', 'Infinity', '-inf'):
+            response = self.api_client.get(self.url, {'min_price': value})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_retrieve_product(self, mock_check_permissions):
         with tempfile.TemporaryDirectory() as tmp_media:
             temp_media_root = os.path.join(tmp_media, settings.MEDIA_ROOT)
@@ -103,7 +153,32 @@ class ProductViewSetTestCase(TestCase):
                 self.assertEqual(response.data['product']['status'], False)
                 mock_check_permissions.assert_called()
 
-    @patch('product.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
+    def test_retrieve_product_query_count(self, mock_check_permissions):
+        with tempfile.TemporaryDirectory() as tmp_media:
+            temp_media_root = os.path.join(tmp_media, settings.MEDIA_ROOT)
+            with self.settings(MEDIA_ROOT=temp_media_root):
+                product = Product.objects.create(name=self.data['name'], description=self.data['description'],
+                                                 category=self.category, price=self.data['price'], currency=self.currency)
+
+                for name in ('test.jpg', 'test2.jpg', 'deleted.jpg'):
+                    dummy_file = SimpleUploadedFile(name, b'file_content', content_type='image/jpeg')
+                    Document.objects.create(name=dummy_file.name, path=dummy_file, size=dummy_file.size,
+                                            document_type='Image', product=product, status=True)
+                Document.objects.filter(name='deleted.jpg').update(deleted_at=timezone.now())
+                Characteristic.objects.create(key='model', value='2022', product=product)
+                Characteristic.objects.create(key='color', value='red', product=product, deleted_at=timezone.now())
+
+                retrieve_url = reverse('products-detail', args=[product.id])
+                with self.assertNumQueries(3):
+                    response = self.api_client.get(retrieve_url)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(response.data['category']['id'], self.category.id)
+                self.assertEqual(response.data['currency']['code'], 'USD')
+                self.assertEqual(len(response.data['documents']), 2)
+                self.assertEqual(len(response.data['characteristics']), 1)
+
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_validate_product(self, mock_check_permissions):
         with tempfile.TemporaryDirectory() as tmp_media:
             temp_media_root = os.path.join(tmp_media, settings.MEDIA_ROOT)
@@ -128,7 +203,7 @@ class ProductViewSetTestCase(TestCase):
                 self.assertEqual(product.status, True)
                 mock_check_permissions.assert_called()
 
-    @patch('product.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_validate_product_fail_currency(self, mock_check_permissions):
         product = Product.objects.create(name=self.data['name'], description=self.data['description'],
                                          category=self.category, price=self.data['price'])
@@ -142,7 +217,7 @@ class ProductViewSetTestCase(TestCase):
         self.assertEqual(product.status, False)
         mock_check_permissions.assert_called()
 
-    @patch('product.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_validate_product_fail_documents(self, mock_check_permissions):
         product = Product.objects.create(name=self.data['name'], description=self.data['description'],
                                          category=self.category, price=self.data['price'], currency=self.currency)
@@ -156,7 +231,7 @@ class ProductViewSetTestCase(TestCase):
         self.assertEqual(product.status, False)
         mock_check_permissions.assert_called()
 
-    @patch('product.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_validate_product_fail_image(self, mock_check_permissions):
         with tempfile.TemporaryDirectory() as tmp_media:
             temp_media_root = os.path.join(tmp_media, settings.MEDIA_ROOT)
@@ -177,7 +252,7 @@ class ProductViewSetTestCase(TestCase):
                 self.assertEqual(product.status, False)
                 mock_check_permissions.assert_called()
 
-    @patch('product.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_validate_product_fail_image_main(self, mock_check_permissions):
         with tempfile.TemporaryDirectory() as tmp_media:
             temp_media_root = os.path.join(tmp_media, settings.MEDIA_ROOT)
@@ -198,7 +273,7 @@ class ProductViewSetTestCase(TestCase):
                 self.assertEqual(product.status, False)
                 mock_check_permissions.assert_called()
 
-        @patch('product.views.check_permissions', return_value=True)
+        @patch('helpers.permission_helpers.check_permissions', return_value=True)
         def test_validate_product_fail_image_main(self, mock_check_permissions):
             with tempfile.TemporaryDirectory() as tmp_media:
                 temp_media_root = os.path.join(tmp_media, settings.MEDIA_ROOT)
@@ -219,7 +294,7 @@ class ProductViewSetTestCase(TestCase):
                     self.assertEqual(product.status, False)
                     mock_check_permissions.assert_called()
 
-    @patch('product.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_validate_product_fail_characteristics(self, mock_check_permissions):
         with tempfile.TemporaryDirectory() as tmp_media:
             temp_media_root = os.path.join(tmp_media, settings.MEDIA_ROOT)
@@ -240,3 +315,218 @@ class ProductViewSetTestCase(TestCase):
                 self.assertEqual(product.status, False)
                 mock_check_permissions.assert_called()
 
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
+    def test_bulk_create_products(self, mock_check_permissions):
+        bulk_url = reverse('products-bulk-create')
+        rows = [{'name': f'prod{i}', 'description': 'desc', 'category': self.category.id,
+                 'currency': self.currency.id, 'price': 10 + i, 'status': True} for i in range(50)]
+        with self.assertNumQueries(5):
+            response = self.api_client.post(bulk_url, rows, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data), 50)
+        self.assertEqual(Product.objects.count(), 50)
+        self.assertFalse(Product.objects.filter(status=True).exists())
+
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
+    def test_bulk_create_products_rejects_invalid_rows(self, mock_check_permissions):
+        bulk_url = reverse('products-bulk-create')
+        rows = [
+            {'name': 'prod1', 'description': 'desc', 'category': self.category.id, 'price': 10},
+            {'name': 'prod2', 'description': 'desc', 'category': 9999, 'price': 10},
+        ]
+        response = self.api_client.post(bulk_url, rows, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['errors'][0], {})
+        self.assertIn('category', response.data['errors'][1])
+        self.assertEqual(Product.objects.count(), 0)
+
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
+    def test_bulk_create_products_checks_unique_fields_per_batch(self, mock_check_permissions):
+        bulk_url = reverse('products-bulk-create')
+        Product.objects.create(name='existing', description='desc', category=self.category, price=10, sku='SKU-0')
+        rows = [{'name': f'prod{i}', 'description': 'desc', 'category': self.category.id, 'price': 10,
+                 'sku': f'SKU-{i}'} for i in range(50)]
+        rows.append({'name': 'again', 'description': 'desc', 'category': self.category.id, 'price': 10,
+                     'sku': 'SKU-1'})
+        with self.assertNumQueries(2):
+            response = self.api_client.post(bulk_url, rows, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        errors = response.data['errors']
+        self.assertIn('sku', errors[0])
+        self.assertEqual(errors[1], {})
+        self.assertIn('sku', errors[50])
+        self.assertEqual(Product.objects.count(), 1)
+
+        with self.assertNumQueries(5):
+            response = self.api_client.post(bulk_url, rows[1:50], format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Product.objects.count(), 50)
+
+        # a swap passes the batch checks but collides row by row in the UPDATE: still a 400
+        first, second = Product.objects.get(sku='SKU-1'), Product.objects.get(sku='SKU-2')
+        response = self.api_client.put(bulk_url, [{'id': first.id, 'sku': 'SKU-2'},
+                                                  {'id': second.id, 'sku': 'SKU-1'}], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.api_client.put(bulk_url, [{'id': first.id, 'sku': 'SKU-3'}], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('sku', response.data['errors'][0])
+
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
+    def test_bulk_update_and_destroy_products(self, mock_check_permissions):
+        bulk_url = reverse('products-bulk-create')
+        first = Product.objects.create(name='prod1', description='desc', category=self.category, price=10)
+        second = Product.objects.create(name='prod2', description='desc', category=self.category, price=20)
+
+        response = self.api_client.put(bulk_url, [{'id': first.id, 'price': 15},
+                                                  {'id': second.id, 'name': 'renamed'}], format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.price, 15)
+        self.assertEqual(second.name, 'renamed')
+
+        response = self.api_client.put(bulk_url, [{'id': first.id, 'price': 30}, {'id': 9999}], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        first.refresh_from_db()
+        self.assertEqual(first.price, 15)
+
+        for ids in (str(first.id), [str(first.id)], [True], [1.0]):
+            response = self.api_client.delete(bulk_url, {'ids': ids}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Product.objects.filter(deleted_at__isnull=False).count(), 0)
+
+        response = self.api_client.delete(bulk_url, {'ids': [first.id, 9999]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'deleted': [first.id], 'missing': [9999]})
+        first.refresh_from_db()
+        self.assertIsNotNone(first.deleted_at)
+        self.assertEqual(first.updated_at, first.deleted_at)
+        self.assertFalse(first.status)
+        self.assertIsNone(Product.objects.get(pk=second.id).deleted_at)
+
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
+    def test_export_products_csv(self, mock_check_permissions):
+        Product.objects.create(name='Phone', description='desc, with comma', category=self.category, price=150,
+                               currency=self.currency)
+        Product.objects.create(name='Lamp', description='desc', category=self.category, price=20)
+
+        response = self.api_client.get(reverse('products-export'), {'min_price': 100})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="products.csv"')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[0].startswith('id,sku,name,description,price,currency__code'))
+        self.assertIn('Phone,"desc, with comma",150.00,USD', lines[1])
+
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
+    def test_validate_product_list(self, mock_check_permissions):
+        with tempfile.TemporaryDirectory() as tmp_media:
+            with self.settings(MEDIA_ROOT=tmp_media):
+                ready = Product.objects.create(name='Ready', description='desc', category=self.category, price=10,
+                                               currency=self.currency)
+                deleted_image = Product.objects.create(name='Deleted image', description='desc',
+                                                       category=self.category, price=10, currency=self.currency)
+                bare = Product.objects.create(name='Bare', description='desc', category=self.category, price=10)
+                for product in (ready, deleted_image):
+                    dummy_file = SimpleUploadedFile('test.jpg', b'file_content', content_type='image/jpeg')
+                    Document.objects.create(name=dummy_file.name, path=dummy_file, size=dummy_file.size,
+                                            document_type='Image', product=product, status=True, is_main=True)
+                    Characteristic.objects.create(key='model', value='2022', product=product)
+                Document.objects.filter(product=deleted_image).update(deleted_at=timezone.now())
+
+                response = self.api_client.post(reverse('products-validate-list'), {'ids': str(ready.id)},
+                                                format='json')
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertFalse(Product.objects.filter(status=True).exists())
+
+                with self.assertNumQueries(2):
+                    response = self.api_client.post(reverse('products-validate-list'),
+                                                    {'ids': [ready.id, deleted_image.id, bare.id, 9999]},
+                                                    format='json')
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(response.data['validated'], [ready.id])
+                self.assertEqual(response.data['failed'], {
+                    deleted_image.id: ['Product has no document', 'Product has no image', 'Product has no main image'],
+                    bare.id: ['Product has no currency', 'Product has no document', 'Product has no image',
+                              'Product has no main image', 'Product has no characteristics'],
+                })
+                self.assertEqual(response.data['missing'], [9999])
+                self.assertEqual(list(Product.objects.filter(status=True)), [ready])
+
+                response = self.api_client.post(reverse('products-validate', args=[deleted_image.id]))
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertEqual(response.data['message'], 'Product has no document')
+
+
+class ImportCatalogTestCase(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name='Phones')
+        self.currency = Currency.objects.create(code='USD', name='USD', symbol='$')
+        self.tmp = TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def write(self, name, content):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return path
+
+    def run_import(self, path, **options):
+        stdout, stderr = StringIO(), StringIO()
+        call_command('import_catalog', path, stdout=stdout, stderr=stderr, **options)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_import_csv(self):
+        path = self.write('catalog.csv', (
+            'sku,name,description,price,category,currency,char:color,char:size\n'
+            'P-1,Phone,A phone,199.99,phones,usd,red,\n'
+            'P-2,Tablet,A tablet,299.00,Phones,,blue,10in\n'
+            'P-3,Watch,A watch,99,Watches,USD,,\n'
+        ))
+        stdout, stderr = self.run_import(path, batch_size=2)
+        self.assertIn('line 4: Unknown or ambiguous category "Watches"', stderr)
+        self.assertIn('Imported 2 of 3 rows', stdout)
+        phone = Product.objects.get(sku='P-1')
+        self.assertEqual(phone.currency, self.currency)
+        self.assertFalse(phone.status)
+        self.assertEqual(dict(phone.characteristics.values_list('key', 'value')), {'color': 'red'})
+        self.assertEqual(Characteristic.objects.filter(product__sku='P-2').count(), 2)
+
+    def test_import_jsonl_upserts_by_sku(self):
+        existing = Product.objects.create(sku='P-1', name='Old', description='desc', category=self.category,
+                                          price=10, status=True, deleted_at=timezone.now())
+        color = Characteristic.objects.create(product=existing, key='color', value='green')
+        deleted = Characteristic.objects.create(product=existing, key='weight', value='1kg', deleted_at=timezone.now())
+        rows = [
+            {'sku': 'P-1', 'name': 'Phone', 'description': 'desc', 'price': '12.50', 'category': 'Phones',
+             'characteristics': {'color': 'red', 'weight': '150g'}},
+            {'sku': 'P-2', 'name': 'Tablet', 'description': 'desc', 'price': '1234567', 'category': 'Phones'},
+        ]
+        path = self.write('catalog.jsonl', '\n'.join(json.dumps(row) for row in rows) + '\nnot json\n')
+        stdout, stderr = self.run_import(path)
+        self.assertIn('line 1: sku P-1 belongs to a deleted product', stderr)
+        self.assertIn('Imported 0 of 3 rows', stdout)
+        existing.refresh_from_db()
+        self.assertEqual(existing.name, 'Old')
+        self.assertIsNotNone(existing.deleted_at)
+
+        stdout, stderr = self.run_import(path, restore_deleted=True)
+        self.assertIn('line 2: price:', stderr)
+        self.assertIn('line 3: Invalid JSON', stderr)
+        self.assertIn('Imported 1 of 3 rows', stdout)
+
+        existing.refresh_from_db()
+        self.assertEqual(existing.name, 'Phone')
+        self.assertEqual(str(existing.price), '12.50')
+        self.assertIsNone(existing.deleted_at)
+        self.assertTrue(existing.status)
+        self.assertEqual(Product.objects.count(), 1)
+        self.assertEqual(dict(existing.characteristics.filter(deleted_at__isnull=True).values_list('key', 'value')),
+                         {'color': 'red', 'weight': '150g'})
+        # the live row is updated in place; a soft-deleted one is left alone
+        color.refresh_from_db()
+        self.assertEqual(color.value, 'red')
+        deleted.refresh_from_db()
+        self.assertEqual((deleted.value, deleted.status), ('1kg', True))
+        self.assertIsNotNone(deleted.deleted_at)
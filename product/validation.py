@@ -0,0 +1,72 @@
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from category.models import Category
+from characteristic.models import Characteristic
+from currency.models import Currency
+from document.models import Document
+from .models import Product
+
+# readiness rules in the order they are reported: annotation -> message when it is false
+RULES = [
+    ('has_category', 'Product has no category'),
+    ('has_currency', 'Product has no currency'),
+    ('has_document', 'Product has no document'),
+    ('has_image', 'Product has no image'),
+    ('has_main_image', 'Product has no main image'),
+    ('has_characteristics', 'Product has no characteristics'),
+]
+
+
+def annotate_readiness(queryset):
+    """
+    Annotate every rule of RULES as a boolean subquery, so a whole queryset is checked in the
+    same query that loads it. Soft-deleted categories, currencies, documents and
+    characteristics do not count.
+    """
+    documents = Document.objects.filter(product=OuterRef('pk'), deleted_at__isnull=True)
+    images = documents.filter(document_type='Image')
+    return queryset.annotate(
+        has_category=Exists(Category.objects.filter(pk=OuterRef('category_id'), deleted_at__isnull=True)),
+        has_currency=Exists(Currency.objects.filter(pk=OuterRef('currency_id'), deleted_at__isnull=True)),
+        has_document=Exists(documents),
+        has_image=Exists(images),
+        has_main_image=Exists(images.filter(is_main=True)),
+        has_characteristics=Exists(
+            Characteristic.objects.filter(product=OuterRef('pk'), deleted_at__isnull=True)),
+    )
+
+
+def readiness_errors(product) -> list:
+    # `product` is an instance or values() row of an annotate_readiness queryset
+    get = product.get if isinstance(product, dict) else lambda flag: getattr(product, flag)
+    return [message for flag, message in RULES if not get(flag)]
+
+
+def publish(product_ids) -> int:
+    return Product.objects.filter(id__in=product_ids).update(status=True, updated_at=timezone.now())
+
+
+def validate_products(queryset, ids) -> dict:
+    """
+    Check the products with the given ids and publish those that pass every rule, in two
+    queries whatever the number of products. Returns `{validated, failed, missing}`, where
+    `failed` maps each rejected id to all of its problems.
+    """
+    rows = annotate_readiness(queryset.filter(id__in=ids)).values('id', *[flag for flag, _ in RULES])
+    validated = []
+    failed = {}
+    for row in rows.iterator(chunk_size=2000):
+        errors = readiness_errors(row)
+        if errors:
+            failed[row['id']] = errors
+        else:
+            validated.append(row['id'])
+    if validated:
+        publish(validated)
+    found = set(validated) | set(failed)
+    return {
+        'validated': sorted(validated),
+        'failed': failed,
+        'missing': sorted(set(ids) - found),
+    }
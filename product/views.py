@@ -1,23 +1,65 @@
+from django.db.models import Prefetch
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.filters import OrderingFilter
 from rest_framework.response import Response
 
-from category.serializer import CategorySerializer
-from characteristic.serializer import CharacteristicSerializer
-from currency.serializer import CurrencySerializer
-from document.serializer import DocumentSerializer
-from helpers.permission_helpers import unauthorized, check_permissions, check_auth
+from characteristic.models import Characteristic
+from document.models import Document
+from helpers.bulk import BulkModelMixin, get_ids
+from helpers.export import ExportMixin
+from helpers.permission_helpers import ActionPermission
+from product.filters import ProductFilterBackend
 from product.models import Product
-from product.serializer import ProductSerializer
+from product.serializer import ProductSerializer, ProductDetailSerializer
+from product.validation import annotate_readiness, publish, readiness_errors, validate_products
 
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(BulkModelMixin, ExportMixin, viewsets.ModelViewSet):
     queryset = Product.objects.filter(deleted_at__isnull=True)
     serializer_class = ProductSerializer
+    permission_classes = [ActionPermission]
+    filter_backends = [ProductFilterBackend, OrderingFilter]
+    ordering_fields = ['price', 'created_at']
+    ordering = ('created_at', 'id')
+    bulk_create_defaults = {'status': False}
+    bulk_destroy_updates = {'status': False}
+    export_fields = ['id', 'sku', 'name', 'description', 'price', 'currency__code', 'category_id', 'category__name',
+                     'status', 'created_at', 'updated_at']
+    action_permissions = {
+        'create': 'can_create_product',
+        'update': 'can_update_product',
+        'partial_update': 'can_update_product',
+        'destroy': 'can_delete_product',
+        'list': 'can_view_product_list',
+        'retrieve': 'can_view_product',
+        'validate': 'can_validate_product',
+        'validate_list': 'can_validate_product',
+        'bulk_create': 'can_create_product',
+        'bulk_update': 'can_update_product',
+        'bulk_destroy': 'can_delete_product',
+        'export': 'can_view_product_list',
+    }
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'validate':
+            queryset = annotate_readiness(queryset)
+        if self.action == 'retrieve':
+            queryset = queryset.select_related('category', 'currency').prefetch_related(
+                Prefetch('documents', queryset=Document.objects.filter(deleted_at__isnull=True),
+                         to_attr='active_documents'),
+                Prefetch('characteristics', queryset=Characteristic.objects.filter(deleted_at__isnull=True),
+                         to_attr='active_characteristics'),
+            )
+        return queryset
+
+    def get_serializer_class(self):
+        if self.action == 'retrieve':
+            return ProductDetailSerializer
+        return super().get_serializer_class()
 
     def create(self, request, *args, **kwargs):
-        if not check_permissions(request, 'can_create_product'):
-            return unauthorized()
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         serializer.save(status=False)
@@ -25,8 +67,6 @@ class ProductViewSet(viewsets.ModelViewSet):
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     def update(self, request, *args, **kwargs):
-        if not check_permissions(request, 'can_update_product'):
-            return unauthorized()
         instance = self.get_object()
         serializer = self.get_serializer(instance, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
@@ -35,73 +75,29 @@ class ProductViewSet(viewsets.ModelViewSet):
             serializer.data)
 
     def destroy(self, request, *args, **kwargs):
-        if not check_permissions(request, 'can_delete_product'):
-            return unauthorized()
         role = self.get_object()
         role.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
-    def list(self, request, *args, **kwargs):
-        if not check_permissions(request, 'can_view_product_list'):
-            return unauthorized()
-        return super().list(request, *args, **kwargs)
-
-    def retrieve(self, request, *args, **kwargs):
-        if not check_permissions(request, 'can_view_product'):
-            return unauthorized()
-        product = self.get_object()
-        categpry = product.category
-        currency = product.currency
-        documents = product.documents.filter(deleted_at__isnull=True)
-        characteristics = product.characteristics.filter(deleted_at__isnull=True)
-
-        product_serializer = ProductSerializer(product)
-        categpry_serializer = CategorySerializer(categpry)
-        currency_serializer = CurrencySerializer(currency)
-        documents_serializer = DocumentSerializer(documents, many=True)
-        characteristics_serializer = CharacteristicSerializer(characteristics, many=True)
-
-        return Response(
-            data={'product': product_serializer.data,
-                  'category': categpry_serializer.data,
-                  'currency': currency_serializer.data,
-                  'documents': documents_serializer.data,
-                  'characteristics': characteristics_serializer.data},
-            status=status.HTTP_200_OK)
-
     @action(detail=True, methods=['post'])
     def validate(self, request, *args, **kwargs):
-        if not check_permissions(request, 'can_validate_product'):
-            return unauthorized()
-        is_main = False
-        image_exist = False
-
         product = self.get_object()
-        category = product.category
-        if not category:
-            return Response(data={'message': 'Product has no category'}, status=status.HTTP_400_BAD_REQUEST)
-
-        if not product.currency:
-            return Response(data={'message': 'Product has no currency'}, status=status.HTTP_400_BAD_REQUEST)
-
-        documents = product.documents.all()
-        if not documents:
-            return Response(data={'message': 'Product has no document'}, status=status.HTTP_400_BAD_REQUEST)
-        for document in documents:
-            if document.document_type == 'Image':
-                image_exist = True
-                if document.is_main:
-                    is_main = True
-                    break
-        if not image_exist:
-            return Response(data={'message': 'Product has no image'}, status=status.HTTP_400_BAD_REQUEST)
-        if not is_main:
-            return Response(data={'message': 'Product has no main image'}, status=status.HTTP_400_BAD_REQUEST)
-
-        characteristics = product.characteristics.all()
-        if not characteristics:
-            return Response(data={'message': 'Product has no characteristics'}, status=status.HTTP_400_BAD_REQUEST)
-
-        product.status = True
-        product.save()
+        errors = readiness_errors(product)
+        if errors:
+            return Response(data={'message': errors[0]}, status=status.HTTP_400_BAD_REQUEST)
+        publish([product.pk])
         return Response(data={'message': 'Product validated'}, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['post'], url_path='validate')
+    def validate_list(self, request, *args, **kwargs):
+        """
+        Validate and publish many products at once: `{"ids": [...]}` answers with the ids
+        validated, the problems of each rejected product and the ids not found.
+        """
+        ids = get_ids(request)
+        if ids is None:
+            return Response({'error': 'ids must be a list of integers'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(ids) > self.bulk_max_rows:
+            return Response({'error': f'At most {self.bulk_max_rows} ids per request'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response(validate_products(self.get_queryset(), ids), status=status.HTTP_200_OK)
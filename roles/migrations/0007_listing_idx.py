@@ -0,0 +1,18 @@
+# Generated by Django 5.0.4 on 2026-10-18 20:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('permission', '0002_listing_idx'),
+        ('roles', '0006_delete_permission_alter_role_permissions'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='role',
+            index=models.Index(fields=['deleted_at', 'created_at', 'id'], name='role_listing_idx'),
+        ),
+    ]
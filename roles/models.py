@@ -13,6 +13,11 @@ class Role(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     deleted_at = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['deleted_at', 'created_at', 'id'], name='role_listing_idx'),
+        ]
+
     def delete(self, *args, **kwargs):
         self.deleted_at = timezone.now()
         self.save()
@@ -0,0 +1,38 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from helpers.permission_helpers import bump_permissions_version, invalidate_user_permissions
+from permission.models import Permission
+from roles.models import Role
+from user.models import Client
+
+
+@receiver(m2m_changed, sender=Role.permissions.through)
+def role_permissions_changed(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_permissions_version()
+
+
+@receiver(m2m_changed, sender=Client.roles.through)
+def client_roles_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse or not isinstance(instance, Client):
+        # role.client_set.add(...) touches many users at once
+        bump_permissions_version()
+    else:
+        invalidate_user_permissions(instance.pk)
+
+
+@receiver(post_save, sender=Role)
+@receiver(post_delete, sender=Role)
+@receiver(post_save, sender=Permission)
+@receiver(post_delete, sender=Permission)
+def role_or_permission_changed(sender, **kwargs):
+    bump_permissions_version()
+
+
+@receiver(post_save, sender=Client)
+@receiver(post_delete, sender=Client)
+def client_changed(sender, instance, **kwargs):
+    invalidate_user_permissions(instance.pk)
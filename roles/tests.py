@@ -1,10 +1,14 @@
 from unittest.mock import patch
 from permission.models import Permission
+from django.core.cache import cache
 from django.test import TestCase
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
+from helpers import permission_helpers
+from helpers.permission_helpers import get_user_permissions
 from roles.models import Role
+from user.models import Client
 
 
 class RoleViewSetTestCase(TestCase):
@@ -18,14 +22,14 @@ class RoleViewSetTestCase(TestCase):
         self.permission1 = Permission.objects.create(name='can_create_client')
         self.permission2 = Permission.objects.create(name='can_view_client')
 
-    @patch('roles.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_create_role_without_permission(self, mock_check_permissions):
         response = self.api_client.post(self.url, self.data, format='json')
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         mock_check_permissions.assert_called()
         self.assertIn('permissions', response.data)
 
-    @patch('roles.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_create_role_with_permissions(self, mock_check_permissions):
         self.data['permissions'] = [self.permission1.id, self.permission2.id]
         response = self.api_client.post(self.url, self.data, format='json')
@@ -36,7 +40,7 @@ class RoleViewSetTestCase(TestCase):
         self.assertEqual(len(new_role['permissions']), 2)
         mock_check_permissions.assert_called()
 
-    @patch('roles.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_update_role(self, mock_check_permissions):
         existing_role = Role.objects.create(name='New Role', description='This is a test role')
         existing_role.permissions.add(self.permission1)
@@ -56,7 +60,7 @@ class RoleViewSetTestCase(TestCase):
         self.assertEqual(existing_role.deleted_at, None)
         mock_check_permissions.assert_called()
 
-    @patch('roles.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_delete_role(self, mock_check_permissions):
         existing_role = Role.objects.create(name='New Role', description='This is a test role')
         existing_role.permissions.add(self.permission1)
@@ -68,16 +72,16 @@ class RoleViewSetTestCase(TestCase):
         self.assertNotEqual(existing_role.deleted_at, None)
         mock_check_permissions.assert_called()
 
-    @patch('roles.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_list_roles(self, mock_check_permissions):
         Role.objects.create(name='Demo Role 1', description='This is a demo role')
         Role.objects.create(name='Test Role 2', description='This is a test role')
         response = self.api_client.get(self.url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data['results']), 2)
         mock_check_permissions.assert_called()
 
-    @patch('roles.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_retrieve_role(self, mock_check_permissions):
         existing_role = Role.objects.create(name='New Role', description='This is a test role')
         existing_role.permissions.add(self.permission1)
@@ -91,7 +95,7 @@ class RoleViewSetTestCase(TestCase):
         self.assertEqual(len(role['permissions']), 2)
         mock_check_permissions.assert_called()
 
-    @patch('roles.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_disable_role(self, mock_check_permissions):
         existing_role = Role.objects.create(name='New Role', description='This is a test role')
         existing_role.permissions.add(self.permission1)
@@ -104,4 +108,55 @@ class RoleViewSetTestCase(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         existing_role.refresh_from_db()
         self.assertEqual(existing_role.active, False)
-        mock_check_permissions.assert_called()
\ No newline at end of file
+        mock_check_permissions.assert_called()
+
+
+class UserPermissionsCacheTestCase(TestCase):
+    def setUp(self):
+        self.user = Client.objects.create_user(username='cached', password='password')
+        self.permission = Permission.objects.create(name='can_view_client')
+        self.role = Role.objects.create(name='Main')
+        self.role.permissions.add(self.permission)
+        self.user.roles.add(self.role)
+
+    def test_permissions_are_cached(self):
+        self.assertEqual(get_user_permissions(self.user), frozenset({'can_view_client'}))
+        with self.assertNumQueries(0):
+            self.assertIn('can_view_client', get_user_permissions(self.user))
+
+    def test_role_permissions_change_invalidates(self):
+        get_user_permissions(self.user)
+        self.role.permissions.add(Permission.objects.create(name='can_update_client'))
+        self.assertEqual(get_user_permissions(self.user), frozenset({'can_view_client', 'can_update_client'}))
+
+    def test_client_roles_change_invalidates(self):
+        get_user_permissions(self.user)
+        self.user.roles.remove(self.role)
+        self.assertEqual(get_user_permissions(self.user), frozenset())
+
+    def test_permission_deactivation_invalidates(self):
+        get_user_permissions(self.user)
+        self.permission.active = False
+        self.permission.save()
+        self.assertEqual(get_user_permissions(self.user), frozenset())
+
+    def test_invalidation_reaches_other_processes(self):
+        get_user_permissions(self.user)
+        # another worker removes the role: only the shared cache sees its invalidation
+        with patch.dict(permission_helpers._local_permissions, clear=True):
+            self.user.roles.remove(self.role)
+        self.assertEqual(get_user_permissions(self.user), frozenset())
+
+    def test_evicted_user_stamp_is_not_reused(self):
+        versions = permission_helpers.get_user_permissions_version(self.user.pk)
+        self.assertNotEqual(versions[1], 0)
+        # the shared cache evicts the stamp: the next one must not match tokens signed before
+        with patch('helpers.permission_helpers.time.time', return_value=versions[1] / 1000 + 1):
+            cache.delete(permission_helpers._user_version_key(self.user.pk))
+            self.assertNotEqual(permission_helpers.get_user_permissions_version(self.user.pk), versions)
+
+    @patch.object(permission_helpers, 'LOCAL_PERMISSIONS_MAX_SIZE', 2)
+    def test_local_cache_is_bounded(self):
+        for index in range(4):
+            get_user_permissions(Client.objects.create_user(username=f'user{index}', password='password'))
+        self.assertEqual(len(permission_helpers._local_permissions), 2)
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.4 on 2026-10-18 20:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stockreservation',
+            name='fulfilled',
+            field=models.BooleanField(default=False),
+        ),
+    ]
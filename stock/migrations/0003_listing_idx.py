@@ -0,0 +1,18 @@
+# Generated by Django 5.0.4 on 2026-10-18 20:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0005_product_sku'),
+        ('stock', '0002_stockreservation_fulfilled'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='stock',
+            index=models.Index(fields=['created_at', 'id'], name='stock_listing_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+from django.db import models
+
+from order.models import Order
+from product.models import Product
+
+
+class Stock(models.Model):
+    """
+    Units of a product available for sale. Only products with a Stock row are tracked;
+    the others can be ordered without limit.
+
+    `quantity` is what can still be reserved, `reserved` what pending orders hold.
+    """
+    product = models.OneToOneField(Product, related_name='stock', on_delete=models.CASCADE)
+    quantity = models.PositiveIntegerField(default=0)
+    reserved = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='stock_listing_idx'),
+        ]
+        constraints = [
+            models.CheckConstraint(check=models.Q(quantity__gte=0), name='stock_quantity_gte_0'),
+            models.CheckConstraint(check=models.Q(reserved__gte=0), name='stock_reserved_gte_0'),
+        ]
+
+
+class StockReservation(models.Model):
+    """
+    Units held by an order. `released_at` is set once the reservation is settled, either by
+    returning the units to stock or, with `fulfilled`, by shipping them.
+    """
+    order = models.ForeignKey(Order, related_name='reservations', on_delete=models.CASCADE)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    quantity = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    released_at = models.DateTimeField(null=True, blank=True)
+    fulfilled = models.BooleanField(default=False)
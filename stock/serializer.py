@@ -0,0 +1,13 @@
+from rest_framework import serializers
+from .models import Stock
+
+
+class StockSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Stock
+        fields = ['id', 'product', 'quantity', 'reserved', 'created_at', 'updated_at']
+        read_only_fields = ['reserved']
+
+
+class StockAdjustSerializer(serializers.Serializer):
+    delta = serializers.IntegerField()
@@ -0,0 +1,62 @@
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Stock, StockReservation
+
+
+class InsufficientStock(Exception):
+    def __init__(self, product_id):
+        super().__init__(f'Insufficient stock for product {product_id}')
+        self.product_id = product_id
+
+
+def reserve_stock(order, quantities):
+    """
+    Reserve `{product_id: quantity}` for an order; must run inside the order's transaction.
+
+    Each tracked product is taken with one conditional `UPDATE .. WHERE quantity >= n`, so two
+    checkouts can never both get the last unit, and rows are touched in product id order so
+    concurrent checkouts do not deadlock. Raises InsufficientStock on the first product that
+    is short; the caller's rollback undoes the reservations already taken.
+    """
+    tracked = set(Stock.objects.filter(product_id__in=list(quantities)).values_list('product_id', flat=True))
+    reservations = []
+    for product_id in sorted(tracked):
+        quantity = quantities[product_id]
+        taken = Stock.objects.filter(product_id=product_id, quantity__gte=quantity).update(
+            quantity=F('quantity') - quantity, reserved=F('reserved') + quantity, updated_at=timezone.now())
+        if not taken:
+            raise InsufficientStock(product_id)
+        reservations.append(StockReservation(order=order, product_id=product_id, quantity=quantity))
+    StockReservation.objects.bulk_create(reservations)
+
+
+def _close_reservations(order, restock):
+    # a reservation is closed by whoever marks it, so each one is settled exactly once
+    reservations = list(StockReservation.objects.filter(order=order, released_at__isnull=True))
+    for reservation in reservations:
+        with transaction.atomic():
+            closed = StockReservation.objects.filter(pk=reservation.pk, released_at__isnull=True).update(
+                released_at=timezone.now(), fulfilled=not restock)
+            if closed:
+                returned = reservation.quantity if restock else 0
+                Stock.objects.filter(product_id=reservation.product_id).update(
+                    quantity=F('quantity') + returned, reserved=F('reserved') - reservation.quantity,
+                    updated_at=timezone.now())
+
+
+def release_stock(order):
+    """
+    Give back the units an order still holds. Safe to call repeatedly or concurrently: a
+    reservation is only returned by whoever marks it released.
+    """
+    _close_reservations(order, restock=True)
+
+
+def fulfil_stock(order):
+    """
+    Settle the reservations of an order that has shipped: its units leave `reserved` for good
+    instead of going back to `quantity`. Safe to call repeatedly, like release_stock.
+    """
+    _close_reservations(order, restock=False)
@@ -0,0 +1,18 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from order.models import Order
+from .services import fulfil_stock, release_stock
+
+RELEASING_STATUSES = ('CANCELLED', 'DELETED')
+FULFILLING_STATUSES = ('SHIPPED', 'DELIVERED', 'COMPLETE')
+
+
+@receiver(post_save, sender=Order)
+def settle_order_stock(sender, instance, created, **kwargs):
+    if created:
+        return
+    if instance.status in RELEASING_STATUSES or instance.deleted_at is not None:
+        release_stock(instance)
+    elif instance.status in FULFILLING_STATUSES:
+        fulfil_stock(instance)
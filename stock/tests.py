@@ -0,0 +1,132 @@
+import threading
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from cart.models import Cart
+from cartItem.models import CartItem
+from category.models import Category
+from currency.models import Currency
+from order.models import Order
+from order.services import CheckoutError, create_order_from_cart
+from product.models import Product
+from user.models import Client
+from .models import Stock, StockReservation
+
+
+class StockReservationTestCase(TestCase):
+    def setUp(self):
+        self.api_client = APIClient()
+        self.user = Client.objects.create_user(username='tester', password='password')
+        category = Category.objects.create(name='Test Category')
+        self.currency = Currency.objects.create(code='MAD', name='Moroccan Dirham', symbol='DH')
+        self.phone = Product.objects.create(name='Phone', description='desc', category=category,
+                                            currency=self.currency, price=100, status=True)
+        self.case = Product.objects.create(name='Case', description='desc', category=category,
+                                           currency=self.currency, price=10, status=True)
+        self.stock = Stock.objects.create(product=self.phone, quantity=5)
+        self.cart = Cart.objects.create(client=self.user, status=True)
+        CartItem.objects.create(cart=self.cart, product=self.phone, quantity=2)
+        CartItem.objects.create(cart=self.cart, product=self.case, quantity=50)
+
+    def test_checkout_reserves_tracked_products(self):
+        order = create_order_from_cart(self.user, cart_id=self.cart.id)
+        self.stock.refresh_from_db()
+        self.assertEqual((self.stock.quantity, self.stock.reserved), (3, 2))
+        self.assertEqual(list(order.reservations.values_list('product_id', 'quantity')), [(self.phone.id, 2)])
+
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
+    def test_checkout_rejects_insufficient_stock(self, mock_check_permissions):
+        Stock.objects.filter(pk=self.stock.pk).update(quantity=1)
+        self.api_client.force_authenticate(user=self.user)
+        response = self.api_client.post(reverse('order-list'), {'cart': self.cart.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['message'], f'Insufficient stock for product {self.phone.id}')
+        self.stock.refresh_from_db()
+        self.assertEqual((self.stock.quantity, self.stock.reserved), (1, 0))
+        self.assertFalse(Order.objects.exists())
+
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
+    def test_cancel_and_delete_release_stock_once(self, mock_check_permissions):
+        order = create_order_from_cart(self.user, cart_id=self.cart.id)
+        response = self.api_client.put(reverse('order-detail', args=[order.id]), {'status': 'CANCELLED'},
+                                       format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.stock.refresh_from_db()
+        self.assertEqual((self.stock.quantity, self.stock.reserved), (5, 0))
+
+        Order.objects.get(pk=order.pk).delete()
+        self.stock.refresh_from_db()
+        self.assertEqual((self.stock.quantity, self.stock.reserved), (5, 0))
+        self.assertFalse(StockReservation.objects.filter(released_at__isnull=True).exists())
+
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
+    def test_shipping_settles_reserved_stock(self, mock_check_permissions):
+        order = create_order_from_cart(self.user, cart_id=self.cart.id)
+        for order_status in ('SHIPPED', 'COMPLETE', 'CANCELLED'):
+            response = self.api_client.put(reverse('order-detail', args=[order.id]), {'status': order_status},
+                                           format='json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.stock.refresh_from_db()
+            # shipped units are gone for good: a later cancel does not put them back
+            self.assertEqual((self.stock.quantity, self.stock.reserved), (3, 0))
+        self.assertTrue(order.reservations.get().fulfilled)
+
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
+    def test_adjust_stock(self, mock_check_permissions):
+        adjust_url = reverse('stock-adjust', args=[self.stock.id])
+        response = self.api_client.post(adjust_url, {'delta': 3}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['quantity'], 8)
+        response = self.api_client.post(adjust_url, {'delta': -9}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ConcurrentCheckoutTestCase(TransactionTestCase):
+    """
+    Checkouts race from separate threads and connections. The guarded UPDATE needs no row
+    locks, so this holds on SQLite (a file test database) as on PostgreSQL or MySQL.
+    """
+    checkouts = 20
+    units = 7
+
+    def test_concurrent_checkouts_never_oversell(self):
+        category = Category.objects.create(name='Test Category')
+        currency = Currency.objects.create(code='MAD', name='Moroccan Dirham', symbol='DH')
+        product = Product.objects.create(name='Phone', description='desc', category=category, currency=currency,
+                                         price=100, status=True)
+        Stock.objects.create(product=product, quantity=self.units)
+        carts = []
+        for i in range(self.checkouts):
+            user = Client.objects.create_user(username=f'buyer{i}', password='password')
+            cart = Cart.objects.create(client=user, status=True)
+            CartItem.objects.create(cart=cart, product=product, quantity=1)
+            carts.append((user, cart))
+
+        barrier = threading.Barrier(self.checkouts)
+        results = []
+
+        def checkout(user, cart):
+            try:
+                barrier.wait()
+                create_order_from_cart(user, cart_id=cart.id)
+                results.append(True)
+            except CheckoutError:
+                results.append(False)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=checkout, args=args) for args in carts]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stock = Stock.objects.get(product=product)
+        self.assertEqual(results.count(True), self.units)
+        self.assertEqual((stock.quantity, stock.reserved), (0, self.units))
+        self.assertEqual(Order.objects.count(), self.units)
@@ -0,0 +1,12 @@
+from rest_framework.routers import DefaultRouter
+from django.urls import include, path
+
+from stock.views import StockViewSet
+
+
+router = DefaultRouter()
+router.register(r'', StockViewSet, basename='stock')
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
@@ -0,0 +1,41 @@
+from django.db.models import F
+from django.utils import timezone
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from helpers.permission_helpers import ActionPermission
+from .models import Stock
+from .serializer import StockSerializer, StockAdjustSerializer
+
+
+class StockViewSet(viewsets.ModelViewSet):
+    queryset = Stock.objects.all()
+    serializer_class = StockSerializer
+    permission_classes = [ActionPermission]
+    action_permissions = {
+        'create': 'can_create_stock',
+        'update': 'can_update_stock',
+        'partial_update': 'can_update_stock',
+        'adjust': 'can_update_stock',
+        'destroy': 'can_delete_stock',
+        'list': 'can_view_stock_list',
+        'retrieve': 'can_view_stock',
+    }
+
+    @action(detail=True, methods=['post'])
+    def adjust(self, request, *args, **kwargs):
+        """
+        Add (or, with a negative delta, remove) units in place, without overwriting
+        reservations taken since the stock was read.
+        """
+        stock = self.get_object()
+        serializer = StockAdjustSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        delta = serializer.validated_data['delta']
+        adjusted = Stock.objects.filter(pk=stock.pk, quantity__gte=-delta).update(
+            quantity=F('quantity') + delta, updated_at=timezone.now())
+        if not adjusted:
+            return Response({'message': 'Insufficient stock'}, status=status.HTTP_400_BAD_REQUEST)
+        stock.refresh_from_db()
+        return Response(StockSerializer(stock).data, status=status.HTTP_200_OK)
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.4 on 2026-10-18 20:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('support', '0004_support_phone_number'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='support',
+            index=models.Index(fields=['deleted_at', 'created_at', 'id'], name='support_listing_idx'),
+        ),
+    ]
@@ -22,6 +22,11 @@ class Support(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     deleted_at = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['deleted_at', 'created_at', 'id'], name='support_listing_idx'),
+        ]
+
     def delete(self, using=None, keep_parents=False):
         self.deleted_at = timezone.now()
         self.save()
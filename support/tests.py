@@ -39,7 +39,7 @@ class PermissionViewSetTestCase(TestCase):
         self.assertEqual(new_support['email'], self.email)
         self.assertEqual(new_support['client'], self.user.id)
 
-    @patch('support.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_update_support(self, mock_check_permissions):
         self.api_client.force_authenticate(user=self.user)
         existing_support = Support.objects.create(message='Message test', full_name='Test User', client=self.user,
@@ -54,7 +54,7 @@ class PermissionViewSetTestCase(TestCase):
         self.assertEqual(updated_support['message'], 'This is a new message text')
         mock_check_permissions.assert_called()
 
-    @patch('support.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_update_support_status(self, mock_check_permissions):
         self.api_client.force_authenticate(user=self.user)
         existing_support = Support.objects.create(message='Message test', full_name='Test User', client=self.user,
@@ -71,7 +71,7 @@ class PermissionViewSetTestCase(TestCase):
         self.assertEqual(updated_support['status'], 'Resolved')
         mock_check_permissions.assert_called()
 
-    @patch('support.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_delete_support(self, mock_check_permissions):
         existing_support = Support.objects.create(message='Message test', full_name='Test User',
                                                   email=self.email)
@@ -82,7 +82,7 @@ class PermissionViewSetTestCase(TestCase):
         self.assertFalse(existing_support.deleted_at is None)
         mock_check_permissions.assert_called()
 
-    @patch('support.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_list_support(self, mock_check_permissions):
         Support.objects.create(message='Message test 1', full_name='Test User',
                                email=self.email)
@@ -93,10 +93,10 @@ class PermissionViewSetTestCase(TestCase):
 
         response = self.api_client.get(self.url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 3)
+        self.assertEqual(len(response.data['results']), 3)
         mock_check_permissions.assert_called()
 
-    @patch('support.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_retrieve_support(self, mock_check_permissions):
         support1=Support.objects.create(message='Message test 1', full_name='Test User',
                                email=self.email)
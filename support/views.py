@@ -2,7 +2,7 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
-from helpers.permission_helpers import unauthorized, check_permissions, check_auth
+from helpers.permission_helpers import ActionPermission, check_auth, unauthorized
 from support.models import Support
 from support.serializer import SupportSerializer
 
@@ -10,6 +10,15 @@ from support.serializer import SupportSerializer
 class SupportViewSet(viewsets.ModelViewSet):
     queryset = Support.objects.filter(deleted_at__isnull=True)
     serializer_class = SupportSerializer
+    permission_classes = [ActionPermission]
+    action_permissions = {
+        'update': 'can_update_support',
+        'partial_update': 'can_update_support',
+        'update_status': 'can_update_support_status',
+        'destroy': 'can_delete_support',
+        'list': 'can_view_support_list',
+        'retrieve': 'can_view_support',
+    }
 
     def create(self, request, *args, **kwargs):
         if check_auth(request):
@@ -20,8 +29,6 @@ class SupportViewSet(viewsets.ModelViewSet):
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     def update(self, request, *args, **kwargs):
-        if not check_permissions(request, 'can_update_support'):
-            return unauthorized()
         instance = self.get_object()
         if instance.client != request.user:
             return unauthorized()
@@ -32,8 +39,6 @@ class SupportViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=['put'])
     def update_status(self, request, *args, **kwargs):
-        if not check_permissions(request, 'can_update_support_status'):
-            return unauthorized()
         instance = self.get_object()
         data = {
             'status': request.data.get('status')
@@ -44,18 +49,6 @@ class SupportViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
     def destroy(self, request, *args, **kwargs):
-        if not check_permissions(request, 'can_delete_support'):
-            return unauthorized()
         role = self.get_object()
         role.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
-
-    def list(self, request, *args, **kwargs):
-        if not check_permissions(request, 'can_view_support_list'):
-            return unauthorized()
-        return super().list(request, *args, **kwargs)
-
-    def retrieve(self, request, *args, **kwargs):
-        if not check_permissions(request, 'can_view_support'):
-            return unauthorized()
-        return super().retrieve(request, *args, **kwargs)
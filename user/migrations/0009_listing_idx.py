@@ -0,0 +1,19 @@
+# Generated by Django 5.0.4 on 2026-10-18 20:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('roles', '0007_listing_idx'),
+        ('user', '0008_alter_client_gender'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['deleted_at', 'created_at', 'id'], name='client_listing_idx'),
+        ),
+    ]
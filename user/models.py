@@ -45,3 +45,6 @@ class Client(AbstractUser):
 
     class Meta:
         app_label = 'user'
+        indexes = [
+            models.Index(fields=['deleted_at', 'created_at', 'id'], name='client_listing_idx'),
+        ]
@@ -0,0 +1,25 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+from rest_framework.authtoken.models import Token
+
+from helpers.authentication import invalidate_cached_token, invalidate_cached_user, invalidate_cached_users
+from user.models import Client
+
+# sent once per bulk soft-delete with the list of deleted client ids
+clients_soft_deleted = Signal()
+
+
+@receiver(post_save, sender=Client)
+@receiver(post_delete, sender=Client)
+def client_changed(sender, instance, **kwargs):
+    invalidate_cached_user(instance.pk)
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    invalidate_cached_token(instance.key)
+
+
+@receiver(clients_soft_deleted)
+def clients_bulk_deleted(sender, ids, **kwargs):
+    invalidate_cached_users(ids)
@@ -1,14 +1,19 @@
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
 from django.urls import reverse
 from unittest.mock import patch
 from rest_framework import status
 
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
 from global_vars.models import Global_Vars
+from helpers.authentication import CachedTokenAuthentication
+from helpers.signed_tokens import issue_tokens
 from roles.models import Role, Permission
 from .models import Client
 from rest_framework.test import APIClient
-from user.views import check_permissions, check_auth
 
 User = get_user_model()
 
@@ -27,7 +32,7 @@ class ClientViewTestCase(TestCase):
             'date_of_birth': '1990-01-01',
         }
 
-    @patch('user.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_create_client_authenticated_with_permission(self, mock_check_permissions):
         response = self.api_client.post(self.url, self.data, format='json')
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
@@ -35,14 +40,15 @@ class ClientViewTestCase(TestCase):
         self.assertEqual(new_client['username'], 'testclient')
         mock_check_permissions.assert_called()
 
-    @patch('user.views.check_auth', return_value=False)
-    def test_create_client_not_authenticated(self, check_auth):
+    @patch('helpers.permission_helpers.get_user_permissions')
+    def test_create_client_not_authenticated(self, mock_get_user_permissions):
         response = self.api_client.post(self.url, self.data, format='json')
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response.data['message'], 'Unauthorized to do this action')
         self.assertEqual(Client.objects.count(), 1)
-        check_auth.assert_not_called()
+        mock_get_user_permissions.assert_not_called()
 
-    @patch('user.views.check_permissions', return_value=True)
+    @patch('helpers.permission_helpers.check_permissions', return_value=True)
     def test_update_client(self, mock_check_permissions):
         client = Client.objects.create(
             username='existclient',
@@ -147,7 +153,7 @@ class ClientViewTestCase(TestCase):
 
         response = self.api_client.get(self.url)
         self.assertGreater(Client.objects.count(), 2)
-        self.assertEqual(response.data[2]['username'], 'newclient2')
+        self.assertEqual(response.data['results'][2]['username'], 'newclient2')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
     def test_retrieve_client(self):
@@ -213,7 +219,7 @@ class ClientViewTestCase(TestCase):
         self.assertIn('message', response.data)
 
     def test_login_email(self):
-        client = Client.objects.create(
+        client = Client.objects.create_user(
             username='newClient',
             first_name='First Name',
             last_name='Last name',
@@ -223,12 +229,12 @@ class ClientViewTestCase(TestCase):
             date_of_birth='1990-01-01')
 
         url = f'{self.url}login/'
-        response = self.api_client.post(url, data={'email': client.email, 'password': client.password}, format='json')
+        response = self.api_client.post(url, data={'email': client.email, 'password': 'password'}, format='json')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn('token', response.data)
 
     def test_login_phone(self):
-        client = Client.objects.create(
+        client = Client.objects.create_user(
             username='newClient',
             first_name='First Name',
             last_name='Last name',
@@ -238,10 +244,22 @@ class ClientViewTestCase(TestCase):
             date_of_birth='1990-01-01')
 
         url = f'{self.url}login/'
-        response = self.api_client.post(url, data={'phone_number': client.phone_number, 'password': client.password}, format='json')
+        response = self.api_client.post(url, data={'phone_number': client.phone_number, 'password': 'password'}, format='json')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn('token', response.data)
 
+    def test_login_wrong_password(self):
+        client = Client.objects.create_user(username='newClient', email='email1@email.com', password='password')
+
+        url = f'{self.url}login/'
+        for token_type in (None, 'signed'):
+            data = {'email': client.email, 'password': 'wrong', 'token_type': token_type}
+            response = self.api_client.post(url, data=data, format='json')
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+            self.assertNotIn('token', response.data)
+            self.assertNotIn('access', response.data)
+        self.assertFalse(Token.objects.filter(user=client).exists())
+
     def test_register(self):
         data = {
             'username': 'newClient',
@@ -255,3 +273,174 @@ class ClientViewTestCase(TestCase):
         response = self.api_client.post(url, data=data, format='json')
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(response.data['username'], data['username'])
+
+    def test_self_reset_password_resolves_permissions_once(self):
+        role = Role.objects.create(name='Test')
+        role.permissions.add(Permission.objects.create(name='can_reset_password_self'))
+        self.user.roles.add(role)
+        self.api_client.force_authenticate(user=self.user)
+        Global_Vars.objects.create(key='default_password', value='newpassword')
+
+        with patch('helpers.permission_helpers.get_user_permissions',
+                   return_value=frozenset({'can_reset_password_self'})) as mock_get_user_permissions:
+            response = self.api_client.post(f'{self.url}self_reset_password/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        mock_get_user_permissions.assert_called_once()
+
+    def test_action_without_permission(self):
+        self.api_client.force_authenticate(user=self.user)
+        response = self.api_client.delete(f'{self.url}self_destroy/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.user.refresh_from_db()
+        self.assertIsNone(self.user.deleted_at)
+
+    def test_destroy_list_clients(self):
+        permission = Permission.objects.create(name='can_delete_client_all')
+        role = Role.objects.create(name='Main')
+        role.permissions.add(permission)
+        self.user.roles.add(role)
+        self.api_client.force_authenticate(user=self.user)
+        clients = [Client.objects.create(username=f'bulk{i}', email=f'bulk{i}@email.com') for i in range(3)]
+        ids = [client.id for client in clients]
+
+        with patch('user.signals.invalidate_cached_users') as mock_invalidate:
+            with self.captureOnCommitCallbacks(execute=True):
+                with self.assertNumQueries(5):
+                    response = self.api_client.delete(f'{self.url}destroy_list/', data={'ids': ids + [9999]},
+                                                      format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['deleted'], ids)
+        self.assertEqual(response.data['missing'], [9999])
+        self.assertEqual(Client.objects.filter(id__in=ids, deleted_at__isnull=False).count(), 3)
+        for client in Client.objects.filter(id__in=ids):
+            self.assertEqual(client.updated_at, client.deleted_at)
+        mock_invalidate.assert_called_once_with(ids)
+
+    def test_destroy_list_rejects_ids_that_are_not_a_list(self):
+        permission = Permission.objects.create(name='can_delete_client_all')
+        role = Role.objects.create(name='Main')
+        role.permissions.add(permission)
+        self.user.roles.add(role)
+        self.api_client.force_authenticate(user=self.user)
+        clients = [Client.objects.create(username=f'bulk{i}', email=f'bulk{i}@email.com') for i in range(3)]
+
+        response = self.api_client.delete(f'{self.url}destroy_list/', data={'ids': f'{clients[0].id}{clients[1].id}'},
+                                          format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.api_client.delete(f'{self.url}destroy_list/', data={'ids': clients[0].id})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Client.objects.filter(deleted_at__isnull=False).exists())
+
+
+class CachedTokenAuthenticationTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='tokenuser', password='password')
+        self.token = Token.objects.create(user=self.user)
+        self.authentication = CachedTokenAuthentication()
+
+    def test_token_resolved_from_cache(self):
+        user, key = self.authentication.authenticate_credentials(self.token.key)
+        self.assertEqual(user, self.user)
+        with self.assertNumQueries(0):
+            user, key = self.authentication.authenticate_credentials(self.token.key)
+        self.assertEqual(user.username, 'tokenuser')
+
+    def test_cached_user_leaves_out_the_password(self):
+        self.authentication.authenticate_credentials(self.token.key)
+        self.assertNotIn('password', cache.get(f'auth:user:{self.user.pk}'))
+
+        user, key = self.authentication.authenticate_credentials(self.token.key)
+        user.delete()
+        self.user.refresh_from_db()
+        self.assertIsNotNone(self.user.deleted_at)
+        self.assertTrue(self.user.check_password('password'))
+
+    def test_deactivated_user_rejected(self):
+        self.authentication.authenticate_credentials(self.token.key)
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authentication.authenticate_credentials(self.token.key)
+
+    def test_logout_revokes_token(self):
+        api_client = APIClient()
+        api_client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        response = api_client.post(reverse('clients-logout'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(Token.objects.filter(user=self.user).exists())
+        with self.assertRaises(AuthenticationFailed):
+            self.authentication.authenticate_credentials(self.token.key)
+
+
+class SignedTokenTestCase(TestCase):
+    def setUp(self):
+        self.url = reverse('clients-list')
+        self.api_client = APIClient()
+        self.client_user = Client.objects.create_user(username='signed', email='signed@email.com',
+                                                      password='password')
+
+    def login(self):
+        response = self.api_client.post(f'{self.url}login/', data={'email': 'signed@email.com', 'password': 'password',
+                                                                    'token_type': 'signed'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_access_token_authenticates_without_token_table(self):
+        tokens = self.login()
+        self.assertFalse(Token.objects.filter(user=self.client_user).exists())
+        self.api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {tokens["access"]}')
+        response = self.api_client.post(f'{self.url}logout/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_tampered_access_token_rejected(self):
+        tokens = self.login()
+        self.api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {tokens["access"]}x')
+        response = self.api_client.post(f'{self.url}logout/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_refresh_rotation(self):
+        tokens = self.login()
+        response = self.api_client.post(f'{self.url}refresh/', data={'refresh': tokens['refresh']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response.data['refresh'], tokens['refresh'])
+
+        response = self.api_client.post(f'{self.url}refresh/', data={'refresh': tokens['refresh']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_expired_access_token_rejected(self):
+        tokens = self.login()
+        self.api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {tokens["access"]}')
+        with self.settings(SIGNED_ACCESS_TOKEN_LIFETIME=-1):
+            response = self.api_client.post(f'{self.url}logout/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_access_token_rejected_after_permissions_change(self):
+        tokens = self.login()
+        self.api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {tokens["access"]}')
+        self.client_user.roles.add(Role.objects.create(name='Editor'))
+        response = self.api_client.post(f'{self.url}logout/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.api_client.credentials()
+        response = self.api_client.post(f'{self.url}refresh/', data={'refresh': tokens['refresh']}, format='json')
+        self.api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {response.data["access"]}')
+        response = self.api_client.post(f'{self.url}logout/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_logout_checks_refresh_token_first(self):
+        tokens = self.login()
+        Token.objects.create(user=self.client_user)
+        other = Client.objects.create(username='other', email='other@email.com', password='password')
+        other_refresh = issue_tokens(other)['refresh']
+
+        self.api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {tokens["access"]}')
+        response = self.api_client.post(f'{self.url}logout/', data={'refresh': other_refresh}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertTrue(Token.objects.filter(user=self.client_user).exists())
+        response = self.api_client.post(f'{self.url}refresh/', data={'refresh': other_refresh}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.api_client.post(f'{self.url}logout/', data={'refresh': tokens['refresh']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.api_client.post(f'{self.url}refresh/', data={'refresh': tokens['refresh']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -1,10 +1,16 @@
-from django.db import DatabaseError
+from django.db import DatabaseError, transaction
+from django.utils import timezone
 from rest_framework import viewsets, status
 from rest_framework.response import Response
-from global_vars.models import Global_Vars
+from global_vars import cache as global_vars
+from cart.storage import merge_session_cart
+from cartItem.services import CartError
 from user.models import Client
 from user.serializer import ClientSerializer
-from helpers.permission_helpers import check_permissions, unauthorized, check_auth
+from user.signals import clients_soft_deleted
+from helpers.bulk import get_ids
+from helpers.permission_helpers import ActionPermission, check_auth, unauthorized
+from helpers.signed_tokens import issue_tokens, load_refresh_token, revoke_refresh_token, rotate_refresh_token
 from django.contrib.auth.hashers import make_password
 from rest_framework.authtoken.models import Token
 from django.contrib.auth import get_user_model
@@ -16,11 +22,22 @@ from rest_framework.decorators import action
 class ClientViewSet(viewsets.ModelViewSet):
     queryset = Client.objects.filter(deleted_at__isnull=True)
     serializer_class = ClientSerializer
+    permission_classes = [ActionPermission]
+    action_permissions = {
+        'create': 'can_create_client',
+        'update': 'can_update_client',
+        'partial_update': 'can_update_client',
+        'self_update': 'can_update_client_self',
+        'destroy_list': 'can_delete_client_all',
+        'destroy': 'can_delete_client',
+        'self_destroy': 'can_delete_client_self',
+        'list': 'can_view_client_all',
+        'retrieve': 'can_view_client',
+        'reset_password': 'can_reset_password',
+        'self_reset_password': (['can_reset_password', 'can_reset_password_self'], 'OR'),
+    }
 
     def create(self, request, *args, **kwargs):
-        if not check_permissions(request, 'can_create_client'):
-            return unauthorized()
-
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         self.perform_create(serializer)
@@ -28,8 +45,6 @@ class ClientViewSet(viewsets.ModelViewSet):
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
     def update(self, request, *args, **kwargs):
-        if not check_permissions(request, 'can_update_client'):
-            return unauthorized()
         instance = self.get_object()
         serializer = self.get_serializer(instance, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
@@ -38,8 +53,6 @@ class ClientViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['put'])
     def self_update(self, request, *args, **kwargs):
-        if not check_permissions(request, ['can_update_client_self']):
-            return unauthorized()
         instance = request.user
         serializer = self.get_serializer(instance, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
@@ -48,65 +61,46 @@ class ClientViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['delete'])
     def destroy_list(self, request, *args, **kwargs):
-        if not check_permissions(request, 'can_delete_client_all'):
-            return unauthorized()
-        ids_to_delete = request.data.get('ids', [])  # Get the list of IDs from the request data
-        for id in ids_to_delete:
-            instance = self.queryset.get(id=id)  # Get the instance with the given ID
-            self.perform_destroy(instance)  # Delete the instance
-        return Response(status=status.HTTP_204_NO_CONTENT)
+        ids_to_delete = get_ids(request)
+        if ids_to_delete is None:
+            return Response({"error": "ids must be a list of integers"}, status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            deleted = list(self.get_queryset().filter(id__in=ids_to_delete).values_list('id', flat=True))
+            now = timezone.now()
+            Client.objects.filter(id__in=deleted).update(deleted_at=now, updated_at=now)
+            transaction.on_commit(lambda: clients_soft_deleted.send(sender=Client, ids=deleted))
+        missing = sorted(set(ids_to_delete) - set(deleted))
+        return Response({"deleted": sorted(deleted), "missing": missing}, status=status.HTTP_200_OK)
 
     def destroy(self, request, *args, **kwargs):
-        if not check_permissions(request, 'can_delete_client'):
-            return unauthorized()
         client = self.get_object()
         client.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(detail=False, methods=['delete'])
     def self_destroy(self, request, *args, **kwargs):
-        if not check_permissions(request, 'can_delete_client_self'):
-            return unauthorized()
         instance = request.user
         instance.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
-    def list(self, request, *args, **kwargs):
-        if not check_permissions(request, 'can_view_client_all'):
-            return unauthorized()
-        return super().list(request, *args, **kwargs)
-
-    def retrieve(self, request, *args, **kwargs):
-        if not check_permissions(request, 'can_view_client'):
-            return unauthorized()
-        return super().retrieve(request, *args, **kwargs)
-
     @action(detail=True, methods=['post'])
     def reset_password(self, request, *args, **kwargs):
-        if not check_permissions(request, 'can_reset_password'):
-            return unauthorized()
         instance = self.get_object()
-        try:
-            global_var = Global_Vars.objects.get(key='default_password')
-        except Global_Vars.DoesNotExist:
+        new_password = global_vars.get('default_password')
+        if new_password is None:
             return Response({"error": "Default password not set in global variables"},
                             status=status.HTTP_400_BAD_REQUEST)
-        new_password = global_var.value
         instance.password = make_password(new_password)
         instance.save()
         return Response(status=status.HTTP_200_OK, data={"message": "Password reset successfully"})
 
     @action(detail=False, methods=['post'])
     def self_reset_password(self, request, *args, **kwargs):
-        if not check_permissions(request, ['can_reset_password', 'can_reset_password_self'], option='OR'):
-            return unauthorized()
         instance = request.user
-        try:
-            global_var = Global_Vars.objects.get(key='default_password')
-        except Global_Vars.DoesNotExist:
+        new_password = global_vars.get('default_password')
+        if new_password is None:
             return Response({"error": "Default password not set in global variables"},
                             status=status.HTTP_400_BAD_REQUEST)
-        new_password = global_var.value
         instance.password = make_password(new_password)
         return Response(status=status.HTTP_200_OK, data={"message": "Password reset successfully"})
 
@@ -127,17 +121,48 @@ class ClientViewSet(viewsets.ModelViewSet):
                 client = user.objects.get(email=email)
             else:
                 client = user.objects.get(phone_number=phone_number)
-        except client.DoesNotExist:
+        except user.DoesNotExist:
             return Response({"error": "User not found"}, status=status.HTTP_404_NOT_FOUND)
 
+        if not client.check_password(password):
+            return Response({"error": "Invalid credentials"}, status=status.HTTP_401_UNAUTHORIZED)
+
         if not client.is_active:
             return Response({"error": "User is not active"}, status=status.HTTP_403_FORBIDDEN)
 
-        token, created = Token.objects.get_or_create(user=client)
-        if not created:
-            return Response({"error": "Failed to create token"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        if request.data.get('token_type') == 'signed':
+            tokens = issue_tokens(client)
+        else:
+            token, created = Token.objects.get_or_create(user=client)
+            if not created:
+                return Response({"error": "Failed to create token"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            tokens = {"token": token.key}
+
+        # only once the caller is known to own the account
+        try:
+            merge_session_cart(request, client)
+        except CartError:
+            # the session cart is busy; it is kept and can still be merged through cart/merge
+            pass
+        return Response({"message": "User logged in successfully", **tokens}, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['post'])
+    def refresh(self, request):
+        refresh = request.data.get('refresh')
+        if not refresh:
+            return Response({"error": "Refresh token is required"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(rotate_refresh_token(refresh), status=status.HTTP_200_OK)
 
-        return Response({"message": "User logged in successfully", "token": token.key}, status=status.HTTP_200_OK)
+    @action(detail=False, methods=['post'])
+    def logout(self, request):
+        if not check_auth(request):
+            return unauthorized()
+        # checked before anything is revoked, so a bad refresh token leaves the session untouched
+        refresh = load_refresh_token(request.data['refresh'], request.user) if request.data.get('refresh') else None
+        Token.objects.filter(user=request.user).delete()
+        if refresh:
+            revoke_refresh_token(refresh)
+        return Response({"message": "User logged out successfully"}, status=status.HTTP_200_OK)
 
     @action(detail=False, methods=['post'])
     def register(self, request):